@@ -0,0 +1,86 @@
+"""Один такт ControlLoop: стики, Tello-симуляция, манёвры (autoland/autoback и много дорожек)."""
+import argparse
+
+from benchmarks.common import measure, report, run_suite, headless_sdl
+
+headless_sdl()
+
+from control_core import ControlParams, ControlLoop, TelloController, ARM, THROTTLE, ROLL
+from control_inputs import ControlInput
+from maneuvers import ManeuverEngine, legacy_maneuvers
+
+
+class _HeldInput:
+    """Постоянно зажатые стики, без событий."""
+
+    def __init__(self):
+        self.inp = ControlInput()
+        self.inp.axes[ROLL] = 1
+        self.inp.held[ROLL] = True
+        self.inp.tello[0] = 1
+
+    def poll(self, now):
+        return self.inp
+
+
+class _NullOutput:
+    def __init__(self):
+        self.last = None
+
+    def write(self, loop):
+        self.last = loop.channels.ch
+
+
+def _many_specs(n):
+    """n зацикленных манёвров по всем восьми каналам."""
+    specs = {}
+    for i in range(n):
+        specs[f"m{i}"] = {
+            "loop": True, "priority": i, "merge": "yield", "group": f"g{i}",
+            "channels": {f"ch{c + 1}": [[0, "mid"], [0.5 + 0.1 * c, "mid+100", "ease"],
+                                        [1.0 + 0.2 * c, "mid-100", "exp"], [2.0 + 0.2 * c, "mid"]]
+                         for c in range(8)},
+        }
+    return specs
+
+
+def _make_loop(specs, start):
+    params = ControlParams({})
+    engine = ManeuverEngine(specs, params) if specs else None
+    tello = TelloController(None, simulation=True)
+    tello.flying = True
+    loop = ControlLoop(params, _HeldInput(), [_NullOutput()], tello=tello, maneuvers=engine)
+    loop.channels.ch[ARM] = params.max_us
+    loop.channels.ch[THROTTLE] = 1700
+    for name in start:
+        engine.toggle(name, loop.channels.ch, 0.0)
+    return loop
+
+
+def run():
+    params = ControlParams({})
+    # длинные профили, чтобы за замер не закончились
+    legacy = legacy_maneuvers(params, {"descend_time_slow": 1e6, "disarm_on_land": False},
+                              {"ramp_time": 1e6, "hold_time": 1e6})
+    cases = (
+        ("tick.sticks_tello", None, ()),
+        ("tick.with_autoland_autoback", legacy, ("autoland_slow", "autoback")),
+        ("tick.maneuvers_8x8_tracks", _many_specs(8), [f"m{i}" for i in range(8)]),
+    )
+    results = {}
+    for name, specs, start in cases:
+        loop = _make_loop(specs, start)
+        clock = [0.0]
+
+        def tick():
+            clock[0] += 1.0 / 120
+            loop.tick(clock[0])
+
+        results[name] = measure(tick)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--out", default=None)
+    report(run_suite(run), parser.parse_args().out)
@@ -0,0 +1,67 @@
+"""draw_ui() + hud.flush() под SDL dummy: кадр без изменений и кадр с движущимися стиками."""
+import argparse
+
+from benchmarks.common import measure, report, run_suite, headless_sdl
+
+headless_sdl()
+
+import pygame
+
+from control_core import ControlLoop, TelloController, ROLL, THROTTLE
+from control_inputs import ScriptedInput
+from hud import Hud
+
+LINK = {"state": "connected", "port": "/dev/ttyUSB0", "protocol": "bin", "last_error": None,
+        "downtime_ms": 0.0, "last_outage_ms": None, "reconnects": 0}
+PPM = {"rate_hz": 50.0, "p50_ms": 0.01, "p95_ms": 0.05, "p99_ms": 0.1, "max_ms": 0.2, "errors": 0}
+
+
+def _setup(module):
+    pygame.init()
+    screen = pygame.display.set_mode((1400, 800))
+    font = pygame.font.SysFont("DejaVu Sans", 26)
+    font_small = pygame.font.SysFont("DejaVu Sans", 18)
+    hud = Hud(screen, font, font_small)
+    kwargs = {}
+    if module.__name__ == "with_wideo":
+        kwargs["maneuvers"] = module.make_maneuvers()
+    loop = ControlLoop(module.PARAMS, ScriptedInput([], module.BINDINGS), [],
+                       tello=TelloController(None, simulation=True), **kwargs)
+    return hud, loop
+
+
+def run():
+    import main
+    import with_wideo
+
+    results = {}
+    for module in (main, with_wideo):
+        hud, loop = _setup(module)
+        ch = loop.channels.ch
+        name = module.__name__
+        extra = (None, 0, None) if name == "with_wideo" else ()
+
+        def static():
+            module.draw_ui(hud, loop, 120.0, LINK, PPM, *extra)
+            hud.flush()
+
+        state = [0]
+
+        def moving():
+            state[0] += 1
+            ch[ROLL] = 1000 + state[0] % 1000
+            ch[THROTTLE] = 1000 + (state[0] * 3) % 1000
+            module.draw_ui(hud, loop, 100.0 + state[0] % 40, LINK, PPM, *extra)
+            hud.flush()
+
+        static()
+        results[f"draw_ui.{name}.static"] = measure(static)
+        results[f"draw_ui.{name}.moving_sticks"] = measure(moving)
+        pygame.display.quit()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--out", default=None)
+    report(run_suite(run), parser.parse_args().out)
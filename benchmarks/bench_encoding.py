@@ -0,0 +1,28 @@
+"""Кодирование кадра PPM: текстовая строка (прежний send_line) против бинарного кадра."""
+import argparse
+
+from benchmarks.common import measure, report, run_suite
+
+from ppm_protocol import PpmEncoder, PROTO_ASCII, PROTO_BIN, encode_ascii, crc8
+
+
+CH = [1500, 1520, 1300, 1480, 1000, 2000, 1000, 2000]
+
+
+def run():
+    ascii_enc = PpmEncoder(PROTO_ASCII)
+    bin_enc = PpmEncoder(PROTO_BIN)
+    frame = bin_enc.encode(CH)
+    return {
+        "encode.ascii_line": measure(lambda: encode_ascii(CH)),
+        "encode.ascii_encoder": measure(lambda: ascii_enc.encode(CH)),
+        "encode.bin_encoder": measure(lambda: bin_enc.encode(CH)),
+        "encode.crc8_frame": measure(lambda: crc8(frame, 1, len(frame) - 1)),
+        "encode.bytes_per_frame": {"ascii": len(encode_ascii(CH)), "bin": len(frame)},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--out", default=None)
+    report(run_suite(run), parser.parse_args().out)
@@ -0,0 +1,84 @@
+"""Путь видео with_wideo.py на синтетических кадрах 960×720: resize в буфер, показ его Surface."""
+import argparse
+
+from benchmarks.common import measure, report, run_suite, headless_sdl
+
+headless_sdl()
+
+import cv2
+import numpy as np
+import pygame
+
+from frame_presenter import FramePresenter
+from video_governor import LEVELS, level_format
+
+SRC_SIZE = (960, 720)
+DST_SIZE = (640, 360)
+
+
+def _frames(n=8):
+    rng = np.random.default_rng(1)
+    w, h = SRC_SIZE
+    return [rng.integers(0, 255, (h, w, 3), dtype=np.uint8) for _ in range(n)]
+
+
+def run():
+    pygame.init()
+    pygame.display.set_mode((1400, 800))
+    frames = _frames()
+    w, h = DST_SIZE
+    dst = np.empty((h, w, 3), dtype=np.uint8)
+    dst_surface = pygame.image.frombuffer(dst, DST_SIZE, "BGR")     # как слот VideoWorker
+    presenter = FramePresenter(DST_SIZE)
+    resized = [cv2.resize(f, DST_SIZE) for f in frames]
+    resized_surfaces = [pygame.image.frombuffer(r, DST_SIZE, "BGR") for r in resized]
+    i = [0]
+
+    def resize_into_buffer():
+        i[0] += 1
+        cv2.resize(frames[i[0] % len(frames)], DST_SIZE, dst=dst)
+
+    def present():
+        i[0] += 1
+        presenter.present(i[0], resized_surfaces[i[0] % len(resized)])
+
+    def full_path():
+        i[0] += 1
+        cv2.resize(frames[i[0] % len(frames)], DST_SIZE, dst=dst)
+        presenter.present(i[0], dst_surface)
+
+    def legacy_path():
+        # как было до VideoWorker/FramePresenter: новые массивы и Surface на каждый кадр
+        i[0] += 1
+        rgb = cv2.cvtColor(cv2.resize(frames[i[0] % len(frames)], DST_SIZE), cv2.COLOR_BGR2RGB)
+        pygame.surfarray.make_surface(rgb.swapaxes(0, 1))
+
+    def level_path(level):
+        # ступень VideoGovernor: resize в свой размер/интерполяцию, показ с растяжением до DST_SIZE
+        size, interpolation, every = level_format(level, DST_SIZE)
+        buf = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        surface = pygame.image.frombuffer(buf, size, "BGR")
+
+        def step():
+            i[0] += 1
+            cv2.resize(frames[i[0] % len(frames)], size, dst=buf, interpolation=interpolation)
+            presenter.present(i[0], surface)
+        return step
+
+    results = {
+        "video.resize_into_buffer": measure(resize_into_buffer),
+        "video.present": measure(present),
+        "video.resize_and_present": measure(full_path),
+        "video.legacy_resize_cvt_make_surface": measure(legacy_path),
+    }
+    for level, (name, _, _, every) in enumerate(LEVELS):
+        if every == 1:      # прореживание меняет частоту, а не цену кадра
+            results[f"video.level_{name}"] = measure(level_path(level))
+    pygame.display.quit()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--out", default=None)
+    report(run_suite(run), parser.parse_args().out)
@@ -0,0 +1,90 @@
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# бенчмарки запускаются из корня репозитория: python -m benchmarks.run
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def headless_sdl():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"     # баннер pygame в stdout ломает JSON
+
+
+def run_suite(run):
+    """run() набора; всё, что он печатает ([maneuver] ... и т.п.), — в stderr: stdout только под JSON."""
+    with contextlib.redirect_stdout(sys.stderr):
+        return run()
+
+
+def measure(fn, repeat=5, min_time=0.2):
+    """
+    Время одного вызова fn(): число вызовов подбирается так, чтобы один
+    повтор шёл не меньше min_time; из repeat повторов берутся min и медиана.
+    """
+    number = 1
+    while True:
+        t0 = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        dt = time.perf_counter_ns() - t0
+        if dt >= min_time * 1e9 or number >= 1 << 24:
+            break
+        number *= 2 if dt < min_time * 1e8 else max(2, int(min_time * 1e9 / max(dt, 1)) + 1)
+
+    runs = [dt / number]
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter_ns() - t0) / number)
+    runs.sort()
+    return {
+        "ns_per_op_min": round(runs[0], 1),
+        "ns_per_op_median": round(runs[len(runs) // 2], 1),
+        "ops_per_s": round(1e9 / runs[0], 1) if runs[0] > 0 else 0.0,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def git_version():
+    try:
+        return subprocess.check_output(["git", "describe", "--always", "--dirty"],
+                                       cwd=ROOT, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        "version": git_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "time": time.time(),
+    }
+
+
+def report(results, out=None):
+    """Печать в консоль + JSON (stdout, если out не задан)."""
+    for name, r in results.items():
+        if "ns_per_op_min" in r:
+            print(f"{name:<40} {r['ns_per_op_min'] / 1000:10.2f} us/op  ({r['ops_per_s']:.0f} op/s)",
+                  file=sys.stderr)
+    doc = {"env": environment(), "results": results}
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+        print(f"[bench] saved {out}", file=sys.stderr)
+    else:
+        json.dump(doc, sys.stdout, indent=2)
+        print()
+    return doc
@@ -0,0 +1,43 @@
+"""
+Все бенчмарки горячего пути PPM одним прогоном, результат — JSON.
+
+    python -m benchmarks.run --out bench.json
+    python -m benchmarks.run --only encoding tick
+"""
+import argparse
+import contextlib
+import importlib
+import sys
+
+from benchmarks.common import report, run_suite, headless_sdl
+
+headless_sdl()
+
+SUITES = {
+    "encoding": "benchmarks.bench_encoding",
+    "tick": "benchmarks.bench_control_tick",
+    "draw": "benchmarks.bench_draw_ui",
+    "video": "benchmarks.bench_video",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки горячего пути PPM")
+    parser.add_argument("--out", default=None, help="файл JSON (по умолчанию — stdout)")
+    parser.add_argument("--only", nargs="*", choices=sorted(SUITES), default=None)
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.only or SUITES:
+        try:
+            with contextlib.redirect_stdout(sys.stderr):
+                module = importlib.import_module(SUITES[name])
+        except ImportError as e:
+            print(f"[bench] skip {name}: {e}", file=sys.stderr)
+            continue
+        results.update(run_suite(module.run))
+    report(results, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+import json
+import os
+import sys
+
+from loop_profiler import LoopProfiler
+
+
+# ==== общее ядро управления для всех фронтендов ====
+#
+# ChannelState   — 8 PPM-каналов и операции над ними
+# TelloController — состояние Tello: взлёт по CH5, посадка, миссии, RC
+# ControlLoop    — один такт: ввод → действия → стики → Tello → манёвры → выходы
+#
+# Ввод (control_inputs.py) и выходы (control_outputs.py) подключаются
+# снаружи, сам цикл от pygame не зависит и гоняется без окна.
+
+CONFIG_FILE = "config.json"
+
+ROLL, PITCH, THROTTLE, YAW = 0, 1, 2, 3
+ARM = 7
+AUX = (4, 5, 6, 7)
+STICKS = (ROLL, PITCH, THROTTLE, YAW)
+CENTERED = (ROLL, PITCH, YAW)       # возвращаются в центр, газ — нет
+CHANNELS = 8
+
+# прежние step/fast_step/return_speed заданы "за такт" при clock.tick(120)
+LEGACY_HZ = 120
+MAX_DT = 0.25           # после зависания не "догоняем" стиками больше четверти секунды
+MAX_FIXED_STEPS = 8     # предел шагов фиксированного такта за один tick()
+
+
+def load_config(path=CONFIG_FILE):
+    if not os.path.exists(path):
+        print(f"[config] Файл {path} не найден!")
+        sys.exit(1)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def approach(v, target, delta):
+    if v < target - delta:
+        return v + delta
+    if v > target + delta:
+        return v - delta
+    return target
+
+
+class ControlParams:
+    """
+    Параметры каналов из секций control/ui конфига.
+
+    Скорости стиков — в мкс/с (stick_rate, fast_stick_rate, return_rate),
+    не зависят от частоты цикла. Если в конфиге только старые step/
+    fast_step/return_speed (мкс за такт), пересчитываются для 120 Гц.
+    tick_hz > 0 — интегрировать фиксированным шагом 1/tick_hz.
+    """
+
+    def __init__(self, cfg=None):
+        cfg = cfg or {}
+        ctrl = cfg.get("control", {})
+        ui = cfg.get("ui", {})
+        self.min_us = ctrl.get("min_us", 1000)
+        self.mid_us = ctrl.get("mid_us", 1500)
+        self.max_us = ctrl.get("max_us", 2000)
+        self.buff_size = ctrl.get("buff_size", 200)
+        self.return_speed = ui.get("return_speed", 25)
+        self.send_hz = ui.get("send_hz", 50)
+        self.loop_hz = ui.get("loop_hz", LEGACY_HZ)
+
+        self.stick_rate = ctrl.get("stick_rate", ctrl.get("step", 2) * LEGACY_HZ)
+        self.fast_stick_rate = ctrl.get("fast_stick_rate", ctrl.get("fast_step", 4) * LEGACY_HZ)
+        self.return_rate = ctrl.get("return_rate", self.return_speed * LEGACY_HZ)
+        self.tick_hz = ctrl.get("tick_hz", 0)
+
+
+class ChannelState:
+    """
+    8 каналов PPM: стартовые положения, переключатели, ограничения.
+
+    ch — целые мкс для выходов; дробная часть от интегрирования по dt
+    копится в frac, чтобы медленное движение не терялось на округлении.
+    """
+
+    def __init__(self, params):
+        self.p = params
+        self.ch = [params.mid_us] * CHANNELS
+        self.frac = [0.0] * CHANNELS
+        self.ch[THROTTLE] = params.min_us
+        for i in AUX:
+            self.ch[i] = params.min_us
+
+    def clamp(self, v):
+        lo, hi = self.p.min_us, self.p.max_us
+        return lo if v < lo else hi if v > hi else v
+
+    def _set(self, idx, v):
+        r = int(round(v))
+        self.ch[idx] = r
+        self.frac[idx] = v - r
+
+    def move(self, idx, delta):
+        self._set(idx, self.clamp(self.ch[idx] + self.frac[idx] + delta))
+
+    def recenter(self, idx, delta):
+        self._set(idx, approach(self.ch[idx] + self.frac[idx], self.p.mid_us, delta))
+
+    def is_armed(self):
+        return self.ch[ARM] > self.p.mid_us
+
+    def is_mid(self, v):
+        return self.p.mid_us - self.p.buff_size <= v <= self.p.mid_us + self.p.buff_size
+
+    def is_low(self, v):
+        return v <= self.p.min_us + 10
+
+    def is_high(self, v):
+        return v >= self.p.max_us - 10
+
+    def next_two(self, v):
+        """двухпозиционный переключатель: MIN <-> MAX"""
+        return self.p.max_us if self.is_low(v) else self.p.min_us
+
+    def next_three(self, v):
+        """циклический переключатель 3 положения"""
+        if self.is_low(v):
+            return self.p.mid_us
+        elif v < self.p.max_us - 10:
+            return self.p.max_us
+        return self.p.min_us
+
+    def reset_aux(self):
+        for i in AUX:
+            self.ch[i] = self.p.min_us
+
+
+class TelloController:
+    """
+    Состояние Tello для цикла управления.
+
+    output — TelloOutput (реальный дрон) или None; при simulation=True
+    вся логика работает без дрона ("управление без дрона").
+    missions — MissionPlanner (tello_missions.py); команды миссий
+    уходят в output, без дрона сегмент с командой длится свои t сек.
+    state — телеметрия дрона (TelloState) или None: по ней миссии
+    летят по замкнутому контуру.
+    vision — VisionPool (vision.py) или None: свежие результаты
+    обработчиков кадров для автоматики (vision.result(name, now)).
+    lander — PrecisionLander (precision_land.py) или None: посадка на
+    маркер по vision, пока включена — ведёт rc вместо миссий.
+    """
+
+    def __init__(self, output=None, simulation=False, missions=None, lander=None):
+        self.output = output
+        self.connected = output is not None
+        self.simulation = simulation and not self.connected
+        if missions is None:
+            # лениво: tello_missions тянет за собой numpy, ядру он нужен только здесь
+            from tello_missions import MissionPlanner
+            missions = MissionPlanner()
+        self.missions = missions
+        self.state = output.state if self.connected else None
+        self.vision = None
+        self.lander = lander
+        if self.connected:
+            self.missions.command = output.command
+            self.missions.state = self.state
+            if lander is not None:
+                lander.command = output.command
+        self.flying = False
+        self.takeoff_time = None        # когда делать Throw&Go / старт симуляции
+        self._takeoff_fut = None        # ответ на throwfly
+        self.rc = (0, 0, 0, 0)
+
+    def is_active(self):
+        return self.connected or self.simulation
+
+    def schedule_takeoff(self, now):
+        self.takeoff_time = now
+        if self.connected:
+            print("[tello] CH5 HIGH → Throw&Go через 1с, приготовься подбросить дрон")
+        elif self.simulation:
+            print("[tello] CH5 HIGH → симуляция взлёта через 1с")
+
+    def land(self, reason):
+        self.takeoff_time = None        # отложенный взлёт после посадки не нужен
+        if not (self.is_active() and self.flying):
+            return
+        print(f"[tello] {reason} → посадка / стоп симуляции")
+        # нулевая rc — раньше land: write() после посадки уже не зовётся, и последняя
+        # коррекция (например, ALIGN посадки на маркер) не должна уйти вслед за land
+        self.rc = (0, 0, 0, 0)
+        if self.connected:
+            self.output.land()
+        self.flying = False
+        self.missions.stop()
+        if self.lander is not None:
+            self.lander.stop()
+
+    def precision_land(self, now):
+        """Включить / отменить посадку на маркер (только в полёте)."""
+        lander = self.lander
+        if lander is None:
+            print("[tello] Precision land недоступна (нужно видео и --vision)")
+            return
+        if lander.active:
+            lander.stop("отмена")
+        elif self.flying and lander.start(now, self.vision):
+            self.missions.stop()
+
+    def shutdown(self, streamoff=False):
+        """Выход: остановить RC и посадить, если ещё летит."""
+        if self.connected:
+            self.output.close(land=self.flying, streamoff=streamoff)
+
+    def update(self, now, manual):
+        """manual — ручные оси Tello в [-1, 1]: lr, fb, ud, yw."""
+        # --- запуск Throw&Go / симуляции по таймеру ---
+        if self.takeoff_time is not None and now >= self.takeoff_time and not self.flying:
+            if self.connected:
+                print("[tello] Throw&Go — подбрось дрон!")
+                self._takeoff_fut = self.output.throw_takeoff()
+                self.flying = True
+            elif self.simulation:
+                print("[tello] симуляция: считаем, что Tello взлетел")
+                self.flying = True
+            self.takeoff_time = None
+
+        # ответ на throwfly приходит асинхронно — ошибка снимает флаг полёта
+        fut = self._takeoff_fut
+        if fut is not None and fut.done():
+            if fut.exception() is not None:
+                print(f"[tello] initiate_throw_takeoff error: {fut.exception()}")
+                self.flying = False
+            self._takeoff_fut = None
+
+        if not (self.is_active() and self.flying):
+            self.rc = (0, 0, 0, 0)
+            return self.rc
+
+        s = self.missions.manual_speed
+        lr, fb, ud, yw = int(manual[0] * s), int(manual[1] * s), int(manual[2] * s), int(manual[3] * s)
+        lander = self.lander
+        if lander is not None and lander.active:
+            self.rc = lander.update(now, lr, fb, ud, yw)
+            if lander.landing:
+                self.land("Precision land: площадка под дроном")
+            return self.rc
+
+        self.rc = self.missions.update(now, lr, fb, ud, yw)
+        return self.rc
+
+
+class ControlLoop:
+    """
+    Один такт управления, общий для всех фронтендов.
+
+    source  — источник ввода с poll(now) → ControlInput
+    outputs — объекты с write(loop): serial PPM, vJoy/uinput, Tello ...
+    tello   — TelloController или None
+    maneuvers — ManeuverEngine (автопосадка, полёт назад, ...) или None
+
+    Профиль AUX:
+      aux_positions=2/3 — двух- или трёхпозиционные тумблеры
+      aux_needs_arm     — тумблеры CH5–CH7 работают только при ARM
+      disarm_aux        — при DISARM сбрасывать CH5–CH7 вместе с газом
+
+    profiler — LoopProfiler: такт отмечает стадии poll/integrate/tello/
+    auto/outputs. key_ns — когда цикл увидел нажатие (для замера
+    клавиша → serial), 0 если нажатий не было.
+    """
+
+    def __init__(self, params, source, outputs=(), tello=None, maneuvers=None,
+                 aux_positions=2, aux_needs_arm=True, disarm_aux=True,
+                 profiler=None):
+        self.params = params
+        self.channels = ChannelState(params)
+        self.source = source
+        self.outputs = list(outputs)
+        self.tello = tello
+        self.maneuvers = maneuvers
+        self.aux_positions = aux_positions
+        self.aux_needs_arm = aux_needs_arm
+        self.disarm_aux = disarm_aux
+        self.profiler = profiler or LoopProfiler(enabled=False)
+        self.running = True
+        self.ticks = 0
+        self.key_ns = 0
+
+        self.fixed_dt = 1.0 / params.tick_hz if params.tick_hz else 0.0
+        self.now = None
+        self._last = None
+        self._acc = 0.0
+
+    # --- такт ---
+
+    def tick(self, now):
+        """
+        Один проход цикла. Стики интегрируются по реальному dt с прошлого
+        вызова (или фиксированными шагами fixed_dt через аккумулятор),
+        так что частота вызова tick() не меняет скорость стиков.
+        """
+        dt = 0.0 if self._last is None else min(max(now - self._last, 0.0), MAX_DT)
+        self._last = now
+        self.now = now
+
+        prof = self.profiler
+        inp = self.source.poll(now)
+        self.key_ns = inp.key_ns
+        prof.mark("poll")
+
+        for action, arg in inp.actions:
+            self.handle(action, arg, now)
+
+        # каналы, заданные напрямую (сценарий), — поверх стиков
+        c = self.channels
+        for idx, v in inp.targets.items():
+            c.ch[idx] = c.clamp(v)
+            c.frac[idx] = 0.0
+
+        if self.fixed_dt:
+            self._acc += dt
+            steps = 0
+            while self._acc >= self.fixed_dt and steps < MAX_FIXED_STEPS:
+                self.integrate(inp, self.fixed_dt)
+                self._acc -= self.fixed_dt
+                steps += 1
+            if steps == MAX_FIXED_STEPS:
+                self._acc = 0.0
+        else:
+            self.integrate(inp, dt)
+        prof.mark("integrate")
+
+        if self.tello is not None:
+            self.tello.update(now, inp.tello)
+        prof.mark("tello")
+
+        if self.maneuvers is not None:
+            self.maneuvers.update(self.channels.ch, now, inp.held)
+        prof.mark("auto")
+
+        for out in self.outputs:
+            out.write(self)
+        prof.mark("outputs")
+
+        self.ticks += 1
+        return inp
+
+    def overridden(self, idx, held=False):
+        """
+        Канал сейчас ведёт манёвр — руками не трогаем и не центрируем.
+        yield/abort уступают стику, который держат (held).
+        """
+        return self.maneuvers is not None and self.maneuvers.overrides(idx, held)
+
+    def integrate(self, inp, dt):
+        c = self.channels
+        ch = c.ch
+        p = self.params
+
+        if not c.is_armed():
+            ch[THROTTLE] = p.min_us
+            c.frac[THROTTLE] = 0.0
+            if self.disarm_aux:
+                for i in (4, 5, 6):
+                    ch[i] = p.min_us
+        else:
+            step = (p.fast_stick_rate if inp.fast else p.stick_rate) * dt
+            for idx in STICKS:
+                if inp.axes[idx] and not self.overridden(idx, True):
+                    c.move(idx, step * inp.axes[idx])
+
+        # центрирование стиков
+        back = p.return_rate * dt
+        for idx in CENTERED:
+            if not inp.held[idx] and not self.overridden(idx):
+                c.recenter(idx, back)
+
+    # --- действия (клавиши, кнопки, сценарий) ---
+
+    def handle(self, action, arg, now):
+        c = self.channels
+        ch = c.ch
+        armed = c.is_armed()
+
+        if action == "quit":
+            # посадить Tello (если летит) и выйти
+            if self.tello is not None:
+                self.tello.land("ESC")
+            if self.maneuvers is not None:
+                self.maneuvers.stop_all()
+            self.running = False
+
+        elif action == "aux":
+            if armed or not self.aux_needs_arm:
+                self.toggle_aux(arg, now)
+
+        elif action == "arm":
+            ch[ARM] = c.next_three(ch[ARM]) if self.aux_positions == 3 else c.next_two(ch[ARM])
+
+        elif action == "aux_reset":
+            c.reset_aux()
+
+        elif action == "throttle_kill":
+            ch[THROTTLE] = self.params.min_us
+
+        elif action == "maneuver" and self.maneuvers is not None:
+            self.maneuvers.toggle(arg, ch, now, armed)
+
+        elif action == "tello_land" and self.tello is not None:
+            self.tello.land(arg or "P")
+
+        elif action == "tello_mission" and self.tello is not None and self.tello.flying:
+            if self.tello.lander is not None:
+                self.tello.lander.stop("миссия")
+            self.tello.missions.toggle(arg, now)
+
+        elif action == "tello_precision_land" and self.tello is not None:
+            self.tello.precision_land(now)
+
+        elif action == "tello_pause" and self.tello is not None:
+            self.tello.missions.pause(now)
+
+    def toggle_aux(self, idx, now):
+        c = self.channels
+        prev = c.ch[idx]
+        c.ch[idx] = c.next_three(prev) if self.aux_positions == 3 else c.next_two(prev)
+
+        # CH5 LOW → HIGH: планируем Throw&Go или симуляцию
+        if idx == 4 and self.tello is not None and c.is_low(prev) and c.is_high(c.ch[idx]):
+            self.tello.schedule_takeoff(now)
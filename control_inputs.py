@@ -0,0 +1,287 @@
+import json
+import time
+
+import pygame
+
+from control_core import ROLL, PITCH, THROTTLE, YAW
+
+
+# ==== источники ввода для ControlLoop ====
+#
+# Любой источник — объект с poll(now) → ControlInput.
+# axes/held — стики PPM (roll, pitch, throttle, yaw), значения в [-1, 1]
+# tello     — ручные оси Tello (lr, fb, ud, yw), значения в [-1, 1]
+# actions   — дискретные действия за такт: ("aux", 4), ("arm", None), ...
+# targets   — {канал: мкс} каналы, которые держатся на заданном значении
+# events    — прочие события pygame для UI (VIDEOEXPOSE и т.п.)
+# key_ns    — perf_counter_ns(), когда увидели первое нажатие за такт, иначе 0
+
+# стики PPM: ось → (клавиша "минус", клавиша "плюс")
+PPM_KEYS = {
+    ROLL: (pygame.K_LEFT, pygame.K_RIGHT),
+    PITCH: (pygame.K_DOWN, pygame.K_UP),
+    THROTTLE: (pygame.K_s, pygame.K_w),
+    YAW: (pygame.K_a, pygame.K_d),
+}
+
+# Tello: lr, fb, ud, yw — ((клавиша, знак), (клавиша, знак)); зажаты обе —
+# главнее первая, как в прежних main.py / tello_manage.py: влево, вперёд,
+# вверх, поворот влево
+TELLO_KEYS = (
+    ((pygame.K_k, -1), (pygame.K_SEMICOLON, 1)),
+    ((pygame.K_o, 1), (pygame.K_l, -1)),
+    ((pygame.K_y, 1), (pygame.K_h, -1)),
+    ((pygame.K_g, -1), (pygame.K_j, 1)),
+)
+
+FAST_KEYS = (pygame.K_LSHIFT, pygame.K_RSHIFT)
+
+
+class ControlInput:
+    """Ввод за один такт. Объект переиспользуется источником."""
+
+    __slots__ = ("axes", "held", "fast", "tello", "actions", "targets", "events", "key_ns")
+
+    def __init__(self):
+        self.axes = [0, 0, 0, 0]
+        self.held = [False, False, False, False]
+        self.fast = False
+        self.tello = [0, 0, 0, 0]
+        self.actions = []
+        self.targets = {}
+        self.events = []
+        self.key_ns = 0
+
+
+class KeyboardInput:
+    """
+    Клавиатура pygame.
+
+    bindings — {клавиша: (действие, аргумент)} для KEYDOWN;
+    стики и оси Tello читаются из key.get_pressed() каждый такт.
+    ppm_keys / tello_keys = None — соответствующие оси не используются.
+    """
+
+    def __init__(self, bindings, ppm_keys=PPM_KEYS, tello_keys=TELLO_KEYS, fast_keys=FAST_KEYS):
+        self.bindings = dict(bindings)
+        self.ppm_keys = ppm_keys or {}
+        self.tello_keys = tello_keys or ()
+        self.fast_keys = fast_keys
+        self._inp = ControlInput()
+
+    def poll(self, now):
+        inp = self._inp
+        inp.actions.clear()
+        inp.events.clear()
+        inp.key_ns = 0
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                inp.actions.append(("quit", None))
+                continue
+            if event.type == pygame.KEYDOWN:
+                if not inp.key_ns:
+                    inp.key_ns = time.perf_counter_ns()
+                if event.key in self.bindings:
+                    inp.actions.append(self.bindings[event.key])
+                    continue
+            inp.events.append(event)
+
+        keys = pygame.key.get_pressed()
+        inp.fast = any(keys[k] for k in self.fast_keys)
+
+        for idx, (neg, pos) in self.ppm_keys.items():
+            inp.axes[idx] = keys[pos] - keys[neg]
+            inp.held[idx] = keys[pos] or keys[neg]
+
+        for idx, ((first, s1), (second, s2)) in enumerate(self.tello_keys):
+            inp.tello[idx] = s1 if keys[first] else s2 if keys[second] else 0
+
+        return inp
+
+
+class JoystickInput:
+    """
+    Джойстик/пульт через pygame.joystick.
+
+    axis_map   — {ось PPM: (номер оси джойстика, инверсия)}
+    button_map — {кнопка: (действие, аргумент)}, срабатывает по нажатию
+    События pygame не забирает — совмещается с KeyboardInput через MergedInput.
+    """
+
+    def __init__(self, index=0, axis_map=None, button_map=None, deadzone=0.05):
+        pygame.joystick.init()
+        self.joystick = pygame.joystick.Joystick(index)
+        self.joystick.init()
+        self.axis_map = axis_map or {ROLL: (0, False), PITCH: (1, True),
+                                     THROTTLE: (2, True), YAW: (3, False)}
+        self.button_map = dict(button_map or {})
+        self.deadzone = deadzone
+        self._pressed = {}
+        self._inp = ControlInput()
+
+    def poll(self, now):
+        inp = self._inp
+        inp.actions.clear()
+        inp.key_ns = 0
+        pygame.event.pump()
+
+        for idx, (axis, invert) in self.axis_map.items():
+            v = self.joystick.get_axis(axis)
+            if invert:
+                v = -v
+            if abs(v) < self.deadzone:
+                v = 0.0
+            inp.axes[idx] = v
+            inp.held[idx] = v != 0.0
+
+        for button, action in self.button_map.items():
+            pressed = self.joystick.get_button(button)
+            if pressed and not self._pressed.get(button):
+                inp.actions.append(action)
+                inp.key_ns = inp.key_ns or time.perf_counter_ns()
+            self._pressed[button] = pressed
+
+        return inp
+
+
+class MergedInput:
+    """Несколько источников сразу: по каждой оси берётся самое большое отклонение."""
+
+    def __init__(self, *sources):
+        self.sources = sources
+        self._inp = ControlInput()
+
+    def poll(self, now):
+        inp = self._inp
+        inp.actions.clear()
+        inp.events.clear()
+        inp.axes[:] = (0, 0, 0, 0)
+        inp.held[:] = (False, False, False, False)
+        inp.tello[:] = (0, 0, 0, 0)
+        inp.fast = False
+        inp.targets.clear()
+        inp.key_ns = 0
+
+        for src in self.sources:
+            s = src.poll(now)
+            for i in range(4):
+                if abs(s.axes[i]) > abs(inp.axes[i]):
+                    inp.axes[i] = s.axes[i]
+                if abs(s.tello[i]) > abs(inp.tello[i]):
+                    inp.tello[i] = s.tello[i]
+                inp.held[i] = inp.held[i] or s.held[i]
+            inp.fast = inp.fast or s.fast
+            inp.actions.extend(s.actions)
+            inp.events.extend(s.events)
+            inp.targets.update(s.targets)
+            if s.key_ns and (not inp.key_ns or s.key_ns < inp.key_ns):
+                inp.key_ns = s.key_ns
+        return inp
+
+
+def channel_index(name):
+    """"ch1".."ch8" → 0..7"""
+    return int(name.lower().lstrip("ch")) - 1
+
+
+class ScriptedInput:
+    """
+    Ввод по сценарию (JSON) — для headless-прогонов, CI и soak-тестов.
+
+    События с временем t (сек от первого poll), по порядку:
+      {"t": 0.0, "key": "8"}                        — нажать и отпустить
+      {"t": 0.5, "key": "w", "down": true}          — держать клавишу ...
+      {"t": 1.5, "key": "w", "down": false}         — ... отпустить
+      {"t": 2.0, "set": {"ch1": 1600}}              — держать канал на значении
+      {"t": 3.0, "release": ["ch1"]}                — вернуть канал стикам
+      {"t": 4.0, "action": "maneuver", "arg": "autoland_fast"}
+      {"t": 9.0, "end": true}                       — конец сценария
+    Имена клавиш — как в pygame.key.name(); привязки те же, что у KeyboardInput.
+    done=True после последнего события (или "end").
+    """
+
+    def __init__(self, events, bindings, ppm_keys=PPM_KEYS, tello_keys=TELLO_KEYS, fast_keys=FAST_KEYS):
+        self.bindings = dict(bindings)
+        self.ppm_keys = ppm_keys or {}
+        self.tello_keys = tello_keys or ()
+        self.fast_keys = fast_keys
+        self.events = self._compile(events)
+        self.done = False
+
+        self._i = 0
+        self._t0 = None
+        self._pressed = set()
+        self._inp = ControlInput()
+
+    @classmethod
+    def load(cls, path, bindings, **kwargs):
+        with open(path, "r", encoding="utf-8") as f:
+            script = json.load(f)
+        events = script.get("events", []) if isinstance(script, dict) else script
+        return cls(events, bindings, **kwargs)
+
+    @staticmethod
+    def _compile(events):
+        """JSON → отсортированные (t, вид, данные) с уже разрешёнными кодами клавиш."""
+        out = []
+        for ev in events:
+            t = float(ev.get("t", 0.0))
+            if "key" in ev:
+                code = pygame.key.key_code(ev["key"])
+                if "down" in ev:
+                    out.append((t, "down" if ev["down"] else "up", code))
+                else:
+                    out.append((t, "tap", code))
+            elif "set" in ev:
+                out.append((t, "set", {channel_index(k): int(v) for k, v in ev["set"].items()}))
+            elif "release" in ev:
+                out.append((t, "release", [channel_index(k) for k in ev["release"]]))
+            elif "action" in ev:
+                out.append((t, "action", (ev["action"], ev.get("arg"))))
+            elif ev.get("end"):
+                out.append((t, "end", None))
+        out.sort(key=lambda e: e[0])
+        return out
+
+    def poll(self, now):
+        inp = self._inp
+        inp.actions.clear()
+        inp.key_ns = 0
+        if self._t0 is None:
+            self._t0 = now
+        t = now - self._t0
+
+        events = self.events
+        while self._i < len(events) and events[self._i][0] <= t:
+            _, kind, data = events[self._i]
+            self._i += 1
+            if kind != "end" and not inp.key_ns:
+                inp.key_ns = time.perf_counter_ns()
+            if kind in ("down", "tap"):
+                if kind == "down":
+                    self._pressed.add(data)
+                if data in self.bindings:
+                    inp.actions.append(self.bindings[data])
+            elif kind == "up":
+                self._pressed.discard(data)
+            elif kind == "set":
+                inp.targets.update(data)
+            elif kind == "release":
+                for idx in data:
+                    inp.targets.pop(idx, None)
+            elif kind == "action":
+                inp.actions.append(data)
+            elif kind == "end":
+                self._i = len(events)
+        if self._i >= len(events):
+            self.done = True
+
+        pressed = self._pressed
+        inp.fast = any(k in pressed for k in self.fast_keys)
+        for idx, (neg, pos) in self.ppm_keys.items():
+            inp.axes[idx] = (pos in pressed) - (neg in pressed)
+            inp.held[idx] = idx in inp.targets or pos in pressed or neg in pressed
+        for idx, ((first, s1), (second, s2)) in enumerate(self.tello_keys):
+            inp.tello[idx] = s1 if first in pressed else s2 if second in pressed else 0
+        return inp
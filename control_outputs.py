@@ -0,0 +1,221 @@
+from control_core import ROLL, PITCH, THROTTLE, YAW
+from tello_client import TelloClient, TelloError, report
+from tello_state import TelloState, STATE_PORT
+
+
+# ==== выходы ControlLoop ====
+#
+# Любой выход — объект с write(loop), вызывается в конце каждого такта.
+# Тяжёлая работа (serial, UDP) идёт в своих потоках, write только
+# публикует снимок и сразу возвращается.
+
+
+class PpmOutput:
+    """PPM через Arduino: снимок каналов уходит в поток PpmSender."""
+
+    def __init__(self, sender):
+        self.sender = sender
+
+    def write(self, loop):
+        self.sender.publish(loop.channels.ch, loop.key_ns)
+
+
+class CaptureOutput:
+    """
+    Запись того, что ушло бы наружу, в CSV (headless-прогоны, регрессии):
+      ppm,t,seq,ch1..ch8     — кадр PPM с частотой send_hz по времени цикла
+      tello,t,lr,fb,ud,yw    — RC Tello, только при изменении
+    t — секунды от первого такта, время цикла (в виртуальном времени
+    файл побайтно повторяется от прогона к прогону).
+    """
+
+    def __init__(self, path, send_hz=50):
+        self.path = path
+        self.period = 1.0 / send_hz
+        self.frames = 0
+        self.tello_commands = 0
+        self._f = open(path, "w", encoding="utf-8", newline="\n")
+        self._t0 = None
+        self._next = 0.0
+        self._rc = (0, 0, 0, 0)
+
+    def write(self, loop):
+        if self._t0 is None:
+            self._t0 = loop.now
+        t = loop.now - self._t0
+
+        if t >= self._next:
+            self._next += self.period
+            if self._next <= t:            # отстали больше чем на кадр — не догоняем пачкой
+                self._next = t + self.period
+            self._f.write("ppm,%.4f,%d,%s\n" % (t, self.frames, ",".join(map(str, loop.channels.ch))))
+            self.frames += 1
+
+        tello = loop.tello
+        if tello is not None and tello.rc != self._rc:
+            self._rc = tello.rc
+            self._f.write("tello,%.4f,%d,%d,%d,%d\n" % ((t,) + tello.rc))
+            self.tello_commands += 1
+
+    def close(self):
+        self._f.close()
+
+
+class VJoyOutput:
+    """Виртуальный джойстик vJoy (Windows), оси X/Y/Z/RZ = roll/pitch/throttle/yaw."""
+
+    def __init__(self, params, device_id=1):
+        import pyvjoy
+        self.params = params
+        self.device = pyvjoy.VJoyDevice(device_id)
+        self._axes = (
+            (ROLL, pyvjoy.HID_USAGE_X),
+            (PITCH, pyvjoy.HID_USAGE_Y),
+            (THROTTLE, pyvjoy.HID_USAGE_Z),
+            (YAW, pyvjoy.HID_USAGE_RZ),
+        )
+
+    def write(self, loop):
+        self.set_channels(loop.channels.ch)
+
+    def set_channels(self, ch):
+        lo, span = self.params.min_us, self.params.max_us - self.params.min_us
+        for idx, usage in self._axes:
+            self.device.set_axis(usage, int((ch[idx] - lo) / span * 32767))
+
+
+class UInputOutput:
+    """Виртуальный геймпад через evdev/uinput (Linux), те же четыре оси."""
+
+    def __init__(self, params, name="ppm-keyboard"):
+        from evdev import UInput, AbsInfo, ecodes
+        self.params = params
+        self._ecodes = ecodes
+        info = AbsInfo(value=0, min=params.min_us, max=params.max_us, fuzz=0, flat=0, resolution=0)
+        self._axes = (
+            (ROLL, ecodes.ABS_X),
+            (PITCH, ecodes.ABS_Y),
+            (THROTTLE, ecodes.ABS_Z),
+            (YAW, ecodes.ABS_RZ),
+        )
+        caps = {ecodes.EV_ABS: [(code, info) for _, code in self._axes],
+                ecodes.EV_KEY: [ecodes.BTN_SOUTH]}     # без кнопки не считается джойстиком
+        self.device = UInput(caps, name=name)
+        self._last = None
+
+    def write(self, loop):
+        self.set_channels(loop.channels.ch)
+
+    def set_channels(self, ch):
+        values = (ch[ROLL], ch[PITCH], ch[THROTTLE], ch[YAW])
+        if values == self._last:
+            return
+        self._last = values
+        for (_, code), v in zip(self._axes, values):
+            self.device.write(self._ecodes.EV_ABS, code, int(v))
+        self.device.syn()
+
+    def close(self):
+        self.device.close()
+
+
+class TelloOutput:
+    """
+    Tello через TelloClient: RC каждый такт (пока летит), команды — Future.
+    state — TelloState (телеметрия) или None.
+    """
+
+    def __init__(self, client, state=None):
+        self.client = client
+        self.state = state
+        self._land_fut = None
+
+    def write(self, loop):
+        tello = loop.tello
+        if tello is not None and tello.flying:
+            self.client.send_rc(*tello.rc)
+            if self.state is not None:
+                self.state.set_rc(*tello.rc)
+
+    def land(self):
+        # нулевая RC до land и без keepalive: иначе клиент повторял бы
+        # последнюю ненулевую RC всё снижение и после посадки
+        self.client.stop_rc()
+        if self.state is not None:
+            self.state.set_rc(0, 0, 0, 0)
+        self._land_fut = report(self.client.land(), "land")
+        return self._land_fut
+
+    def throw_takeoff(self):
+        return self.client.throw_takeoff()
+
+    def command(self, cmd):
+        """Команда миссии (cw 90, flip l ...) → Future с ответом."""
+        return self.client.command(cmd)
+
+    def close(self, land=False, streamoff=False):
+        """Остановить RC, при необходимости посадить и отключиться."""
+        client = self.client
+        try:
+            print("[tello] final landing...")
+            client.stop_rc()
+            if land:
+                client.land().result()
+            elif self._land_fut is not None:
+                self._land_fut.result()     # посадка по ESC/P ещё в пути
+        except TelloError as e:
+            print(f"[tello] final land error: {e}")
+        if streamoff:
+            try:
+                client.streamoff().result()
+            except TelloError:
+                pass
+        client.stop()
+        if self.state is not None:
+            self.state.stop()
+
+
+def print_battery(fut):
+    try:
+        print(f"[tello] battery: {fut.result()}%")
+    except Exception:
+        print("[tello] battery read failed")
+
+
+def connect_tello(tello_cfg, streamon=False):
+    """
+    Подключение к Tello по параметрам из секции tello.
+    Возвращает TelloOutput или None, если дрон не ответил.
+    Телеметрия (порт tello.state_port) слушается, если tello.telemetry не false.
+    """
+    client = None
+    print("[tello] connecting...")
+    try:
+        client = TelloClient(tello_cfg.get("host", "192.168.10.1"),
+                             rc_hz=tello_cfg.get("fps", 20),
+                             command_timeout=tello_cfg.get("command_timeout", 7.0))
+        client.start()
+        client.connect(tello_cfg.get("connect_timeout", 5.0)).result()
+        client.battery().add_done_callback(print_battery)
+        if streamon:
+            client.streamon().result()
+    except (TelloError, OSError) as e:
+        print(f"[tello] connect failed: {e}")
+        if client is not None:
+            client.stop()
+        return None
+    return TelloOutput(client, start_state(tello_cfg))
+
+
+def start_state(tello_cfg):
+    """Приёмник телеметрии Tello или None (выключен в конфиге / порт занят)."""
+    if not tello_cfg.get("telemetry", True):
+        return None
+    state = TelloState(port=tello_cfg.get("state_port", STATE_PORT),
+                       cm_s_per_rc=tello_cfg.get("cm_s_per_rc", 1.0))
+    try:
+        state.start()
+    except OSError as e:
+        print(f"[tello] telemetry disabled: {e}")
+        return None
+    return state
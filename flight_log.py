@@ -0,0 +1,326 @@
+import collections
+import struct
+import threading
+import time
+
+from loop_profiler import STAGES
+
+
+# ==== бинарный журнал полёта ====
+#
+# Файл — массив записей по 32 байта, без заголовков переменной длины:
+#   kind  u8    тип записи (KIND_*)
+#   sub   u8    подтип: источник фазы, номер стадии тайминга ...
+#   aux   u16   доп. поле: код фазы, число замеров ...
+#   seq   u32   номер записи в файле (= её индекс)
+#   t_ns  i64   время от начала записи, нс (в заголовке — time.time_ns() старта)
+#   v     8×i16 данные: каналы PPM, RC Tello, тайминги ...
+# Запись 0 — заголовок, каждая index_every-я — индекс, так что весь файл
+# читается одним np.memmap(path, dtype=record_dtype()) — см. load().
+#
+# 50 Гц PPM + RC Tello по изменению + тайминги раз в секунду — около
+# 6 МБ в час.
+
+RECORD = struct.Struct("<BBHIq8h")
+RECORD_SIZE = RECORD.size                      # 32
+VERSION = 2                                    # 2: фазы — по манёврам (ManeuverEngine)
+MAGIC = struct.unpack("<4h", b"PPMFLOG\0")     # в v заголовка
+INDEX_EVERY = 1024
+
+KIND_HEADER = 0
+KIND_PPM = 1        # v = ch1..ch8
+KIND_TELLO = 2      # v[0:4] = lr, fb, ud, yw (только при изменении)
+KIND_PHASE = 3      # sub = номер манёвра, aux = номер сегмента (0xFFFF — выключен), v[0] = его канал
+KIND_TIMING = 4     # sub = стадия, aux = замеров, v[0:5] = mean/p50/p95/p99/max в TIMING_UNIT_US
+KIND_INDEX = 5      # v[k] = записей вида k за прошедший блок (k = 1..6)
+KIND_EVENT = 6      # sub = код события (EVENTS), v[0] = аргумент
+KIND_NAMES = ("header", "ppm", "tello", "phase", "timing", "index", "event")
+
+TIMING_UNIT_US = 10                            # i16 → до 327 мс
+# sub записи тайминга: интервал между тактами, стадии LoopProfiler и его внешние замеры
+TIMING_STAGES = ("tick",) + STAGES + ("total", "serial_write", "key_to_serial")
+
+EVENTS = ("start", "stop")
+
+
+def _i16(v):
+    v = int(v)
+    return -32768 if v < -32768 else 32767 if v > 32767 else v
+
+
+class FlightRecorder:
+    """
+    Запись журнала в фоне.
+
+    - ppm()/tello_rc()/phase()/timing()/event() только кладут кортеж в
+      deque (append атомарен) — вызывать можно из любого потока, цикл
+      управления и поток PpmSender не ждут диска
+    - поток записи раз в flush_interval упаковывает накопленное в один
+      буфер, вставляет индексные записи и дописывает файл
+    - clock() — источник времени в нс; для headless — время цикла
+    """
+
+    def __init__(self, path, clock=time.perf_counter_ns, index_every=INDEX_EVERY, flush_interval=0.25):
+        self.path = path
+        self.clock = clock
+        self.index_every = index_every
+        self.flush_interval = flush_interval
+        self.records = 0
+        self.written_bytes = 0
+
+        self._queue = collections.deque()
+        self._f = None
+        self._t0 = 0
+        self._last_t = 0
+        self._counts = [0] * len(KIND_NAMES)
+        self._running = False
+        self._thread = None
+        self._wake = threading.Event()
+
+    # --- публичный API ---
+
+    def start(self):
+        if self._running:
+            return
+        self._f = open(self.path, "wb")
+        self._t0 = self.clock()
+        header = RECORD.pack(KIND_HEADER, VERSION, RECORD_SIZE, 0, time.time_ns(),
+                             *(MAGIC + (0, 0, self.index_every & 0x7FFF, 0)))
+        self._f.write(header)
+        self.records = 1
+        self.written_bytes = RECORD_SIZE
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="flight-log", daemon=True)
+        self._thread.start()
+        self.event("start")
+        print(f"[log] recording → {self.path}")
+
+    def stop(self):
+        if not self._running:
+            return
+        self.event("stop")
+        self._running = False
+        self._wake.set()
+        self._thread.join(timeout=2.0)
+        self._thread = None
+        self._drain()
+        self._f.close()
+        print(f"[log] {self.records} records, {self.written_bytes / 1e6:.2f} MB → {self.path}")
+
+    def ppm(self, ch):
+        self._queue.append((KIND_PPM, 0, 0, self.clock(), ch))
+
+    def tello_rc(self, rc):
+        self._queue.append((KIND_TELLO, 0, 0, self.clock(), rc))
+
+    def phase(self, maneuver, segment, value=0):
+        self._queue.append((KIND_PHASE, maneuver, segment, self.clock(), (value,)))
+
+    def timing(self, stage, count, values_us):
+        """values_us — (mean, p50, p95, p99, max) в мкс."""
+        v = tuple(_i16(x / TIMING_UNIT_US) for x in values_us)
+        self._queue.append((KIND_TIMING, stage, min(count, 0xFFFF), self.clock(), v))
+
+    def event(self, name, arg=0):
+        self._queue.append((KIND_EVENT, EVENTS.index(name), 0, self.clock(), (arg,)))
+
+    # --- поток записи ---
+
+    def _run(self):
+        while self._running:
+            self._wake.wait(self.flush_interval)
+            self._drain()
+
+    def _drain(self):
+        queue = self._queue
+        n = len(queue)
+        if not n:
+            return
+        buf = bytearray(RECORD_SIZE * (n + n // self.index_every + 1))
+        off = 0
+        pack = RECORD.pack_into
+        counts = self._counts
+        for _ in range(n):
+            kind, sub, aux, t, data = queue.popleft()
+            if self.records % self.index_every == 0:
+                block = [min(c, 32767) for c in counts]
+                pack(buf, off, KIND_INDEX, 0, 0, self.records, self._last_t,
+                     0, *block[1:], 0)
+                off += RECORD_SIZE
+                self.records += 1
+                counts[:] = [0] * len(counts)
+            t -= self._t0
+            v = tuple(_i16(x) for x in data[:8])
+            pack(buf, off, kind, sub, aux, self.records, t, *(v + (0,) * (8 - len(v))))
+            off += RECORD_SIZE
+            self.records += 1
+            counts[kind] += 1
+            self._last_t = t
+        self._f.write(memoryview(buf)[:off])
+        self._f.flush()
+        self.written_bytes += off
+
+
+class RecorderOutput:
+    """
+    Выход ControlLoop → FlightRecorder.
+
+    - RC Tello — при изменении, сегмент каждого манёвра — при смене
+    - тайминги раз в timing_period сек: интервал между тактами и, если
+      включён LoopProfiler, его стадии (скользящее окно профайлера)
+    - ppm_hz — писать кадры каналов самому с этой частотой; нужно там,
+      где нет PpmSender (headless, vJoy). С PpmSender кадры пишет он сам
+      после успешной записи в порт.
+    """
+
+    def __init__(self, recorder, ppm_hz=None, timing_period=1.0):
+        self.recorder = recorder
+        self.ppm_period_ns = int(1e9 / ppm_hz) if ppm_hz else 0
+        self.timing_period_ns = int(timing_period * 1e9)
+        self._next_ppm = None
+        self._next_timing = None
+        self._last_tick = None
+        self._intervals = []
+        self._rc = None
+        self._phases = {}
+
+    def write(self, loop):
+        rec = self.recorder
+        t = rec.clock()
+
+        period = self.ppm_period_ns
+        if period:
+            if self._next_ppm is None:
+                self._next_ppm = t
+            if t >= self._next_ppm:
+                self._next_ppm += period
+                if self._next_ppm <= t:        # отстали больше чем на кадр — не догоняем пачкой
+                    self._next_ppm = t + period
+                rec.ppm(tuple(loop.channels.ch))
+
+        tello = loop.tello
+        if tello is not None and tello.rc != self._rc:
+            self._rc = tello.rc
+            rec.tello_rc(tello.rc)
+
+        engine = loop.maneuvers
+        if engine is not None:
+            phases = self._phases
+            for m in engine.maneuvers:
+                seg = engine.phase(m)
+                if phases.get(m.index) != seg:
+                    phases[m.index] = seg
+                    rec.phase(m.index, seg, loop.channels.ch[m.channels[0]])
+
+        if self._last_tick is not None:
+            self._intervals.append(t - self._last_tick)
+        self._last_tick = t
+        if self._next_timing is None:
+            self._next_timing = t + self.timing_period_ns
+        elif t >= self._next_timing:
+            self._next_timing = t + self.timing_period_ns
+            self._flush_timing(loop)
+
+    def _flush_timing(self, loop):
+        rec = self.recorder
+        samples = sorted(self._intervals)
+        self._intervals.clear()
+        n = len(samples)
+        if n:
+            def pct(p):
+                return samples[min(n - 1, int(p * n))] / 1e3
+
+            rec.timing(0, n, (sum(samples) / n / 1e3, pct(0.50), pct(0.95), pct(0.99), samples[-1] / 1e3))
+
+        prof = loop.profiler
+        if prof.enabled:
+            for name, s in prof.summary(max_age=0).items():
+                if s["count"] and name in TIMING_STAGES:
+                    rec.timing(TIMING_STAGES.index(name), s["count"],
+                               tuple(s[k] * 1e3 for k in ("mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")))
+
+
+# ==== чтение ====
+
+def record_dtype():
+    import numpy as np
+    return np.dtype([("kind", "u1"), ("sub", "u1"), ("aux", "<u2"), ("seq", "<u4"),
+                     ("t_ns", "<i8"), ("v", "<i2", (8,))])
+
+
+def load(path):
+    """
+    Весь журнал одним np.memmap (только чтение, без загрузки в память).
+    Незаписанный хвост (обрыв посреди записи) отбрасывается.
+    """
+    import os
+    import numpy as np
+
+    n = os.path.getsize(path) // RECORD_SIZE
+    if n == 0:
+        raise ValueError(f"{path}: пустой журнал")
+    recs = np.memmap(path, dtype=record_dtype(), mode="r", shape=(n,))
+    head = recs[0]
+    if head["kind"] != KIND_HEADER or tuple(head["v"][:4]) != MAGIC:
+        raise ValueError(f"{path}: не журнал полёта")
+    if not 1 <= head["sub"] <= VERSION:      # раскладка записей с версии 1 не менялась
+        raise ValueError(f"{path}: версия {head['sub']}, поддерживается до {VERSION}")
+    return recs
+
+
+def index_every(recs):
+    return int(recs[0]["v"][6]) or INDEX_EVERY
+
+
+def select(recs, kind):
+    """Записи одного вида (копия, маленькая по сравнению с журналом)."""
+    return recs[recs["kind"] == kind]
+
+
+def seek(recs, t_ns):
+    """
+    Номер первой записи не раньше t_ns — бинарный поиск по индексным
+    записям (срез с шагом index_every, читаются только их страницы),
+    дальше — внутри одного блока.
+    """
+    import numpy as np
+
+    step = index_every(recs)
+    index_t = recs["t_ns"][step::step]
+    block = int(np.searchsorted(index_t, t_ns, side="left"))
+    lo = block * step
+    hi = min(len(recs), lo + step + 1)
+    t = recs["t_ns"][lo:hi]
+    kinds = recs["kind"][lo:hi]
+    for i in range(hi - lo):
+        if kinds[i] not in (KIND_HEADER, KIND_INDEX) and t[i] >= t_ns:
+            return lo + i
+    return hi
+
+
+def summary(recs):
+    import numpy as np
+
+    kinds = np.bincount(recs["kind"], minlength=len(KIND_NAMES))
+    data = recs[(recs["kind"] != KIND_HEADER) & (recs["kind"] != KIND_INDEX)]
+    duration = (int(data["t_ns"][-1]) - int(data["t_ns"][0])) / 1e9 if len(data) else 0.0
+    return {
+        "records": len(recs),
+        "duration_s": duration,
+        "started": int(recs[0]["t_ns"]) / 1e9,
+        "counts": {name: int(kinds[i]) for i, name in enumerate(KIND_NAMES)},
+    }
+
+
+def add_arguments(parser):
+    parser.add_argument("--record", default=None, metavar="PATH",
+                        help="журнал полёта (бинарный, см. flight_log.py)")
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Сводка по журналу полёта")
+    parser.add_argument("path")
+    print(json.dumps(summary(load(parser.parse_args().path)), indent=2, ensure_ascii=False))
@@ -0,0 +1,115 @@
+import time
+
+import flight_log
+from loop_profiler import RingStats
+
+
+# ==== проигрывание журнала полёта ====
+#
+#   python main.py --replay flight.log                    — в serial, исходный темп
+#   python main.py --replay flight.log --replay-speed 4   — вчетверо быстрее
+#   python main.py --replay flight.log --replay-speed 0   — без пауз (нагрузочный тест)
+#   python liftoff_emulator.py --output uinput --replay flight.log
+#
+# Кадры PPM идут прямо в выход (SerialLink.write, VJoyOutput.set_channels),
+# мимо ControlLoop: в порт уходит ровно то, что было записано.
+
+
+class Replayer:
+    """
+    Кадры PPM из журнала → sink(ch) по времени записи.
+
+    - журнал читается через np.memmap блоками по chunk записей,
+      в память целиком не грузится; начало — через flight_log.seek()
+    - speed: 1.0 — исходный темп, 2.0 — вдвое быстрее, 0 — без пауз
+    - расписание по дедлайнам perf_counter_ns, как у PpmSender:
+      сон почти до дедлайна, остаток — busy-wait
+    - late_ns — опоздание кадра относительно дедлайна
+    """
+
+    def __init__(self, path, sink, speed=1.0, start=0.0, end=None, loops=1, chunk=4096, spin_us=300):
+        self.path = path
+        self.sink = sink
+        self.speed = speed
+        self.start_ns = int(start * 1e9)
+        self.end_ns = int(end * 1e9) if end is not None else None
+        self.loops = loops
+        self.chunk = chunk
+        self.spin_ns = spin_us * 1000
+
+        self.recs = flight_log.load(path)
+        self.frames = 0
+        self.errors = 0
+        self.late_ns = RingStats(4096)
+        self._running = False
+
+    def frames_iter(self):
+        """(t_ns, [ch1..ch8]) по порядку, блоками из memmap."""
+        recs = self.recs
+        n = len(recs)
+        end = self.end_ns
+        for lo in range(flight_log.seek(recs, self.start_ns), n, self.chunk):
+            block = recs[lo:lo + self.chunk]
+            ppm = block[block["kind"] == flight_log.KIND_PPM]
+            for t, ch in zip(ppm["t_ns"].tolist(), ppm["v"].tolist()):
+                if end is not None and t > end:
+                    return
+                yield t, ch
+
+    def stop(self):
+        self._running = False
+
+    def run(self):
+        self._running = True
+        clock = time.perf_counter_ns
+        wall0 = clock()
+        loop = 0
+
+        while self._running and (not self.loops or loop < self.loops):
+            loop += 1
+            t_first = None
+            base = clock()
+            for t, ch in self.frames_iter():
+                if not self._running:
+                    break
+                if t_first is None:
+                    t_first = t
+                if self.speed > 0:
+                    deadline = base + int((t - t_first) / self.speed)
+                    remaining = deadline - clock()
+                    if remaining > self.spin_ns:
+                        time.sleep((remaining - self.spin_ns) / 1e9)
+                    while clock() < deadline:
+                        pass
+                    self.late_ns.add(clock() - deadline)
+                if self.sink(ch) is False:
+                    self.errors += 1
+                self.frames += 1
+            if t_first is None:
+                print(f"[replay] {self.path}: нет кадров PPM")
+                break
+
+        self._running = False
+        wall = (clock() - wall0) / 1e9
+        late = self.late_ns.summary()
+        print(f"[replay] {self.frames} frames in {wall:.2f} s "
+              f"({self.frames / wall if wall > 0 else 0:.0f} frames/s), errors={self.errors}, "
+              f"late p50/p99/max {late['p50_ms']:.2f}/{late['p99_ms']:.2f}/{late['max_ms']:.2f} ms")
+        return self.frames, wall
+
+
+def add_arguments(parser):
+    parser.add_argument("--replay", default=None, metavar="PATH",
+                        help="проиграть кадры PPM из журнала полёта (--record) вместо клавиатуры")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="темп: 1 — исходный, 2 — вдвое быстрее, 0 — без пауз")
+    parser.add_argument("--replay-from", type=float, default=0.0,
+                        help="начать с N-й секунды записи")
+    parser.add_argument("--replay-to", type=float, default=None,
+                        help="закончить на N-й секунде записи")
+    parser.add_argument("--replay-loops", type=int, default=1,
+                        help="сколько раз повторить (0 — бесконечно)")
+
+
+def from_args(args, sink):
+    return Replayer(args.replay, sink, args.replay_speed, args.replay_from, args.replay_to, args.replay_loops)
@@ -0,0 +1,64 @@
+import sys
+import tracemalloc
+
+import pygame
+
+
+class FramePresenter:
+    """
+    Показ кадров видео без копирования пикселей в основном цикле.
+
+    - кадр — pygame.Surface слота VideoWorker (frombuffer поверх его
+      BGR-буфера): кадр размера size отдаётся как есть, перестановку
+      каналов SDL делает при blit
+    - кадр с тем же seq повторно не обрабатывается
+    - кадр меньше size (VideoGovernor снизил разрешение) растягивается
+      pygame.transform.scale(..., dest) в одну постоянную surface размера
+      size — раскладка экрана не меняется
+    - при debug=True считает выделения памяти на кадр (tracemalloc):
+      пиковый прирост байт и чистый прирост блоков
+    """
+
+    def __init__(self, size, debug=False):
+        self.size = size
+        self.surface = None       # что показывать сейчас
+        self._scaled = None       # surface size для растянутых кадров
+        self._seq = 0
+
+        self.debug = debug
+        self.alloc_bytes = 0      # сколько байт выделялось во время present()
+        self.alloc_blocks = 0     # сколько блоков осталось висеть после present()
+        if debug and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @property
+    def seq(self):
+        """seq кадра, который сейчас показывается (0 — ещё не было)."""
+        return self._seq
+
+    def present(self, seq, frame):
+        """frame — Surface размера size или меньше. Возвращает surface или None."""
+        if frame is None or seq == self._seq:
+            return self.surface
+
+        if self.debug:
+            tracemalloc.reset_peak()
+            mem0 = tracemalloc.get_traced_memory()[0]
+            blocks0 = sys.getallocatedblocks()
+
+        if frame.get_size() == self.size:
+            self.surface = frame
+        else:
+            scaled = self._scaled
+            if scaled is None or scaled.get_bitsize() != frame.get_bitsize() \
+                    or scaled.get_masks() != frame.get_masks():
+                scaled = self._scaled = pygame.Surface(self.size, 0, frame)
+            pygame.transform.scale(frame, self.size, scaled)
+            self.surface = scaled
+
+        if self.debug:
+            self.alloc_bytes = tracemalloc.get_traced_memory()[1] - mem0
+            self.alloc_blocks = sys.getallocatedblocks() - blocks0
+
+        self._seq = seq
+        return self.surface
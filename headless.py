@@ -0,0 +1,76 @@
+import os
+import time
+
+
+# ==== headless-режим: без окна, ввод по сценарию, выход в файл ====
+#
+#   python main.py --headless --script scenarios/arm_climb_land.json
+#   python with_wideo.py --headless --script ... --capture out.csv --realtime
+#
+# SDL поднимается с драйвером dummy (нужен только для имён клавиш),
+# окно не создаётся, ничего не рисуется.
+
+
+def add_arguments(parser):
+    parser.add_argument("--headless", action="store_true",
+                        help="без окна: ввод из --script, кадры PPM/RC Tello в --capture")
+    parser.add_argument("--script", default=None,
+                        help="сценарий ввода (JSON, см. control_inputs.ScriptedInput)")
+    parser.add_argument("--capture", default="headless_capture.csv",
+                        help="куда писать кадры PPM и команды Tello")
+    parser.add_argument("--realtime", action="store_true",
+                        help="реальное время вместо прогона с максимальной скоростью")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="остановиться через N секунд времени цикла")
+
+
+def init():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    pygame.init()
+
+
+def run(loop, loop_hz, realtime=False, duration=None, tail=0.5):
+    """
+    Гоняет loop до конца сценария (+tail сек), выхода по "quit" или duration.
+
+    realtime=False — виртуальное время: такты по 1/loop_hz без пауз,
+                     результат детерминирован и не зависит от машины
+    realtime=True  — настоящее время, такт раз в 1/loop_hz (soak-тесты)
+    Возвращает (тактов, секунд времени цикла, секунд на часах).
+    """
+    period = 1.0 / loop_hz
+    source = loop.source
+    wall0 = time.perf_counter()
+    t0 = time.monotonic() if realtime else 0.0
+    now = t0
+    done_at = None
+    n = 0
+
+    while loop.running:
+        if realtime:
+            now = time.monotonic()
+        loop.profiler.start()
+        loop.tick(now)
+        loop.profiler.end()
+        n += 1
+
+        elapsed = now - t0
+        if duration is not None and elapsed >= duration:
+            break
+        if getattr(source, "done", False):
+            if done_at is None:
+                done_at = elapsed
+            elif elapsed - done_at >= tail:
+                break
+
+        if realtime:
+            time.sleep(max(0.0, t0 + n * period - time.monotonic()))
+        else:
+            now = t0 + n * period
+
+    wall = time.perf_counter() - wall0
+    print(f"[headless] {n} ticks, {now - t0:.2f} s loop time in {wall:.2f} s wall "
+          f"({n / wall if wall > 0 else 0:.0f} ticks/s)")
+    return n, now - t0, wall
@@ -0,0 +1,241 @@
+import pygame
+
+from tello_state import H, YAW, BAT
+
+
+class TextCache:
+    """
+    Кэш отрисованного текста: (text, color) → Surface.
+    При переполнении выбрасываются самые старые записи.
+    """
+
+    def __init__(self, font, max_items=256):
+        self.font = font
+        self.max_items = max_items
+        self._cache = {}
+
+    def render(self, text, color):
+        key = (text, color)
+        surf = self._cache.get(key)
+        if surf is None:
+            surf = self.font.render(text, True, color)
+            if len(self._cache) >= self.max_items:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[key] = surf
+        return surf
+
+
+class Hud:
+    """
+    Retained-mode отрисовка интерфейса.
+
+    - всё статичное (рамки, подписи, подсказки) рисуется один раз
+      в background через ensure_background()
+    - виджет перерисовывается только когда изменилось его состояние:
+      старое место восстанавливается из background, новое рисуется сверху
+    - flush() отдаёт на экран только изменённые прямоугольники
+      (display.update(rects)), полный flip — лишь после invalidate()
+    """
+
+    def __init__(self, screen, font, font_small, bg_color=(18, 18, 22)):
+        self.screen = screen
+        self.font = font
+        self.font_small = font_small
+        self.bg_color = bg_color
+        self.text_big = TextCache(font)
+        self.text_small = TextCache(font_small)
+
+        self.background = pygame.Surface(screen.get_size()).convert()
+        self._layout = None
+        self._widgets = {}      # key -> (state, rect)
+        self._dirty = []
+        self._full = True
+
+    # --- фон ---
+
+    def ensure_background(self, layout, painter):
+        """Перерисовать фон painter(background), если сменилась раскладка."""
+        if layout == self._layout:
+            return
+        self._layout = layout
+        self.background.fill(self.bg_color)
+        painter(self.background)
+        self.invalidate()
+
+    def invalidate(self):
+        """Забыть состояние виджетов и перерисовать всё целиком."""
+        self._widgets.clear()
+        self.screen.blit(self.background, (0, 0))
+        self._full = True
+
+    # --- виджеты ---
+
+    def text(self, key, text, color, pos, big=False):
+        state = (text, color, pos)
+        old = self._widgets.get(key)
+        if old is not None and old[0] == state:
+            return
+        surf = (self.text_big if big else self.text_small).render(text, color)
+        self._replace(key, state, surf.get_rect(topleft=pos))
+        self.screen.blit(surf, pos)
+
+    def widget(self, key, rect, state, draw, *args):
+        """Область rect перерисовывается draw(screen, *args) при смене state."""
+        old = self._widgets.get(key)
+        if old is not None and old[0] == state:
+            return
+        self._replace(key, state, pygame.Rect(rect))
+        draw(self.screen, *args)
+
+    def hide(self, key):
+        """Убрать виджет с экрана (восстановить фон под ним)."""
+        old = self._widgets.pop(key, None)
+        if old is not None:
+            self._restore(old[1])
+
+    def _replace(self, key, state, rect):
+        old = self._widgets.get(key)
+        if old is not None:
+            self._restore(old[1])
+        self._restore(rect)
+        self._widgets[key] = (state, rect)
+
+    def _restore(self, rect):
+        self.screen.blit(self.background, rect, rect)
+        self._dirty.append(rect)
+
+    # --- вывод ---
+
+    def flush(self):
+        if self._full:
+            pygame.display.flip()
+            self._full = False
+        elif self._dirty:
+            pygame.display.update(self._dirty)
+        self._dirty.clear()
+
+
+# ==== общие панели пульта (main.py, with_wideo.py) ====
+
+BAR_X = 40
+BAR_Y = 80
+BAR_W = 460
+BAR_H = 40
+BAR_GAP = 18
+
+
+def draw_channel_frames(bg, font_small, params):
+    """Статичная часть панели каналов: рамки, подписи, центральные риски."""
+    cx = BAR_X + int(BAR_W * (params.mid_us - params.min_us) / (params.max_us - params.min_us))
+    for i in range(8):
+        y = BAR_Y + i * (BAR_H + BAR_GAP)
+        pygame.draw.rect(bg, (70, 70, 80), (BAR_X, y, BAR_W, BAR_H), 2, border_radius=6)
+        bg.blit(font_small.render(f"CH{i+1}", True, (230, 230, 240)), (BAR_X - 55, y + 8))
+        pygame.draw.line(bg, (110, 110, 130), (cx, y), (cx, y + BAR_H), 1)
+
+
+def draw_bar(screen, i, v, params):
+    y = BAR_Y + i * (BAR_H + BAR_GAP)
+    span = params.max_us - params.min_us
+
+    # заполнение
+    fill = int(BAR_W * (v - params.min_us) / span)
+    pygame.draw.rect(
+        screen, (90, 170, 255),
+        (BAR_X + 3, y + 3, max(fill - 6, 0), BAR_H - 6),
+        border_radius=6
+    )
+
+    # центральная линия поверх заполнения
+    cx = BAR_X + int(BAR_W * (params.mid_us - params.min_us) / span)
+    pygame.draw.line(screen, (110, 110, 130), (cx, y + 3), (cx, y + BAR_H - 4), 1)
+
+
+def draw_channels(hud, channels):
+    """Полосы каналов, значения и LOW/MID/HIGH для AUX."""
+    for i, v in enumerate(channels.ch):
+        y = BAR_Y + i * (BAR_H + BAR_GAP)
+
+        hud.widget(("bar", i), (BAR_X + 3, y + 3, BAR_W - 6, BAR_H - 6), v,
+                   draw_bar, i, v, channels.p)
+        hud.text(("val", i), str(v), (255, 255, 255), (BAR_X + BAR_W + 15, y + 8))
+
+        if i >= 4:
+            if channels.is_low(v):
+                state = ("LOW", (255, 120, 120))
+            elif channels.is_high(v):
+                state = ("HIGH", (120, 255, 120))
+            else:
+                state = ("MID", (255, 255, 120))
+            hud.text(("aux", i), state[0], state[1], (BAR_X - 100, y + 10))
+
+
+def draw_header(hud, fps, link_status, ppm_stats, armed):
+    """Верхняя строка: состояние serial, джиттер PPM, ARM."""
+    link_state = link_status["state"]
+    if link_state == "connected":
+        hdr = f"Serial: {link_status['port']} ({link_status['protocol']}) | FPS: {fps:.0f}"
+        hud.text("hdr", hdr, (230, 230, 230), (25, 20), big=True)
+        ppm_txt = (f"PPM: {ppm_stats['rate_hz']:.1f} Hz | jitter p50/p95/p99: "
+                   f"{ppm_stats['p50_ms']:.2f}/{ppm_stats['p95_ms']:.2f}/{ppm_stats['p99_ms']:.2f} ms")
+        if link_status["last_outage_ms"] is not None:
+            ppm_txt += f" | reconnect: {link_status['last_outage_ms']:.0f} ms"
+        hud.text("ppm", ppm_txt, (150, 150, 170), (25, 52))
+    elif link_state == "reconnecting":
+        hud.text("hdr", f"SERIAL RECONNECTING: {link_status['downtime_ms'] / 1000:.1f} s",
+                 (255, 170, 60), (25, 20), big=True)
+        hud.text("ppm", f"last error: {link_status['last_error']}", (255, 170, 60), (25, 52))
+    else:
+        hud.text("hdr", "NO SERIAL CONNECTION (searching...)", (255, 70, 70), (25, 20), big=True)
+        hud.hide("ppm")
+
+    w = hud.screen.get_width()
+    arm_text = "ARMED" if armed else "DISARMED"
+    arm_color = (0, 255, 0) if armed else (255, 60, 60)
+    hud.text("arm", arm_text, arm_color, (w - 200, 20), big=True)
+
+
+def draw_tello_status(hud, tello, y):
+    """Строка статуса Tello: связь, полёт, миссия, текущий RC."""
+    if tello.connected:
+        t_text = "Tello: CONNECTED"
+        t_color = (0, 255, 0)
+    elif tello.simulation:
+        t_text = "Tello: SIMULATION MODE (NO DRONE)"
+        t_color = (255, 200, 80)
+    else:
+        t_text = "Tello: OFF / NO CONNECTION"
+        t_color = (255, 80, 80)
+
+    hud.text("tello", t_text, t_color, (40, y))
+
+    flying_color = (0, 220, 0) if tello.flying else (200, 200, 80)
+    hud.text("flying", f"State: {'FLYING' if tello.flying else 'IDLE'}", flying_color, (320, y))
+
+    lander = tello.lander
+    if lander is not None and lander.active:
+        hud.text("mission", f"Precision land: {lander.status()}", (120, 255, 200), (520, y))
+    else:
+        hud.text("mission", f"Mission: {tello.missions.status()}", (180, 220, 255), (520, y))
+
+    # телеметрия (если дрон её шлёт): высота, курс, батарея
+    state = tello.state
+    row = state.latest() if state is not None else None
+    if row is not None:
+        hud.text("telemetry", "h=%dcm yaw=%d° bat=%d%%" % (row[H], row[YAW], row[BAT]),
+                 (160, 200, 160), (520, y + 24))
+    else:
+        hud.hide("telemetry")
+
+    rc_text = "TELLO RC: LR=%d FB=%d UD=%d YW=%d" % tello.rc
+    hud.text("rc", rc_text, (120, 200, 255), (860, y))
+
+
+def draw_lines(hud, key, lines, pos, color=(255, 200, 80), line_h=18, max_lines=16):
+    """Блок строк мелким шрифтом (оверлей профайлера и т.п.); лишние строки скрываются."""
+    x, y = pos
+    for i in range(max_lines):
+        if i < len(lines):
+            hud.text((key, i), lines[i], color, (x, y + i * line_h))
+        else:
+            hud.hide((key, i))
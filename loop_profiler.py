@@ -0,0 +1,123 @@
+import csv
+import json
+import time
+
+
+# стадии основного цикла в порядке выполнения
+STAGES = ("poll", "integrate", "tello", "auto", "outputs", "video", "draw", "flip")
+
+
+class RingStats:
+    """Кольцевой буфер длительностей (нс) с перцентилями в мс."""
+
+    __slots__ = ("buf", "count")
+
+    def __init__(self, size=2048):
+        self.buf = [0] * size
+        self.count = 0
+
+    def add(self, ns):
+        self.buf[self.count % len(self.buf)] = ns
+        self.count += 1
+
+    def summary(self):
+        n = min(self.count, len(self.buf))
+        if n == 0:
+            return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0,
+                    "p99_ms": 0.0, "max_ms": 0.0}
+        samples = sorted(self.buf[:n])
+
+        def pct(p):
+            return samples[min(n - 1, int(p * n))] / 1e6
+
+        return {
+            "count": self.count,
+            "mean_ms": sum(samples) / n / 1e6,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "max_ms": samples[-1] / 1e6,
+        }
+
+
+class LoopProfiler:
+    """
+    Время по стадиям цикла управления.
+
+    - start() в начале кадра, mark(stage) после каждой стадии — пишется
+      время с предыдущей отметки; end() — весь кадр ("total")
+    - external — чужие RingStats (поток PPM: запись в serial, задержка
+      клавиша → serial), попадают в сводку рядом со стадиями
+    - enabled=False — все вызовы пустые, цикл можно не менять
+    - summary() пересчитывается не чаще max_age, export() пишет JSON/CSV
+    """
+
+    def __init__(self, stages=STAGES, size=2048, enabled=True):
+        self.enabled = enabled
+        self.rings = {name: RingStats(size) for name in stages}
+        self.rings["total"] = RingStats(size)
+        self.external = {}
+        self._t = 0
+        self._frame_t = 0
+        self._cache = None
+        self._cache_time = 0.0
+
+    def start(self):
+        if self.enabled:
+            self._t = self._frame_t = time.perf_counter_ns()
+
+    def mark(self, stage):
+        if self.enabled:
+            t = time.perf_counter_ns()
+            self.rings[stage].add(t - self._t)
+            self._t = t
+
+    def end(self):
+        if self.enabled:
+            self.rings["total"].add(time.perf_counter_ns() - self._frame_t)
+
+    def add_external(self, name, ring):
+        self.external[name] = ring
+
+    # --- сводка ---
+
+    def summary(self, max_age=0.5):
+        now = time.monotonic()
+        if self._cache is not None and now - self._cache_time < max_age:
+            return self._cache
+        out = {name: ring.summary() for name, ring in self.rings.items()}
+        for name, ring in self.external.items():
+            out[name] = ring.summary()
+        self._cache = out
+        self._cache_time = now
+        return out
+
+    def overlay_lines(self):
+        lines = ["stage        p50 / p95 / p99 / max, ms"]
+        for name, s in self.summary().items():
+            if s["count"]:
+                lines.append(f"{name:<12} {s['p50_ms']:.2f} / {s['p95_ms']:.2f} / "
+                             f"{s['p99_ms']:.2f} / {s['max_ms']:.2f}")
+        return lines
+
+    def export(self, path):
+        """По расширению: .csv — таблица, иначе JSON."""
+        summary = self.summary(max_age=0)
+        if path.endswith(".csv"):
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                w = csv.writer(f)
+                w.writerow(["stage", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+                for name, s in summary.items():
+                    w.writerow([name, s["count"], "%.4f" % s["mean_ms"], "%.4f" % s["p50_ms"],
+                                "%.4f" % s["p95_ms"], "%.4f" % s["p99_ms"], "%.4f" % s["max_ms"]])
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"time": time.time(), "stages": summary}, f, indent=2)
+        print(f"[profile] saved {path}")
+
+
+def add_arguments(parser):
+    parser.add_argument("--profile", action="store_true",
+                        help="замер стадий цикла: оверлей + сводка при выходе")
+    parser.add_argument("--profile-out", default="loop_profile.json",
+                        help="куда сохранить сводку (.json или .csv)")
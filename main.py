@@ -1,225 +1,181 @@
 import time
+import argparse
 import pygame
-import serial
-import json, os, sys
 
-from djitellopy import Tello  # управление Tello
+import headless
+import loop_profiler
+import flight_log
+import flight_replay
+import tello_missions
+from control_core import load_config, ControlParams, ControlLoop, TelloController
+from control_inputs import KeyboardInput, ScriptedInput
+from control_outputs import PpmOutput, CaptureOutput, connect_tello
+from ppm_protocol import PpmEncoder
+from serial_discovery import discover_port
+from ppm_sender import PpmSender
+from serial_link import SerialLink
+from hud import Hud, draw_channel_frames, draw_channels, draw_header, draw_tello_status, draw_lines
+from loop_profiler import LoopProfiler
+from flight_log import FlightRecorder, RecorderOutput
 
 # === загрузка конфигурации ===
-CONFIG_FILE = "config.json"
-if not os.path.exists(CONFIG_FILE):
-    print(f"[config] Файл {CONFIG_FILE} не найден!")
-    sys.exit(1)
-
-with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-    cfg = json.load(f)
+cfg = load_config()
 
 # ==== применяем параметры ====
 serial_cfg = cfg.get("serial", {})
-ui_cfg = cfg.get("ui", {})
-ctrl_cfg = cfg.get("control", {})
+tello_cfg = cfg.get("tello", {})
+PARAMS = ControlParams(cfg)
 
 CANDIDATE_PORTS = serial_cfg.get("ports", [])
 BAUD = serial_cfg.get("baud", 115200)
+SERIAL_PROTOCOL = serial_cfg.get("protocol", "auto")      # auto / ascii / bin
+HANDSHAKE_TIMEOUT = serial_cfg.get("handshake_timeout", 2.5)
+PORT_PATTERNS = serial_cfg.get("patterns", [])                # маски: /dev/ttyUSB* ...
+STATE_FILE = serial_cfg.get("state_file", ".serial_state.json")  # последний удачный порт
 
-MIN_US = ctrl_cfg.get("min_us", 1000)
-MID_US = ctrl_cfg.get("mid_us", 1500)
-MAX_US = ctrl_cfg.get("max_us", 2000)
-STEP = ctrl_cfg.get("step", 2)
-FAST_STEP = ctrl_cfg.get("fast_step", 5)
-BUFF_SIZE = ctrl_cfg.get("buff_size", 200)
-RETURN_SPEED = ui_cfg.get("return_speed", 25)
-SEND_HZ = ui_cfg.get("send_hz", 50)
-
-# ---------- настройки Tello ----------
-TELLO_MANUAL_SPEED = 40        # ручное управление
-TELLO_AUTO_SPEED = 30          # авто-полет (M) влево/вправо
-TELLO_AUTO_INTERVAL = 2.0      # каждые N секунд меняем направление
-
-TELLO_SQUARE_SPEED = 20        # квадрат (N) — маленький для квартиры
-TELLO_SQUARE_STEP_TIME = 2.0   # длительность одной стороны квадрата, сек
-
-TELLO_FPS = 20                 # частота отправки RC-команд
-TELLO_SIM_IF_NO_DRONE = True   # включать "симуляцию", если Tello не подключился
+TELLO_FPS = tello_cfg.get("fps", 20)                          # частота отправки RC-команд
+TELLO_SIM_IF_NO_DRONE = tello_cfg.get("sim_if_no_drone", True)  # "симуляция", если Tello не подключился
 
 
 # === вспомогательные функции ===
-def clamp(v, lo=MIN_US, hi=MAX_US):
-    return lo if v < lo else hi if v > hi else v
-
-
-def is_mid(v):
-    return MID_US - BUFF_SIZE <= v <= MID_US + BUFF_SIZE
-
-
-def next_two(v):
-    """двухпозиционный переключатель: MIN <-> MAX"""
-    return MAX_US if v <= MIN_US + 10 else MIN_US
-
-
 def try_open_port():
-    for p in CANDIDATE_PORTS:
-        try:
-            ser = serial.Serial(p, BAUD, timeout=0)
-            time.sleep(0.2)
-            print(f"[serial] connected: {p}")
-            return ser, p
-        except Exception:
-            continue
-    print("[serial] no port — running in NO SERIAL mode")
-    return None, "OFF"
-
-
-def send_line(ser, ch):
+    ser, p, proto = discover_port(CANDIDATE_PORTS, BAUD, PORT_PATTERNS,
+                                  SERIAL_PROTOCOL, HANDSHAKE_TIMEOUT, STATE_FILE)
     if ser is None:
-        return
-    line = ",".join(str(v) for v in ch) + "\n"
-    try:
-        ser.write(line.encode("ascii"))
-    except Exception as e:
-        print(f"[serial] write error: {e}")
+        print("[serial] no port — running in NO SERIAL mode")
+        return None, "OFF", PpmEncoder()
+    print(f"[serial] connected: {p} ({proto})")
+    return ser, p, PpmEncoder(proto)
+
+
+# === клавиши ===
+BINDINGS = {
+    pygame.K_ESCAPE: ("quit", None),
+    pygame.K_5: ("aux", 4),
+    pygame.K_6: ("aux", 5),
+    pygame.K_7: ("aux", 6),
+    pygame.K_8: ("arm", None),
+    pygame.K_c: ("aux_reset", None),
+    pygame.K_SPACE: ("aux_reset", None),
+    pygame.K_p: ("tello_land", "P"),
+    pygame.K_m: ("tello_mission", "pendulum"),
+    pygame.K_n: ("tello_mission", "square"),
+    pygame.K_i: ("tello_pause", None),
+    pygame.K_t: ("tello_mission", "hold"),
+}
 
 
 # === отрисовка UI ===
-def draw_ui(screen, font, font_small,
-            ch, fps, portname, ser_connected,
-            tello_connected, tello_simulation, tello_flying,
-            auto_mode, square_mode,
-            tello_lr, tello_fb, tello_ud, tello_yw):
-
-    screen.fill((18, 18, 22))
-    w, h = screen.get_size()
-
-    # =======================
-    #  Верхняя строка статуса
-    # =======================
-    if ser_connected:
-        hdr = font.render(f"Serial: {portname} | FPS: {fps:.0f}", True, (230, 230, 230))
-    else:
-        hdr = font.render("NO SERIAL CONNECTION", True, (255, 70, 70))
-    screen.blit(hdr, (25, 20))
-
-    armed = ch[7] > MID_US
-    arm_text = "ARMED" if armed else "DISARMED"
-    arm_color = (0, 255, 0) if armed else (255, 60, 60)
-    arm_lbl = font.render(arm_text, True, arm_color)
-    screen.blit(arm_lbl, (w - 200, 20))
-
-    # =======================
-    #  Левый блок — каналы
-    # =======================
-    left_x = 40
-    top_y = 80
-    bar_w = 460
-    bar_h = 40
-    gap = 18
-
-    for i, v in enumerate(ch):
-        y = top_y + i * (bar_h + gap)
-
-        # рамка
-        pygame.draw.rect(screen, (70, 70, 80), (left_x, y, bar_w, bar_h), 2, border_radius=6)
-
-        # заполнение
-        t = (v - MIN_US) / (MAX_US - MIN_US)
-        fill = int(bar_w * t)
-        pygame.draw.rect(
-            screen, (90, 170, 255),
-            (left_x + 3, y + 3, max(fill - 6, 0), bar_h - 6),
-            border_radius=6
-        )
-
-        # подпись канала
-        label = font_small.render(f"CH{i+1}", True, (230, 230, 240))
-        screen.blit(label, (left_x - 55, y + 8))
-
-        # значение
-        val = font_small.render(str(v), True, (255, 255, 255))
-        screen.blit(val, (left_x + bar_w + 15, y + 8))
-
-        # центральная линия
-        cx = left_x + int(bar_w * (MID_US - MIN_US) / (MAX_US - MIN_US))
-        pygame.draw.line(screen, (110, 110, 130), (cx, y), (cx, y + bar_h), 1)
-
-        # LOW/MID/HIGH для AUX
-        if i >= 4:
-            if v <= MIN_US + 10:
-                state = ("LOW", (255, 120, 120))
-            elif v >= MAX_US - 10:
-                state = ("HIGH", (120, 255, 120))
-            else:
-                state = ("MID", (255, 255, 120))
-            txt = font_small.render(state[0], True, state[1])
-            screen.blit(txt, (left_x - 100, y + 10))
-
-    # =======================
-    #   Правый блок — подсказки
-    # =======================
-    help_x = 600
-    help_y = 80
-    line_h = 22
-
-    help_lines = [
-        "PPM / TX12 Controls:",
-        "  ←/→ = CH1 (Roll)",
-        "  ↑/↓ = CH2 (Pitch)",
-        "  W/S = CH3 (Throttle)",
-        "  A/D = CH4 (Yaw)",
-        "  5/6/7 = AUX5–7 (2-pos)",
-        "  8 = ARM/DISARM",
-        "  Space = kill AUX,  C = reset AUX",
-        "",
-        "Tello Controls:",
-        "  Коннект при запуске (если доступен).",
-        "  CH5 HIGH (при ARM) → через 1с Throw&Go / симуляция взлёта.",
-        "  g/j = yaw, y/h = up/down",
-        "  k/; = left/right",
-        "  o/l = forward/back",
-        "  M = авто-маятник (LR)",
-        "  N = маленький квадрат",
-        "  P = посадка (или стоп симуляции)",
-    ]
-
-    for n, line in enumerate(help_lines):
+HELP_X = 600
+HELP_Y = 80
+HELP_LINE_H = 22
+
+HELP_LINES = [
+    "PPM / TX12 Controls:",
+    "  ←/→ = CH1 (Roll)",
+    "  ↑/↓ = CH2 (Pitch)",
+    "  W/S = CH3 (Throttle)",
+    "  A/D = CH4 (Yaw)",
+    "  5/6/7 = AUX5–7 (2-pos)",
+    "  8 = ARM/DISARM",
+    "  Space = kill AUX,  C = reset AUX",
+    "",
+    "Tello Controls:",
+    "  Коннект при запуске (если доступен).",
+    "  CH5 HIGH (при ARM) → через 1с Throw&Go / симуляция взлёта.",
+    "  g/j = yaw, y/h = up/down",
+    "  k/; = left/right",
+    "  o/l = forward/back",
+    "  M = авто-маятник (LR)",
+    "  N = маленький квадрат",
+    "  I = пауза / продолжить миссию",
+    "  T = удержание точки (по телеметрии)",
+    "  P = посадка (или стоп симуляции)",
+]
+
+# миссии из секции tello_missions с полем key — свои клавиши
+MISSION_KEYS = {name: spec["key"] for name, spec in cfg.get("tello_missions", {}).items() if spec.get("key")}
+HELP_LINES += [f"  {key.upper()} = миссия {name}" for name, key in MISSION_KEYS.items()]
+
+
+def make_bindings():
+    """BINDINGS + клавиши миссий (pygame уже инициализирован)."""
+    bindings = dict(BINDINGS)
+    for name, key in MISSION_KEYS.items():
+        bindings[pygame.key.key_code(key)] = ("tello_mission", name)
+    return bindings
+
+
+def draw_static(bg, font_small):
+    """Всё, что не меняется: рамки и подписи каналов, подсказки."""
+    draw_channel_frames(bg, font_small, PARAMS)
+    for n, line in enumerate(HELP_LINES):
         surf = font_small.render(line, True, (200, 200, 200))
-        screen.blit(surf, (help_x, help_y + n * line_h))
-
-    # ===========================
-    #   Нижняя строка — статус Tello
-    # ===========================
-    bottom_y = h - 50
-
-    if tello_connected:
-        t_text = "Tello: CONNECTED"
-        t_color = (0, 255, 0)
-    elif tello_simulation:
-        t_text = "Tello: SIMULATION MODE (NO DRONE)"
-        t_color = (255, 200, 80)
-    else:
-        t_text = "Tello: OFF / NO CONNECTION"
-        t_color = (255, 80, 80)
+        bg.blit(surf, (HELP_X, HELP_Y + n * HELP_LINE_H))
 
-    screen.blit(font_small.render(t_text, True, t_color), (40, bottom_y))
 
-    flying_color = (0, 220, 0) if tello_flying else (200, 200, 80)
-    screen.blit(font_small.render(f"State: {'FLYING' if tello_flying else 'IDLE'}",
-                                  True, flying_color), (320, bottom_y))
+PROFILE_POS = (40, 560)
 
-    screen.blit(font_small.render(f"Auto M: {'ON' if auto_mode else 'OFF'}",
-                                  True, (180, 220, 255)), (520, bottom_y))
 
-    screen.blit(font_small.render(f"Square N: {'ON' if square_mode else 'OFF'}",
-                                  True, (180, 220, 255)), (660, bottom_y))
+def draw_ui(hud, loop, fps, link_status, ppm_stats):
+    hud.ensure_background("main", lambda bg: draw_static(bg, hud.font_small))
 
-    rc_text = f"TELLO RC: LR={tello_lr} FB={tello_fb} UD={tello_ud} YW={tello_yw}"
-    screen.blit(font_small.render(rc_text, True, (120, 200, 255)), (860, bottom_y))
+    draw_header(hud, fps, link_status, ppm_stats, loop.channels.is_armed())
+    draw_channels(hud, loop.channels)
+    draw_tello_status(hud, loop.tello, hud.screen.get_height() - 50)
+
+    if loop.profiler.enabled:
+        draw_lines(hud, "prof", loop.profiler.overlay_lines(), PROFILE_POS)
+
+
+# === headless: сценарий вместо клавиатуры, файл вместо serial/Tello ===
+def main_headless(args):
+    headless.init()
+    if args.script:
+        source = ScriptedInput.load(args.script, make_bindings())
+    else:
+        source = ScriptedInput([], make_bindings())
+
+    tello = TelloController(None, True, tello_missions.from_config(cfg))
+    capture = CaptureOutput(args.capture, PARAMS.send_hz)
+    prof = LoopProfiler(enabled=args.profile)
+    loop = ControlLoop(PARAMS, source, [capture], tello=tello, profiler=prof)
+
+    recorder = None
+    if args.record:
+        # журнал во времени цикла — повторяется от прогона к прогону, как capture
+        recorder = FlightRecorder(args.record, clock=lambda: int((loop.now or 0.0) * 1e9))
+        loop.outputs.append(RecorderOutput(recorder, PARAMS.send_hz))
+        recorder.start()
+
+    headless.run(loop, PARAMS.loop_hz, args.realtime, args.duration)
+    capture.close()
+    if recorder is not None:
+        recorder.stop()
+    print(f"[headless] {capture.frames} PPM frames, {capture.tello_commands} Tello RC → {args.capture}")
+    if args.profile:
+        prof.export(args.profile_out)
+
+
+# === replay: кадры из журнала полёта прямо в serial, без UI ===
+def main_replay(args):
+    ser, portname, encoder = try_open_port()
+    link = SerialLink(ser, portname, encoder, BAUD, CANDIDATE_PORTS, PORT_PATTERNS,
+                      SERIAL_PROTOCOL, HANDSHAKE_TIMEOUT, STATE_FILE)
+    replayer = flight_replay.from_args(args, link.write)
+    try:
+        replayer.run()
+    except KeyboardInterrupt:
+        print("[replay] interrupted")
+    link.close()
 
 
 # === основная логика ===
-def main():
+def main(args):
     # --- serial / PPM ---
-    ser, portname = try_open_port()
-    ser_connected = ser is not None
+    ser, portname, encoder = try_open_port()
+    link = SerialLink(ser, portname, encoder, BAUD, CANDIDATE_PORTS, PORT_PATTERNS,
+                      SERIAL_PROTOCOL, HANDSHAKE_TIMEOUT, STATE_FILE)
 
     pygame.init()
     pygame.display.set_caption("PPM + Tello Control (Матка + Tello)")
@@ -227,295 +183,76 @@ def main():
     clock = pygame.time.Clock()
     font = pygame.font.SysFont("DejaVu Sans", 26)
     font_small = pygame.font.SysFont("DejaVu Sans", 18)
+    hud = Hud(screen, font, font_small)
 
     # --- Tello ---
-    drone = None
-    tello_connected = False
-    tello_simulation = False        # режим "управление без дрона"
-    tello_flying = False
-    tello_takeoff_time = None       # когда делать Throw&Go / старт симуляции
+    tello_out = connect_tello(tello_cfg)
+    tello = TelloController(tello_out, TELLO_SIM_IF_NO_DRONE, tello_missions.from_config(cfg))
+    if tello.simulation:
+        print("[tello] simulation mode enabled (no physical drone)")
 
-    auto_mode = False
-    auto_dir = 1
-    last_auto_switch = time.time()
-    prev_m_pressed = False
+    # --- журнал полёта (--record): кадры PPM пишет поток отправки ---
+    recorder = FlightRecorder(args.record) if args.record else None
 
-    square_mode = False
-    square_step = 0
-    square_last_switch = time.time()
-    prev_n_pressed = False
+    # --- отправка PPM в отдельном потоке ---
+    sender = PpmSender(link, PARAMS.send_hz, recorder=recorder)
 
-    tello_lr = tello_fb = tello_ud = tello_yw = 0
+    # --- замеры стадий цикла (--profile) ---
+    prof = LoopProfiler(enabled=args.profile)
+    prof.add_external("serial_write", sender.write_ns)
+    prof.add_external("key_to_serial", sender.key_latency_ns)
 
-    print("[tello] connecting...")
-    try:
-        drone = Tello()
-        drone.connect()
-        try:
-            batt = drone.get_battery()
-            print(f"[tello] battery: {batt}%")
-        except Exception:
-            print("[tello] battery read failed")
-        tello_connected = True
-    except Exception as e:
-        print(f"[tello] connect failed: {e}")
-        drone = None
-        tello_connected = False
-        if TELLO_SIM_IF_NO_DRONE:
-            tello_simulation = True
-            print("[tello] simulation mode enabled (no physical drone)")
-
-    # --- каналы PPM ---
-    ch = [MID_US] * 8
-    ch[2] = MIN_US  # Throttle
-    for i in range(4, 8):
-        ch[i] = MIN_US
-
-    send_interval = 1.0 / SEND_HZ
-    last_send = 0.0
-
-    running = True
-    while running:
-        dt = clock.tick(max(120, TELLO_FPS * 2)) / 1000.0
-        keys = pygame.key.get_pressed()
-        fast = keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT]
-        step = FAST_STEP if fast else STEP
-
-        armed = ch[7] > MID_US
-        now = time.time()
-
-        # --- обработка событий ---
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    # ESC: посадить Tello, выйти
-                    if (tello_connected or tello_simulation) and tello_flying:
-                        print("[tello] ESC → посадка / стоп симуляции")
-                        if tello_connected and drone is not None:
-                            try:
-                                drone.land()
-                            except Exception as e:
-                                print(f"[tello] land error: {e}")
-                        tello_flying = False
-                        auto_mode = False
-                        square_mode = False
-                    running = False
-
-                # CH5–CH7: двухпозиционные при ARM
-                if event.key == pygame.K_5 and armed:
-                    prev_ch5 = ch[4]
-                    ch[4] = next_two(ch[4])
-
-                    # LOW -> HIGH: планируем Throw&Go или симуляцию
-                    if prev_ch5 <= MIN_US + 10 and ch[4] >= MAX_US - 10:
-                        tello_takeoff_time = now
-                        if tello_connected:
-                            print("[tello] CH5 HIGH → Throw&Go через 1с, приготовься подбросить дрон")
-                        elif tello_simulation:
-                            print("[tello] CH5 HIGH → симуляция взлёта через 1с")
-
-                elif event.key == pygame.K_6 and armed:
-                    ch[5] = next_two(ch[5])
-                elif event.key == pygame.K_7 and armed:
-                    ch[6] = next_two(ch[6])
-
-                # CH8 (ARM/DISARM)
-                elif event.key == pygame.K_8:
-                    ch[7] = next_two(ch[7])
-
-                elif event.key == pygame.K_c:
-                    for i in range(4, 8):
-                        ch[i] = MIN_US
-                elif event.key == pygame.K_SPACE:
-                    for i in range(4, 8):
-                        ch[i] = MIN_US
-
-                # посадка Tello по P
-                elif event.key == pygame.K_p:
-                    if (tello_connected or tello_simulation) and tello_flying:
-                        print("[tello] P → посадка / стоп симуляции")
-                        if tello_connected and drone is not None:
-                            try:
-                                drone.land()
-                            except Exception as e:
-                                print(f"[tello] land error: {e}")
-                        tello_flying = False
-                        auto_mode = False
-                        square_mode = False
-
-        # --- PPM логика ---
-        armed = ch[7] > MID_US
-
-        if not armed:
-            ch[2] = MIN_US
-            ch[4] = MIN_US
-            ch[5] = MIN_US
-            ch[6] = MIN_US
-        else:
-            if keys[pygame.K_LEFT]:  ch[0] = clamp(ch[0] - step)
-            if keys[pygame.K_RIGHT]: ch[0] = clamp(ch[0] + step)
-            if keys[pygame.K_UP]:    ch[1] = clamp(ch[1] + step)
-            if keys[pygame.K_DOWN]:  ch[1] = clamp(ch[1] - step)
-            if keys[pygame.K_w]:     ch[2] = clamp(ch[2] + step)
-            if keys[pygame.K_s]:     ch[2] = clamp(ch[2] - step)
-            if keys[pygame.K_a]:     ch[3] = clamp(ch[3] - step)
-            if keys[pygame.K_d]:     ch[3] = clamp(ch[3] + step)
-
-        def approach(v, target, delta):
-            if v < target - delta: return v + delta
-            if v > target + delta: return v - delta
-            return target
-
-        for i in (0, 1, 3):
-            if (i == 0 and not (keys[pygame.K_LEFT] or keys[pygame.K_RIGHT])) \
-                    or (i == 1 and not (keys[pygame.K_UP] or keys[pygame.K_DOWN])) \
-                    or (i == 3 and not (keys[pygame.K_a] or keys[pygame.K_d])):
-                ch[i] = approach(ch[i], MID_US, RETURN_SPEED)
-
-        # --- Tello: запуск Throw&Go / симуляции по таймеру ---
-        if tello_takeoff_time is not None and now >= tello_takeoff_time and not tello_flying:
-            if tello_connected and drone is not None:
-                print("[tello] Throw&Go — подбрось дрон!")
-                try:
-                    drone.initiate_throw_takeoff()
-                    tello_flying = True
-                except Exception as e:
-                    print(f"[tello] initiate_throw_takeoff error: {e}")
-                    tello_flying = False
-            elif tello_simulation:
-                print("[tello] симуляция: считаем, что Tello взлетел")
-                tello_flying = True
-            tello_takeoff_time = None
-
-        # --- Tello управление / симуляция ---
-        tello_lr = tello_fb = tello_ud = tello_yw = 0
-
-        if (tello_connected or tello_simulation) and tello_flying:
-            # ручной ввод
-            if keys[pygame.K_g]:
-                tello_yw = -TELLO_MANUAL_SPEED
-            elif keys[pygame.K_j]:
-                tello_yw = TELLO_MANUAL_SPEED
-
-            if keys[pygame.K_y]:
-                tello_ud = TELLO_MANUAL_SPEED
-            elif keys[pygame.K_h]:
-                tello_ud = -TELLO_MANUAL_SPEED
-
-            if keys[pygame.K_k]:
-                tello_lr = -TELLO_MANUAL_SPEED
-            elif keys[pygame.K_SEMICOLON]:
-                tello_lr = TELLO_MANUAL_SPEED
-
-            if keys[pygame.K_o]:
-                tello_fb = TELLO_MANUAL_SPEED
-            elif keys[pygame.K_l]:
-                tello_fb = -TELLO_MANUAL_SPEED
-
-            # M — авто-маятник
-            m_pressed = keys[pygame.K_m]
-            if m_pressed and not prev_m_pressed:
-                auto_mode = not auto_mode
-                if auto_mode:
-                    square_mode = False
-                    auto_dir = 1
-                    last_auto_switch = now
-                    print("[tello] Auto mode (M) ON")
-                else:
-                    print("[tello] Auto mode (M) OFF")
-            prev_m_pressed = m_pressed
-
-            # N — квадрат
-            n_pressed = keys[pygame.K_n]
-            if n_pressed and not prev_n_pressed:
-                if not square_mode:
-                    square_mode = True
-                    auto_mode = False
-                    square_step = 0
-                    square_last_switch = now
-                    print("[tello] Square mode (N) START")
-            prev_n_pressed = n_pressed
-
-            manual_active = (tello_lr != 0 or tello_fb != 0 or tello_ud != 0 or tello_yw != 0)
-
-            if auto_mode and manual_active:
-                auto_mode = False
-                print("[tello] Auto mode OFF (перехват руками)")
-
-            if square_mode and manual_active:
-                square_mode = False
-                print("[tello] Square mode OFF (перехват руками)")
-
-            # логика квадрата
-            if square_mode and not manual_active:
-                directions = [
-                    (0,  TELLO_SQUARE_SPEED),
-                    (TELLO_SQUARE_SPEED, 0),
-                    (0, -TELLO_SQUARE_SPEED),
-                    (-TELLO_SQUARE_SPEED, 0),
-                ]
-                if square_step < len(directions):
-                    tello_lr, tello_fb = directions[square_step]
-                    if now - square_last_switch > TELLO_SQUARE_STEP_TIME:
-                        square_step += 1
-                        square_last_switch = now
-                else:
-                    square_mode = False
-                    tello_lr = tello_fb = 0
-                    print("[tello] Square mode DONE")
-
-            # логика маятника
-            elif auto_mode and not manual_active:
-                if now - last_auto_switch > TELLO_AUTO_INTERVAL:
-                    auto_dir *= -1
-                    last_auto_switch = now
-                tello_lr = auto_dir * TELLO_AUTO_SPEED
-                tello_fb = 0
-
-            # отправляем RC в реальный Tello (если есть)
-            if tello_connected and drone is not None:
-                try:
-                    drone.send_rc_control(tello_lr, tello_fb, tello_ud, tello_yw)
-                except Exception as e:
-                    print(f"[tello] send_rc_control error: {e}")
-
-        # --- отправка PPM ---
-        if now - last_send >= send_interval:
-            send_line(ser, ch)
-            last_send = now
+    outputs = [PpmOutput(sender)]
+    if tello_out is not None:
+        outputs.append(tello_out)
+    loop = ControlLoop(PARAMS, KeyboardInput(make_bindings()), outputs, tello=tello, profiler=prof)
+
+    if recorder is not None:
+        loop.outputs.append(RecorderOutput(recorder))
+        recorder.start()
+
+    sender.publish(loop.channels.ch)
+    sender.start()
+
+    while loop.running:
+        dt = clock.tick(max(PARAMS.loop_hz, TELLO_FPS * 2)) / 1000.0
+        prof.start()
+
+        inp = loop.tick(time.monotonic())
+        for event in inp.events:
+            if event.type == pygame.VIDEOEXPOSE:
+                hud.invalidate()
 
         # --- отрисовка ---
         fps = 1.0 / dt if dt > 0 else 0.0
-        draw_ui(
-            screen, font, font_small,
-            ch, fps, portname, ser_connected,
-            tello_connected, tello_simulation, tello_flying,
-            auto_mode, square_mode,
-            tello_lr, tello_fb, tello_ud, tello_yw
-        )
-        pygame.display.flip()
+        draw_ui(hud, loop, fps, link.status(), sender.stats())
+        prof.mark("draw")
+        hud.flush()
+        prof.mark("flip")
+        prof.end()
 
     # --- выход ---
-    if ser:
-        ser.close()
-
-    if tello_connected and drone is not None:
-        try:
-            print("[tello] final landing...")
-            drone.send_rc_control(0, 0, 0, 0)
-            if tello_flying:
-                drone.land()
-        except Exception as e:
-            print(f"[tello] final land error: {e}")
-        try:
-            drone.end()
-        except Exception:
-            pass
-
+    if args.profile:
+        prof.export(args.profile_out)
+    sender.stop()
+    link.close()
+    if recorder is not None:
+        recorder.stop()
+    tello.shutdown()
     pygame.quit()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="PPM + Tello control UI")
+    headless.add_arguments(parser)
+    loop_profiler.add_arguments(parser)
+    flight_log.add_arguments(parser)
+    flight_replay.add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.replay:
+        main_replay(args)
+    elif args.headless:
+        main_headless(args)
+    else:
+        main(args)
@@ -0,0 +1,456 @@
+import re
+
+import numpy as np
+
+from control_core import THROTTLE, PITCH
+from control_inputs import channel_index
+from trajectory import CURVES, apply, ease, exp_decay
+
+
+# ==== манёвры: ключевые кадры по нескольким каналам ====
+#
+# Описание в config.json, секция "maneuvers":
+#   "back_hold_return": {
+#     "loop": true, "priority": 10, "merge": "override", "key": "x",
+#     "channels": {"ch2": [[0, "mid"], [0.5, "mid-30", "ease"], [0.6, "mid-30"], [1.1, "mid", "ease"]]}
+#   }
+# Ключевой кадр — [t, значение] или [t, значение, кривая перехода к нему].
+# Значение: мкс, "min"/"mid"/"max" или "start" (канал в момент старта),
+# со сдвигом: "mid-30", "start+100". Кривые — trajectory.CURVES.
+#
+# Прочие поля (все необязательные):
+#   loop      — повторять по кругу, пока не выключат
+#   priority  — на общем канале пишет манёвр с большим приоритетом
+#   merge     — что делать, когда пилот держит стик этого канала:
+#               override — манёвр главнее, стик не действует
+#               yield    — пока стик держат, канал у пилота
+#               abort    — движение стиком прерывает манёвр
+#   group     — манёвры одной группы взаимоисключающие: повторное
+#               нажатие любого из них выключает активный
+#   needs_arm — запускать только при ARM (по умолчанию да)
+#   require   — {"ch3": [от, до]}: условие старта (null — без границы);
+#               не выполнено — сразу применяется on_end
+#   on_end    — {"ch8": "min"}: значения по окончании (не при отмене)
+#   key       — клавиша запуска/остановки (имя pygame)
+#
+# Все манёвры компилируются один раз в общую таблицу сегментов (NumPy);
+# такт считает все дорожки сразу, в заранее выделенных массивах.
+
+MERGE_OVERRIDE = 1
+MERGE_YIELD = 2
+MERGE_ABORT = 3
+MERGES = {"override": MERGE_OVERRIDE, "yield": MERGE_YIELD, "abort": MERGE_ABORT}
+
+PHASE_IDLE = 0xFFFF     # phase(): манёвр не активен
+
+_VALUE_RE = re.compile(r"^\s*(min|mid|max|start)\s*(?:([+-])\s*(\d+(?:\.\d+)?))?\s*$")
+
+
+class Maneuver:
+    """Скомпилированный манёвр: номера его дорожек (tracks) в таблице движка."""
+
+    __slots__ = ("name", "index", "loop", "priority", "merge", "group", "needs_arm",
+                 "require", "on_end", "key", "duration", "tracks", "channels", "start_time", "active")
+
+    def __init__(self, name, index, spec, params):
+        self.name = name
+        self.index = index
+        self.loop = bool(spec.get("loop", False))
+        self.priority = spec.get("priority", 0)
+        merge = spec.get("merge", "override")
+        if merge not in MERGES:
+            raise ValueError(f"maneuver {name}: unknown merge {merge!r}")
+        self.merge = MERGES[merge]
+        self.group = spec.get("group", name)
+        self.needs_arm = spec.get("needs_arm", True)
+        self.require = [(channel_index(k), _bound(lo, params), _bound(hi, params))
+                        for k, (lo, hi) in spec.get("require", {}).items()]
+        self.on_end = [(channel_index(k), _absolute(v, params, name))
+                       for k, v in spec.get("on_end", {}).items()]
+        self.key = spec.get("key")
+        self.duration = 0.0
+        self.tracks = ()
+        self.channels = ()
+        self.start_time = 0.0
+        self.active = False
+
+
+def parse_value(value, params):
+    """Значение ключевого кадра → (сдвиг, от_старта)."""
+    if isinstance(value, (int, float)):
+        return float(value), 0
+    m = _VALUE_RE.match(str(value))
+    if m is None:
+        raise ValueError(f"bad keyframe value: {value!r}")
+    base, sign, num = m.groups()
+    offset = float(num or 0) * (-1 if sign == "-" else 1)
+    if base == "start":
+        return offset, 1
+    return {"min": params.min_us, "mid": params.mid_us, "max": params.max_us}[base] + offset, 0
+
+
+def _absolute(value, params, name):
+    offset, rel = parse_value(value, params)
+    if rel:
+        raise ValueError(f"maneuver {name}: \"start\" is not allowed here")
+    return int(offset)
+
+
+def _bound(value, params):
+    return None if value is None else _absolute(value, params, "require")
+
+
+class ManeuverEngine:
+    """
+    Все манёвры из конфига, одна таблица сегментов.
+
+    - дорожка = (манёвр, канал), сегмент = переход между соседними
+      ключевыми кадрами дорожки; после последнего кадра дорожка держит
+      значение до конца манёвра (длина манёвра — самый поздний кадр)
+    - update(ch, now, held): для всех дорожек сразу — время от старта,
+      продвижение курсора сегмента, кривая, значение; массивы выделены
+      заранее, на такт новых массивов нет; в каналы пишутся только
+      активные дорожки, по возрастанию приоритета
+    - mode[idx] — как манёвры сейчас держат канал (MERGE_* или 0),
+      ControlLoop по нему решает, двигать ли стик
+    """
+
+    def __init__(self, specs, params):
+        self.params = params
+        self.maneuvers = []
+        self.by_name = {}
+        self.mode = [0] * 8
+
+        t0, t1, inv, curve, off0, off1, rel0, rel1 = [], [], [], [], [], [], [], []
+        trk_first, trk_last, trk_chan, trk_man, trk_dur = [], [], [], [], []
+
+        for name, spec in specs.items():
+            m = Maneuver(name, len(self.maneuvers), spec, params)
+            keys = {channel_index(ch): [list(k) for k in frames] for ch, frames in spec["channels"].items()}
+            m.duration = max(float(frames[-1][0]) for frames in keys.values())
+            if m.duration <= 0.0:
+                raise ValueError(f"maneuver {name}: zero duration")
+
+            tracks = []
+            for chan, frames in keys.items():
+                frames.sort(key=lambda k: k[0])
+                if frames[-1][0] < m.duration:
+                    frames.append([m.duration, frames[-1][1]])
+                trk_first.append(len(t0))
+                prev_t, (prev_off, prev_rel) = float(frames[0][0]), parse_value(frames[0][1], params)
+                if prev_t > 0.0:
+                    frames.insert(0, [0.0, frames[0][1]])
+                    prev_t = 0.0
+                for k in frames[1:]:
+                    t = float(k[0])
+                    o, r = parse_value(k[1], params)
+                    c = k[2] if len(k) > 2 else "linear"
+                    if c not in CURVES:
+                        raise ValueError(f"maneuver {name}: unknown curve {c!r}")
+                    t0.append(prev_t)
+                    t1.append(t)
+                    inv.append(1.0 / (t - prev_t) if t > prev_t else 0.0)
+                    curve.append(CURVES.index(c))
+                    off0.append(prev_off)
+                    off1.append(o)
+                    rel0.append(prev_rel)
+                    rel1.append(r)
+                    prev_t, prev_off, prev_rel = t, o, r
+                trk_last.append(len(t0) - 1)
+                trk_chan.append(chan)
+                trk_man.append(m.index)
+                trk_dur.append(m.duration)
+                tracks.append(len(trk_chan) - 1)
+
+            m.tracks = tuple(tracks)
+            m.channels = tuple(keys)
+            self.maneuvers.append(m)
+            self.by_name[name] = m
+
+        # --- таблица сегментов (статика) ---
+        self.seg_t0 = np.array(t0)
+        self.seg_t1 = np.array(t1)
+        self.seg_inv = np.array(inv)
+        self.seg_curve = np.array(curve, dtype=np.intp)
+        self.seg_off0 = np.array(off0)
+        self.seg_off1 = np.array(off1)
+        self.seg_rel0 = np.array(rel0, dtype=bool)
+        self.seg_rel1 = np.array(rel1, dtype=bool)
+        # значения концов, разрешаются при старте манёвра ("start")
+        self.seg_v0 = self.seg_off0.copy()
+        self.seg_dv = self.seg_off1 - self.seg_off0
+
+        # --- дорожки ---
+        self.trk_first = np.array(trk_first, dtype=np.intp)
+        self.trk_last = np.array(trk_last, dtype=np.intp)
+        self.trk_chan = trk_chan
+        self.trk_man = trk_man
+        self.trk_dur = np.array(trk_dur)
+        n = len(trk_chan)
+        self.cur = self.trk_first.copy()
+        self.start_t = np.zeros(n)
+        self.active = np.zeros(n, dtype=bool)
+        self.values = np.zeros(n)
+
+        # рабочие буферы такта
+        self._e = np.zeros(n)
+        self._u = np.zeros(n)
+        self._f1 = np.zeros(n)
+        self._f2 = np.zeros(n)
+        self._ease = np.zeros(n)
+        self._exp = np.zeros(n)
+        self._ci = np.zeros(n, dtype=np.intp)
+        self._mask = np.zeros(n, dtype=bool)
+
+        self._order = []        # активные дорожки по возрастанию приоритета
+        self._curved = False    # у активных дорожек есть ease/exp
+
+    # --- управление ---
+
+    def names(self):
+        return [m.name for m in self.maneuvers]
+
+    def is_active(self, name=None):
+        if name is None:
+            return bool(self._order)
+        return self.by_name[name].active
+
+    def active_names(self):
+        return [m.name for m in self.maneuvers if m.active]
+
+    def toggle(self, name, ch, now, armed=True):
+        """Клавиша манёвра: активен манёвр той же группы — выключить, иначе запустить."""
+        m = self.by_name.get(name)
+        if m is None:
+            print(f"[maneuver] unknown: {name}")
+            return
+        for other in self.maneuvers:
+            if other.active and other.group == m.group:
+                self.stop(other, "ABORT")
+                return
+        if m.needs_arm and not armed:
+            return
+        self.start(m, ch, now)
+
+    def start(self, m, ch, now):
+        for idx, lo, hi in m.require:
+            v = ch[idx]
+            if (lo is not None and v < lo) or (hi is not None and v > hi):
+                print(f"[maneuver] {m.name}: CH{idx + 1}={v} вне [{lo}, {hi}], сразу конец")
+                self._apply_end(m, ch)
+                return
+
+        for k in m.tracks:
+            first, last = self.trk_first[k], self.trk_last[k] + 1
+            base = ch[self.trk_chan[k]]
+            v0 = self.seg_off0[first:last] + self.seg_rel0[first:last] * base
+            v1 = self.seg_off1[first:last] + self.seg_rel1[first:last] * base
+            self.seg_v0[first:last] = v0
+            self.seg_dv[first:last] = v1 - v0
+            self.cur[k] = first
+            self.start_t[k] = now
+            self.active[k] = True
+        m.start_time = now
+        m.active = True
+        self._refresh()
+        print(f"[maneuver] {m.name} START ({m.duration:.1f}s{', loop' if m.loop else ''})")
+
+    def stop(self, m, reason="ABORT"):
+        if not m.active:
+            return
+        for k in m.tracks:
+            self.active[k] = False
+        m.active = False
+        self._refresh()
+        print(f"[maneuver] {m.name} {reason}")
+
+    def stop_all(self):
+        for m in self.maneuvers:
+            self.stop(m)
+
+    def _apply_end(self, m, ch):
+        for idx, v in m.on_end:
+            ch[idx] = v
+
+    def _refresh(self):
+        order = [k for k in range(len(self.trk_chan)) if self.active[k]]
+        order.sort(key=lambda k: self.maneuvers[self.trk_man[k]].priority)
+        self._order = order
+        self._curved = any(self.seg_curve[self.trk_first[k]:self.trk_last[k] + 1].any() for k in order)
+        mode = [0] * 8
+        for k in order:
+            mode[self.trk_chan[k]] = self.maneuvers[self.trk_man[k]].merge
+        self.mode = mode
+
+    def overrides(self, idx, held=False):
+        """Канал ведёт манёвр: override — всегда, yield/abort — пока стик не держат."""
+        mode = self.mode[idx]
+        return mode == MERGE_OVERRIDE or (mode != 0 and not held)
+
+    def phase(self, m):
+        """Номер текущего сегмента первой дорожки манёвра (для журнала), PHASE_IDLE — не активен."""
+        if not m.active:
+            return PHASE_IDLE
+        k = m.tracks[0]
+        return int(self.cur[k] - self.trk_first[k])
+
+    # --- такт ---
+
+    def update(self, ch, now, held=(False, False, False, False)):
+        if not self._order:
+            return ch
+
+        e, mask, cur = self._e, self._mask, self.cur
+        np.subtract(now, self.start_t, out=e)
+
+        # конец манёвра: зацикленные — на новый круг, остальные — стоп + on_end
+        np.greater_equal(e, self.trk_dur, out=mask)
+        np.logical_and(mask, self.active, out=mask)
+        if mask.any():
+            self._roll(ch, now)
+            if not self._order:
+                return ch
+            np.subtract(now, self.start_t, out=e)
+
+        # курсор сегмента: только вперёд, обычно ни одного шага за такт
+        f1 = self._f1
+        while True:
+            self.seg_t1.take(cur, out=f1)
+            np.greater_equal(e, f1, out=mask)
+            np.logical_and(mask, self.active, out=mask)
+            if not mask.any():
+                break
+            np.add(cur, mask, out=cur, casting="unsafe")
+
+        # u ∈ [0, 1] внутри сегмента
+        u = self._u
+        self.seg_t0.take(cur, out=f1)
+        np.subtract(e, f1, out=u)
+        self.seg_inv.take(cur, out=f1)
+        np.multiply(u, f1, out=u)
+        np.maximum(u, 0.0, out=u)
+        np.minimum(u, 1.0, out=u)
+
+        # кривые: нелинейные считаются, только если они есть у активных дорожек
+        values = self.values
+        if self._curved:
+            ease(u, out=self._ease)
+            exp_decay(u, out=self._exp)
+            self.seg_curve.take(cur, out=self._ci)
+            np.choose(self._ci, (u, self._ease, self._exp), out=values)
+        else:
+            np.copyto(values, u)
+
+        # v0 + s·dv
+        f2 = self._f2
+        self.seg_dv.take(cur, out=f2)
+        np.multiply(values, f2, out=values)
+        self.seg_v0.take(cur, out=f1)
+        np.add(values, f1, out=values)
+
+        lo, hi = self.params.min_us, self.params.max_us
+        stopped = None
+        for k in self._order:
+            idx = self.trk_chan[k]
+            if idx < 4 and held[idx]:
+                merge = self.maneuvers[self.trk_man[k]].merge
+                if merge == MERGE_YIELD:
+                    continue
+                if merge == MERGE_ABORT:
+                    stopped = self.maneuvers[self.trk_man[k]]
+                    continue
+            v = int(values[k])
+            ch[idx] = lo if v < lo else hi if v > hi else v
+        if stopped is not None:
+            self.stop(stopped, "ABORT (stick)")
+        return ch
+
+    def _roll(self, ch, now):
+        for m in self.maneuvers:
+            if not m.active or now - m.start_time < m.duration:
+                continue
+            if m.loop:
+                m.start_time += m.duration * ((now - m.start_time) // m.duration)
+                for k in m.tracks:
+                    self.start_t[k] = m.start_time
+                    self.cur[k] = self.trk_first[k]
+                continue
+            # последний кадр + on_end
+            for k in m.tracks:
+                last = self.trk_last[k]
+                v = int(self.seg_v0[last] + self.seg_dv[last])
+                ch[self.trk_chan[k]] = min(max(v, self.params.min_us), self.params.max_us)
+            self._apply_end(m, ch)
+            self.stop(m, "DONE")
+
+    # --- batch ---
+
+    def evaluate(self, name, ts, ch=None):
+        """
+        Значения манёвра в моменты ts (сек от старта) без запуска:
+        {канал: массив int}. ch — каналы на момент старта (для "start").
+        """
+        m = self.by_name[name]
+        ts = np.asarray(ts, dtype=float)
+        if m.loop:
+            ts = ts % m.duration
+        out = {}
+        for k in m.tracks:
+            first, last = self.trk_first[k], self.trk_last[k] + 1
+            base = ch[self.trk_chan[k]] if ch is not None else self.params.mid_us
+            v0 = self.seg_off0[first:last] + self.seg_rel0[first:last] * base
+            v1 = self.seg_off1[first:last] + self.seg_rel1[first:last] * base
+            seg = np.minimum(np.searchsorted(self.seg_t1[first:last], ts, side="right"), last - first - 1)
+            u = np.clip((ts - self.seg_t0[first:last][seg]) * self.seg_inv[first:last][seg], 0.0, 1.0)
+            s = apply(self.seg_curve[first:last][seg], u)
+            v = (v0[seg] + s * (v1 - v0)[seg]).astype(int)
+            out[self.trk_chan[k]] = np.clip(v, self.params.min_us, self.params.max_us)
+        return out
+
+
+def legacy_maneuvers(params, autoland_cfg, autoback_cfg):
+    """
+    Прежние автопосадка (autoland_fast/slow) и автополёт назад (autoback)
+    как манёвры — из секций autoland/autoback конфига.
+
+    Отдельных AutoLandController / AutoBackController больше нет: всё, что
+    от них требовалось, делает движок — профиль считается один раз в
+    таблицу сегментов NumPy, кривая выбирается в конфиге (curve: linear /
+    ease / exp), фаза — целый номер сегмента (phase(), PHASE_IDLE), пакетный
+    расчёт по N моментам — evaluate(). Вторая пара машин состояний писала
+    бы в те же каналы мимо приоритетов и merge движка.
+    """
+    land_us = autoland_cfg.get("land_throttle_us", params.min_us)
+    settle = autoland_cfg.get("settle_time", 1.0)
+    curve = autoland_cfg.get("curve", "linear")
+    specs = {}
+    for mode, default in (("fast", 5.0), ("slow", 10.0)):
+        descend = max(autoland_cfg.get(f"descend_time_{mode}", default), 0.01)
+        specs[f"autoland_{mode}"] = {
+            "group": "autoland",
+            "priority": 20,
+            # газ ниже середины — не тянем, сразу конец (и дизарм, если включён)
+            "require": {f"ch{THROTTLE + 1}": ["mid", None]},
+            "channels": {f"ch{THROTTLE + 1}": [[0, "start"], [descend, land_us, curve],
+                                               [descend + settle, land_us]]},
+            "on_end": {"ch8": "min"} if autoland_cfg.get("disarm_on_land", True) else {},
+        }
+
+    ramp = max(autoback_cfg.get("ramp_time", 0.5), 0.01)
+    hold = autoback_cfg.get("hold_time", 0.1)
+    amp = autoback_cfg.get("back_amplitude", 20)
+    curve = autoback_cfg.get("curve", "linear")
+    specs["autoback"] = {
+        "loop": True,
+        "priority": 10,
+        "channels": {f"ch{PITCH + 1}": [[0, "mid"], [ramp, f"mid-{amp}", curve],
+                                        [ramp + hold, f"mid-{amp}"], [2 * ramp + hold, "mid", curve]]},
+    }
+    return specs
+
+
+def from_config(cfg, params):
+    """Встроенные autoland/autoback + секция maneuvers (одноимённые заменяют встроенные)."""
+    specs = legacy_maneuvers(params, cfg.get("autoland", {}), cfg.get("autoback", {}))
+    specs.update(cfg.get("maneuvers", {}))
+    return ManeuverEngine(specs, params)
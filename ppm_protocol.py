@@ -0,0 +1,133 @@
+import struct
+import time
+
+
+# ==== протокол обмена с Arduino (sketch_send_commands.ino) ====
+#
+# ASCII (старый, fallback):
+#     "1500,1500,1000,2000,1500,1500,1500,1500\n"        — до ~40 байт
+#
+# BIN (новый):
+#     A5 | seq | ch1..ch8 (uint16 LE) | crc8              — 19 байт
+#     crc8 (DVB-S2, poly 0xD5) считается по seq + каналам.
+#
+# Выбор протокола: открытие порта перезагружает Arduino, и новая прошивка
+# сама печатает "PPM BIN1\n" при старте — сначала handshake_passive сек
+# просто слушаем. Нет баннера (плата без сброса при открытии, баннер съел
+# загрузчик) — спрашиваем HANDSHAKE_QUERY: обычный ASCII-кадр, все каналы
+# в NEUTRAL_US (как после старта скетча), и лишнее девятое поле "?".
+# Старая прошивка применит его как нейтральный кадр (хвост atoi не видит),
+# новая ещё и ответит "PPM BIN1". Голое "?" старый скетч превратил бы
+# в 8 каналов по MIN_US (полные отклонения стиков, ARM LOW).
+# Нет ответа за handshake_timeout → остаёмся на ASCII.
+
+PROTO_ASCII = "ascii"
+PROTO_BIN = "bin"
+
+SYNC_BYTE = 0xA5
+CHANNEL_COUNT = 8
+NEUTRAL_US = 1500          # MID_US скетча: так стоят все каналы после его старта
+HANDSHAKE_QUERY = (",".join([str(NEUTRAL_US)] * CHANNEL_COUNT) + ",?\n").encode("ascii")
+HANDSHAKE_REPLY = b"PPM BIN1"
+HANDSHAKE_TIMEOUT = 2.5     # сек — Arduino перезагружается при открытии порта
+HANDSHAKE_PASSIVE = 1.5     # сек ждём баннер, прежде чем спрашивать
+HANDSHAKE_RETRY = 0.25      # сек между повторными запросами
+
+_BIN_HEAD = struct.Struct("<BB8H")
+BIN_FRAME_SIZE = _BIN_HEAD.size + 1
+
+
+def _make_crc8_table(poly=0xD5):
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+
+_CRC8_TABLE = _make_crc8_table()
+
+
+def crc8(data, start=0, end=None):
+    table = _CRC8_TABLE
+    crc = 0
+    for b in data[start:end]:
+        crc = table[crc ^ b]
+    return crc
+
+
+def encode_ascii(ch):
+    return (",".join(str(int(v)) for v in ch) + "\n").encode("ascii")
+
+
+class PpmEncoder:
+    """
+    Кодирует кадр каналов в выбранный протокол.
+
+    В режиме BIN буфер кадра выделяется один раз и переиспользуется,
+    номер кадра seq растёт по кругу 0..255 (скетч по нему видит пропуски).
+    """
+
+    def __init__(self, protocol=PROTO_ASCII):
+        self.protocol = protocol
+        self.seq = 0
+        self._buf = bytearray(BIN_FRAME_SIZE)
+
+    def is_binary(self):
+        return self.protocol == PROTO_BIN
+
+    def encode(self, ch):
+        if self.protocol != PROTO_BIN:
+            return encode_ascii(ch)
+
+        buf = self._buf
+        _BIN_HEAD.pack_into(buf, 0, SYNC_BYTE, self.seq, *ch)
+        buf[-1] = crc8(buf, 1, -1)
+        self.seq = (self.seq + 1) & 0xFF
+        return buf
+
+
+def negotiate(ser, mode="auto", timeout=HANDSHAKE_TIMEOUT, passive=HANDSHAKE_PASSIVE):
+    """
+    Определяет протокол для открытого порта.
+
+    mode: "auto" — handshake со скетчем, "ascii"/"bin" — принудительно.
+    Первые passive сек только читаем (баннер при старте), затем шлём
+    HANDSHAKE_QUERY. Ожидается порт с timeout=0 (неблокирующее чтение).
+    """
+    if mode in (PROTO_ASCII, PROTO_BIN):
+        return mode
+    if ser is None:
+        return PROTO_ASCII
+
+    now = time.monotonic()
+    deadline = now + timeout
+    next_query = now + min(passive, timeout)
+    buf = b""
+
+    while now < deadline:
+        if now >= next_query:
+            try:
+                ser.write(HANDSHAKE_QUERY)
+            except Exception as e:
+                print(f"[serial] handshake write error: {e}")
+                return PROTO_ASCII
+            next_query = now + HANDSHAKE_RETRY
+
+        try:
+            data = ser.read(64)
+        except Exception as e:
+            print(f"[serial] handshake read error: {e}")
+            return PROTO_ASCII
+
+        if data:
+            buf = (buf + data)[-256:]
+            if HANDSHAKE_REPLY in buf:
+                return PROTO_BIN
+        else:
+            time.sleep(0.01)
+        now = time.monotonic()
+
+    return PROTO_ASCII
@@ -0,0 +1,164 @@
+import threading
+import time
+
+from loop_profiler import RingStats
+
+
+class PpmSender:
+    """
+    Отдельный поток отправки PPM-кадров в serial.
+
+    - владеет каналом SerialLink: кроме него в порт никто не пишет;
+      пока канал восстанавливается, кадры просто не уходят
+    - UI-цикл только публикует снимок каналов через publish(ch);
+      снимок — неизменяемый tuple (каналы, key_ns), подмена ссылки
+      атомарна, замков нет: каналы и нажатие приходят вместе
+    - расписание по дедлайнам time.perf_counter_ns(): спим почти до
+      дедлайна, остаток добираем коротким busy-wait
+    - stats(): фактическая частота и перцентили джиттера;
+      recent_jitter_ms(n) — p95 джиттера только последних n кадров
+    - write_ns — длительность link.write(); key_latency_ns — от нажатия,
+      которое увидел цикл (publish(ch, key_ns)), до записи кадра в порт
+    - recorder — FlightRecorder: каждый кадр, ушедший в порт, попадает
+      в журнал полёта
+    """
+
+    def __init__(self, link, send_hz=50, spin_us=300, stats_size=512, recorder=None):
+        self.link = link
+        self.recorder = recorder
+        self.period_ns = int(1e9 / max(send_hz, 1))
+        self.spin_ns = spin_us * 1000
+
+        self._pending = None            # (tuple каналов, key_ns)
+        self._key_sent = 0              # key_ns, уже учтённый отправителем
+        self._running = False
+        self._thread = None
+
+        # кольцевой буфер фактических интервалов между отправками, нс
+        self._intervals = [0] * stats_size
+        self._count = 0
+        self._last_send_ns = None
+
+        self.write_ns = RingStats(stats_size)
+        self.key_latency_ns = RingStats(stats_size)
+
+        self._stats_cache = None
+        self._stats_time = 0.0
+
+    # --- публичный API ---
+
+    def publish(self, ch, key_ns=0):
+        """Вызывается из UI-цикла: отдать актуальные каналы отправителю."""
+        if not key_ns:
+            prev = self._pending
+            if prev is not None and prev[1] != self._key_sent:
+                key_ns = prev[1]        # прошлое нажатие ещё не ушло в порт — несём дальше
+        self._pending = (tuple(ch), key_ns)
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="ppm-sender", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def is_running(self):
+        return self._running
+
+    def stats(self, max_age=0.5):
+        """
+        {"rate_hz", "p50_ms", "p95_ms", "p99_ms", "max_ms", "errors"}
+        джиттер = |фактический интервал − период|. Пересчёт не чаще max_age.
+        """
+        now = time.monotonic()
+        if self._stats_cache is not None and now - self._stats_time < max_age:
+            return self._stats_cache
+
+        n = min(self._count, len(self._intervals))
+        samples = self._intervals[:n]
+        period = self.period_ns
+
+        if samples:
+            mean_ns = sum(samples) / n
+            jitter = sorted(abs(v - period) for v in samples)
+
+            def pct(p):
+                return jitter[min(n - 1, int(p * n))] / 1e6
+
+            stats = {
+                "rate_hz": 1e9 / mean_ns if mean_ns > 0 else 0.0,
+                "p50_ms": pct(0.50),
+                "p95_ms": pct(0.95),
+                "p99_ms": pct(0.99),
+                "max_ms": jitter[-1] / 1e6,
+                "errors": self.link.write_errors,
+            }
+        else:
+            stats = {"rate_hz": 0.0, "p50_ms": 0.0, "p95_ms": 0.0,
+                     "p99_ms": 0.0, "max_ms": 0.0, "errors": self.link.write_errors}
+
+        self._stats_cache = stats
+        self._stats_time = now
+        return stats
+
+    def recent_jitter_ms(self, n):
+        """p95 джиттера последних n интервалов, мс — быстрый сигнал для VideoGovernor."""
+        count = self._count
+        n = min(n, count, len(self._intervals))
+        if n == 0:
+            return 0.0
+        size = len(self._intervals)
+        period = self.period_ns
+        jitter = sorted(abs(self._intervals[i % size] - period) for i in range(count - n, count))
+        return jitter[min(n - 1, int(0.95 * n))] / 1e6
+
+    # --- поток отправки ---
+
+    def _run(self):
+        clock = time.perf_counter_ns
+        period = self.period_ns
+        deadline = clock() + period
+
+        while self._running:
+            # грубое ожидание сном, точное — busy-wait
+            remaining = deadline - clock()
+            if remaining > self.spin_ns:
+                time.sleep((remaining - self.spin_ns) / 1e9)
+            while clock() < deadline:
+                pass
+
+            now = clock()
+            self._send()
+
+            if self._last_send_ns is not None:
+                self._intervals[self._count % len(self._intervals)] = now - self._last_send_ns
+                self._count += 1
+            self._last_send_ns = now
+
+            deadline += period
+            if deadline < now:
+                # отстали больше чем на кадр (система подвисла) — не догоняем пачкой
+                deadline = now + period
+
+    def _send(self):
+        pending = self._pending
+        if pending is not None:
+            ch, key_ns = pending
+            if key_ns == self._key_sent:
+                key_ns = 0              # это нажатие уже посчитано
+            elif key_ns:
+                self._key_sent = key_ns
+            t0 = time.perf_counter_ns()
+            ok = self.link.write(ch)
+            t1 = time.perf_counter_ns()
+            self.write_ns.add(t1 - t0)
+            if key_ns and ok:
+                self.key_latency_ns.add(t1 - key_ns)
+            if ok and self.recorder is not None:
+                self.recorder.ppm(ch)
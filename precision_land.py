@@ -0,0 +1,304 @@
+import math
+
+import cv2
+import numpy as np
+import pygame
+
+from vision import ArucoPlugin
+
+
+# ==== точная посадка Tello на маркер ====
+#
+# Площадка — маркер ArUco / AprilTag. Кадры обрабатывает PadTracker в
+# пуле VisionPool (vision.py) в уменьшенном разрешении: полный поиск
+# маркера — на ключевых кадрах (каждый detect_every-й или после потери),
+# между ними — сопровождение четырёх углов оптическим потоком
+# (cv2.calcOpticalFlowPyrLK), это в разы дешевле detectMarkers.
+#
+# PrecisionLander в цикле управления только читает последний свежий
+# результат пула и с частотой tello.fps пересчитывает rc:
+#   SEARCH  — площадки нет: висим; дольше lost_timeout — отмена
+#   ALIGN   — P-регулятор по смещению центра площадки от центра кадра:
+#             lr ← x, fb ← −y (нижняя камера: верх кадра — нос дрона),
+#             курс — по повороту маркера (kp_yaw, по умолчанию выключен)
+#   центр в пределах center_tol дольше settle сек → DESCEND (снижение
+#   descend_rc, пока сторона площадки меньше land_side) или сразу LAND
+#   LAND    — TelloController.land() (тот же путь, что P / ESC)
+# При старте дрону уходит "downvision 1" (нижняя камера, Tello EDU /
+# SDK 2.0+), при выходе — "downvision 0"; downvision=false — площадку
+# ищем передней камерой, знаки осей — sign_x / sign_y.
+# Параметры — секция "precision_land" config.json.
+
+OFF, SEARCH, ALIGN, DESCEND, LAND = "OFF", "SEARCH", "ALIGN", "DESCEND", "LAND"
+HOVER = (0, 0, 0, 0)
+
+
+class Pad:
+    __slots__ = ("id", "center", "side", "angle", "corners", "tracked")
+
+    def __init__(self, id, center, side, angle, corners, tracked):
+        self.id = id
+        self.center = center      # (x, y) в долях кадра
+        self.side = side          # сторона, доля ширины кадра
+        self.angle = angle        # поворот верхней кромки маркера, градусы
+        self.corners = corners    # (4, 2) в долях кадра
+        self.tracked = tracked    # True — сопровождение, False — ключевой кадр
+
+
+class PadTracker(ArucoPlugin):
+    """
+    Площадка: поиск маркера на ключевых кадрах, сопровождение углов между
+    ними → Pad. Потеря сопровождения (точка не найдена, площадь четырёх-
+    угольника скачет больше чем в max_scale раз) — сразу новый поиск.
+    keyframes / tracked — счётчики кадров с поиском и с сопровождением.
+    """
+
+    def __init__(self, name="pad", width=320, dictionary="DICT_4X4_50", ids=None,
+                 detect_every=5, max_scale=1.5):
+        super().__init__(name, width, dictionary, ids)
+        self.detect_every = max(1, detect_every)
+        self.max_scale = max_scale
+        self.keyframes = 0
+        self.tracked = 0
+
+        self._grays = [None, None]      # текущий и предыдущий кадр, по очереди
+        self._cur = 0
+        self._pts = None                # углы (4, 1, 2) float32, пиксели
+        self._id = None
+        self._since_detect = 0
+
+    def process(self, frame):
+        h, w = frame.shape[:2]
+        gray = self._grays[self._cur]
+        if gray is None or gray.shape != (h, w):
+            gray = self._grays[self._cur] = np.empty((h, w), dtype=np.uint8)
+            self._pts = None            # другой размер кадра — предыдущий не годится
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray)
+        prev = self._grays[1 - self._cur]
+
+        pts = None
+        if self._pts is not None and self._since_detect < self.detect_every - 1:
+            pts = self._track(prev, gray)
+        tracked = pts is not None
+        if tracked:
+            self._since_detect += 1
+            self.tracked += 1
+        else:
+            pts = self._find(gray)
+            self._since_detect = 0
+            self.keyframes += 1
+
+        self._pts = pts
+        self._cur = 1 - self._cur
+        if pts is None:
+            return None
+
+        c = pts.reshape(4, 2)
+        (cx, cy) = c.mean(axis=0)
+        dx, dy = c[1] - c[0]
+        side = math.sqrt(abs(cv2.contourArea(c))) / w
+        return Pad(self._id, (float(cx) / w, float(cy) / h), side,
+                   math.degrees(math.atan2(dy, dx)), c / (w, h), tracked)
+
+    def _find(self, gray):
+        corners, ids = self.detect(gray)
+        if ids is None:
+            return None
+        best = None
+        for c, marker_id in zip(corners, ids.ravel()):
+            if self.ids is not None and marker_id not in self.ids:
+                continue
+            area = abs(cv2.contourArea(c.reshape(4, 2)))
+            # тот же маркер, что сопровождали, — в приоритете, иначе самый крупный
+            key = (marker_id == self._id, area)
+            if best is None or key > best[0]:
+                best = (key, c, int(marker_id))
+        if best is None:
+            return None
+        self._id = best[2]
+        return best[1].reshape(4, 1, 2).astype(np.float32)
+
+    def _track(self, prev, gray):
+        pts, status, _ = cv2.calcOpticalFlowPyrLK(prev, gray, self._pts, None,
+                                                  winSize=(21, 21), maxLevel=2)
+        if pts is None or not status.all():
+            return None
+        a0 = abs(cv2.contourArea(self._pts.reshape(4, 2)))
+        a1 = abs(cv2.contourArea(pts.reshape(4, 2)))
+        if a0 <= 0 or not (1.0 / self.max_scale <= a1 / a0 <= self.max_scale):
+            return None
+        return pts
+
+    def draw(self, screen, data, rect, font):
+        # ключевой кадр — зелёный, сопровождение — голубой; крест — центр кадра (цель)
+        color = (80, 200, 255) if data.tracked else (0, 255, 0)
+        pts = [(rect.x + x * rect.w, rect.y + y * rect.h) for x, y in data.corners]
+        pygame.draw.lines(screen, color, True, pts, 2)
+        cx, cy = rect.centerx, rect.centery
+        pygame.draw.line(screen, (255, 255, 255), (cx - 10, cy), (cx + 10, cy), 1)
+        pygame.draw.line(screen, (255, 255, 255), (cx, cy - 10), (cx, cy + 10), 1)
+        px, py = rect.x + data.center[0] * rect.w, rect.y + data.center[1] * rect.h
+        pygame.draw.line(screen, color, (cx, cy), (px, py), 1)
+
+    def summary(self, data):
+        if data is None:
+            return "no pad"
+        return f"pad {data.id} {'track' if data.tracked else 'detect'} side {data.side:.2f}"
+
+
+class PrecisionLander:
+    """
+    Режим точной посадки для TelloController (по образцу MissionPlanner).
+
+    - start(now, vision) — vision: VisionPool с обработчиком plugin
+      (PadTracker); без него режим не включается
+    - update(now, lr, fb, ud, yw) → rc; ручной ввод выключает режим
+      ("перехват руками"); landing — пора сажать (land() делает
+      TelloController, затем stop())
+    - command — TelloOutput.command или None (без дрона): downvision
+    """
+
+    def __init__(self, cfg=None, tello_cfg=None):
+        cfg = cfg or {}
+        tello_cfg = tello_cfg or {}
+        self.plugin = cfg.get("plugin", "pad")
+        self.kp_xy = cfg.get("kp_xy", 60.0)          # rc на долю кадра смещения
+        self.kp_yaw = cfg.get("kp_yaw", 0.0)         # rc на градус поворота маркера
+        self.sign_x = cfg.get("sign_x", 1)
+        self.sign_y = cfg.get("sign_y", 1)
+        self.max_rc = cfg.get("max_rc", 20)
+        self.center_tol = cfg.get("center_tol", 0.05)
+        self.settle = cfg.get("settle", 1.0)
+        self.descend_rc = cfg.get("descend_rc", 0)
+        self.land_side = cfg.get("land_side", 0.35)
+        self.lost_timeout = cfg.get("lost_timeout", 3.0)
+        self.downvision = cfg.get("downvision", True)
+        self.period = 1.0 / max(tello_cfg.get("fps", 20), 1)
+
+        self.command = None
+        self.vision = None
+        self.mode = OFF
+        self.rc = HOVER
+        self.pad = None
+
+        self._fut = None
+        self._next = 0.0
+        self._seen = 0.0
+        self._centered_since = None
+
+    @property
+    def active(self):
+        return self.mode != OFF
+
+    @property
+    def landing(self):
+        return self.mode == LAND
+
+    def start(self, now, vision):
+        if vision is None or self.plugin not in vision.plugins:
+            print(f"[tello] Precision land: нет обработчика {self.plugin!r} (--vision, секция vision)")
+            return False
+        self.vision = vision
+        if self.command is not None and self.downvision:
+            self._fut = self.command("downvision 1")
+        self.mode = SEARCH
+        self.rc = HOVER
+        self.pad = None
+        self._next = now
+        self._seen = now
+        self._centered_since = None
+        print("[tello] Precision land ON")
+        return True
+
+    def stop(self, reason=None):
+        if self.mode == OFF:
+            return
+        if reason:
+            print(f"[tello] Precision land OFF ({reason})")
+        if self.command is not None and self.downvision:
+            self.command("downvision 0")
+        self.mode = OFF
+        self.rc = HOVER
+        self._fut = None
+
+    def status(self):
+        if self.mode == OFF:
+            return "OFF"
+        pad = self.pad
+        if pad is None:
+            return self.mode
+        return (f"{self.mode} dx={pad.center[0] - 0.5:+.2f} dy={pad.center[1] - 0.5:+.2f} "
+                f"side={pad.side:.2f}")
+
+    def _clamp(self, v):
+        lim = self.max_rc
+        return int(max(-lim, min(lim, round(v))))
+
+    def update(self, now, lr, fb, ud, yw):
+        if self.mode == OFF:
+            return lr, fb, ud, yw
+        if lr != 0 or fb != 0 or ud != 0 or yw != 0:
+            self.stop("перехват руками")
+            return lr, fb, ud, yw
+
+        fut = self._fut
+        if fut is not None:
+            if not fut.done():
+                return HOVER            # камера ещё переключается
+            self._fut = None
+            if fut.exception() is not None:
+                print(f"[tello] Precision land: downvision → {fut.exception()} (остаётся текущая камера)")
+            self._next = now
+
+        # rc пересчитывается с частотой кадров Tello, между — держится
+        if now < self._next:
+            return self.rc
+        self._next = max(self._next + self.period, now)
+
+        r = self.vision.result(self.plugin, now)
+        pad = r.data if r is not None else None
+        self.pad = pad
+        if pad is None:
+            self._centered_since = None
+            if now - self._seen > self.lost_timeout:
+                self.stop(f"площадки нет {self.lost_timeout:.0f} с")
+                return HOVER
+            if self.mode != DESCEND:
+                self.mode = SEARCH
+            self.rc = HOVER
+            return self.rc
+        self._seen = now
+
+        ex = pad.center[0] - 0.5
+        ey = pad.center[1] - 0.5
+        err = math.hypot(ex, ey)
+        if err <= self.center_tol:
+            if self._centered_since is None:
+                self._centered_since = now
+        else:
+            self._centered_since = None
+        settled = self._centered_since is not None and now - self._centered_since >= self.settle
+
+        down = 0
+        if self.mode in (SEARCH, ALIGN):
+            self.mode = ALIGN
+            if settled:
+                self.mode = DESCEND if self.descend_rc > 0 and pad.side < self.land_side else LAND
+        elif self.mode == DESCEND:
+            if pad.side >= self.land_side and err <= self.center_tol:
+                self.mode = LAND
+            elif err <= 2 * self.center_tol:
+                down = -self.descend_rc     # снижаемся, только пока площадка почти под нами
+
+        if self.mode == LAND:
+            self.rc = HOVER
+            return self.rc
+        self.rc = (self._clamp(self.sign_x * self.kp_xy * ex),
+                   self._clamp(-self.sign_y * self.kp_xy * ey),
+                   down,
+                   self._clamp(self.kp_yaw * pad.angle))
+        return self.rc
+
+
+def from_config(cfg):
+    return PrecisionLander(cfg.get("precision_land", {}), cfg.get("tello", {}))
@@ -0,0 +1,191 @@
+import glob
+import json
+import os
+import threading
+import time
+
+import serial
+
+from ppm_protocol import negotiate, PROTO_BIN, HANDSHAKE_TIMEOUT, HANDSHAKE_PASSIVE
+
+
+DEFAULT_PATTERNS = ["/dev/ttyUSB*", "/dev/ttyACM*", "/dev/serial/by-id/*"]
+STATE_FILE = ".serial_state.json"
+
+
+def candidate_ports(ports, patterns=(), last_good=None):
+    """
+    Порты из конфига + найденные по маскам, без дублей (по realpath).
+    Последний удачный порт — первым.
+    """
+    names = list(ports)
+    for pattern in patterns:
+        names.extend(sorted(glob.glob(pattern)))
+    if last_good:
+        names.insert(0, last_good)
+
+    seen = set()
+    result = []
+    for name in names:
+        key = port_key(name)
+        if key in seen:
+            continue
+        seen.add(key)
+        result.append(name)
+    return result
+
+
+def port_key(name):
+    """Один ключ на устройство: /dev/serial/by-id/... и /dev/ttyUSB0 совпадут."""
+    return os.path.realpath(name) if name.startswith("/") else name
+
+
+def present_ports(ports, patterns=()):
+    """Ключи кандидатов, которые сейчас есть в системе (имена не из /dev, вроде COM3, — всегда)."""
+    return {port_key(name) for name in candidate_ports(ports, patterns)
+            if not name.startswith("/") or os.path.exists(name)}
+
+
+def load_last_good(state_file=STATE_FILE):
+    """(port, identified) последнего удачного подключения или (None, False)."""
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        return state.get("port"), bool(state.get("identified"))
+    except (OSError, ValueError, AttributeError):
+        return None, False
+
+
+def save_last_good(port, protocol, identified, state_file=STATE_FILE):
+    try:
+        with open(state_file, "w", encoding="utf-8") as f:
+            json.dump({"port": port, "protocol": protocol, "identified": identified,
+                       "time": time.time()}, f)
+    except OSError as e:
+        print(f"[serial] cannot save {state_file}: {e}")
+
+
+def probe_port(port, baud, mode="auto", timeout=HANDSHAKE_TIMEOUT, passive=HANDSHAKE_PASSIVE):
+    """
+    Открыть порт и спросить скетч. Возвращает (ser, proto, identified)
+    или None, если порт не открылся. identified=True — ответил наш скетч.
+    passive=timeout — только ждать баннер, ничего в порт не писать.
+    """
+    try:
+        ser = serial.Serial(port, baud, timeout=0)
+    except Exception:
+        return None
+    reply = negotiate(ser, "auto", timeout, passive)
+    proto = reply if mode == "auto" else mode
+    return ser, proto, reply == PROTO_BIN
+
+
+class _Race:
+    """Общий результат параллельного опроса портов."""
+
+    def __init__(self, total):
+        self.cond = threading.Condition()
+        self.total = total
+        self.done = 0
+        self.found = {}         # port -> (ser, proto, identified)
+        self.winner = None      # первый опознанный порт
+        self.closed = False     # итог подведён — опоздавшие порты закрываются
+
+
+def _probe_worker(race, port, baud, mode, timeout, passive):
+    res = probe_port(port, baud, mode, timeout, passive)
+    with race.cond:
+        race.done += 1
+        if res is not None:
+            if race.closed:
+                res[0].close()
+            else:
+                race.found[port] = res
+                if res[2] and race.winner is None:
+                    race.winner = port
+        race.cond.notify_all()
+
+
+def discover_port(ports, baud, patterns=DEFAULT_PATTERNS, mode="auto",
+                  timeout=HANDSHAKE_TIMEOUT, state_file=STATE_FILE, verbose=True, skip=(),
+                  legacy=()):
+    """
+    Ищет Arduino со скетчем PPM.
+
+    1) последний удачный порт из state_file (если там отвечал наш скетч)
+       пробуем первым и отдельно — переподключение занимает одно рукопожатие
+    2) иначе все кандидаты опрашиваются параллельно (по потоку на порт),
+       побеждает первый, кто ответил "PPM BIN1"; зависший порт никого не держит
+    3) если никто не опознался (старая прошивка) — берём первый открывшийся
+       порт в порядке конфига, как раньше, протокол ASCII
+
+    skip — ключи port_key, которые не опрашивать (SerialLink: уже опрошенные
+    при прошлых поисках). legacy — ключи портов, где уже работала старая
+    прошивка (ASCII): их только слушаем (вдруг перепрошили — баннер при
+    старте), запрос не шлём; туда же — последний удачный порт, если он
+    не опознался. Возвращает (ser, port, proto) или (None, "OFF", None).
+    """
+    t0 = time.monotonic()
+    last_good, last_identified = load_last_good(state_file)
+    candidates = [p for p in candidate_ports(ports, patterns, last_good) if port_key(p) not in skip]
+    legacy = set(legacy)
+    if last_good and not last_identified:
+        legacy.add(port_key(last_good))
+
+    result = None
+    if last_good in candidates and last_identified:
+        res = probe_port(last_good, baud, mode, timeout)
+        if res is not None:
+            ser, proto, identified = res
+            if identified:
+                result = (ser, last_good, proto, True)
+            else:
+                ser.close()
+
+    if result is None and candidates:
+        result = _probe_all(candidates, baud, mode, timeout, legacy)
+
+    dt_ms = (time.monotonic() - t0) * 1000.0
+    if result is None:
+        if verbose:
+            print(f"[serial] discovery: nothing found in {dt_ms:.0f} ms ({len(candidates)} candidates)")
+        return None, "OFF", None
+
+    ser, port, proto, identified = result
+    print(f"[serial] discovery: {port} ({proto}) in {dt_ms:.0f} ms")
+    save_last_good(port, proto, identified, state_file)
+    return ser, port, proto
+
+
+def _probe_all(candidates, baud, mode, timeout, legacy=()):
+    race = _Race(len(candidates))
+    for port in candidates:
+        passive = timeout if port_key(port) in legacy else HANDSHAKE_PASSIVE
+        threading.Thread(
+            target=_probe_worker, args=(race, port, baud, mode, timeout, passive),
+            name=f"probe-{port}", daemon=True
+        ).start()
+
+    # ждём первого опознанного, но не дольше одного рукопожатия + запас на открытие
+    deadline = time.monotonic() + timeout + 1.0
+    with race.cond:
+        while race.winner is None and race.done < race.total:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            race.cond.wait(remaining)
+
+        race.closed = True
+        port = race.winner
+        if port is None:
+            # никто не опознался (старый скетч) — первый открывшийся по порядку
+            port = next((p for p in candidates if p in race.found), None)
+
+        for p, (ser, _, _) in race.found.items():
+            if p != port:
+                ser.close()
+
+    if port is None:
+        return None
+    ser, proto, identified = race.found[port]
+    return ser, port, proto, identified
@@ -0,0 +1,190 @@
+import threading
+import time
+
+import serial
+
+from ppm_protocol import PpmEncoder
+from serial_discovery import discover_port, port_key, present_ports
+
+
+STATE_CONNECTED = "connected"
+STATE_RECONNECTING = "reconnecting"     # связь была и пропала
+STATE_SEARCHING = "searching"           # порта не было с самого старта
+
+
+class SerialLink:
+    """
+    Serial-канал к Arduino с автоматическим переподключением.
+
+    - write(ch) вызывается потоком PpmSender; ошибка записи закрывает порт
+      и запускает фоновое восстановление, сами записи в это время
+      молча пропускаются — после восстановления уходит текущий снимок
+    - восстановление: сначала тот же путь без рукопожатия (протокол уже
+      известен, кадры BIN самосинхронизируются); между попытками
+      экспоненциальная пауза backoff_min..backoff_max
+    - если за same_path_grace сек тот же путь не появился (или порта не
+      было с самого старта) — ещё и discover_port, но только по НОВЫМ
+      портам: опрос открывает устройство (DTR сбрасывает Arduino) и пишет
+      в него, а это могут быть и чужие GPS / модемы. Уже опрошенные порты
+      не трогаем, пока они не пропадут из системы; сами поиски — не чаще
+      чем раз в rescan_min..rescan_max сек (экспоненциально)
+    - status() — для HUD: состояние, порт, последняя ошибка, простой в мс
+    """
+
+    def __init__(self, ser, port, encoder, baud, ports=(), patterns=(),
+                 mode="auto", handshake_timeout=2.5, state_file=None,
+                 backoff_min=0.02, backoff_max=0.2, same_path_grace=1.0,
+                 rescan_min=2.0, rescan_max=20.0):
+        self.baud = baud
+        self.ports = list(ports)
+        self.patterns = list(patterns)
+        self.mode = mode
+        self.handshake_timeout = handshake_timeout
+        self.state_file = state_file
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.same_path_grace = same_path_grace
+        self.rescan_min = rescan_min
+        self.rescan_max = rescan_max
+
+        self._lock = threading.Lock()
+        self._ser = ser
+        self.port = port if ser is not None else None
+        self.encoder = encoder or PpmEncoder()
+
+        self.state = STATE_CONNECTED if ser is not None else STATE_SEARCHING
+        self.last_error = None
+        self.write_errors = 0
+        self.reconnects = 0
+        self.last_outage_ms = None      # длительность последнего простоя
+        self._down_since = None if ser is not None else time.monotonic()
+
+        self._running = True
+        self._thread = None
+        if ser is None:
+            self._start_reconnect()
+
+    # --- запись ---
+
+    def write(self, ch):
+        ser = self._ser
+        if ser is None:
+            return False
+        try:
+            ser.write(self.encoder.encode(ch))
+            return True
+        except Exception as e:
+            self._fail(ser, e)
+            return False
+
+    def _fail(self, ser, error):
+        with self._lock:
+            if self._ser is not ser:
+                return      # уже обработали
+            self._ser = None
+            self.state = STATE_RECONNECTING
+            self.last_error = str(error)
+            self.write_errors += 1
+            self._down_since = time.monotonic()
+        print(f"[serial] link lost ({self.port}): {error}")
+        try:
+            ser.close()
+        except Exception:
+            pass
+        self._start_reconnect()
+
+    # --- восстановление ---
+
+    def _start_reconnect(self):
+        if not self._running or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(target=self._reconnect_loop, name="serial-reconnect", daemon=True)
+        self._thread.start()
+
+    def _reconnect_loop(self):
+        delay = self.backoff_min
+        scan_delay = self.rescan_min
+        next_scan = time.monotonic() + (self.same_path_grace if self.port is not None else 0.0)
+        probed = set()
+        while self._running:
+            res = self._reopen_same() if self.port is not None else None
+            if res is None and time.monotonic() >= next_scan:
+                res = self._scan_new(probed)
+                next_scan = time.monotonic() + scan_delay
+                scan_delay = min(scan_delay * 2, self.rescan_max)
+
+            if res is not None:
+                self._install(*res)
+                return
+
+            time.sleep(delay)
+            delay = min(delay * 2, self.backoff_max)
+
+    def _scan_new(self, probed):
+        """discover_port только по портам, которых нет в probed; probed пополняется."""
+        present = present_ports(self.ports, self.patterns)
+        probed.intersection_update(present)     # пропавшие забываем: вернутся — опросим снова
+        if not present - probed:
+            return None
+        # наш порт со старой прошивкой: при поиске только слушаем, запрос не шлём
+        legacy = {port_key(self.port)} if self.port and not self.encoder.is_binary() else ()
+        ser, port, proto = discover_port(
+            self.ports, self.baud, self.patterns, self.mode,
+            self.handshake_timeout, self.state_file, verbose=False, skip=probed, legacy=legacy
+        )
+        probed.update(present)
+        return (ser, port, proto) if ser is not None else None
+
+    def _reopen_same(self):
+        try:
+            ser = serial.Serial(self.port, self.baud, timeout=0)
+        except Exception as e:
+            self.last_error = str(e)
+            return None
+        return ser, self.port, self.encoder.protocol
+
+    def _install(self, ser, port, proto):
+        with self._lock:
+            if not self._running:
+                ser.close()
+                return
+            if proto != self.encoder.protocol:
+                self.encoder = PpmEncoder(proto)
+            self.port = port
+            self._ser = ser
+            if self._down_since is not None:
+                self.last_outage_ms = (time.monotonic() - self._down_since) * 1000.0
+            self._down_since = None
+            was = self.state
+            self.state = STATE_CONNECTED
+            if was == STATE_RECONNECTING:
+                self.reconnects += 1
+        if was == STATE_RECONNECTING:
+            print(f"[serial] link restored: {port} ({proto}) after {self.last_outage_ms:.0f} ms")
+        else:
+            print(f"[serial] connected: {port} ({proto})")
+
+    # --- состояние ---
+
+    def is_connected(self):
+        return self.state == STATE_CONNECTED
+
+    def status(self):
+        down = self._down_since
+        return {
+            "state": self.state,
+            "port": self.port or "OFF",
+            "protocol": self.encoder.protocol,
+            "last_error": self.last_error,
+            "downtime_ms": (time.monotonic() - down) * 1000.0 if down is not None else 0.0,
+            "last_outage_ms": self.last_outage_ms,
+            "reconnects": self.reconnects,
+        }
+
+    def close(self):
+        self._running = False
+        with self._lock:
+            ser = self._ser
+            self._ser = None
+        if ser is not None:
+            ser.close()
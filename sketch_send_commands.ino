@@ -14,8 +14,17 @@
 #define MID_US 1500
 #define MAX_US 2000
 
+// Бинарный кадр: A5 | seq | 8 × uint16 LE | crc8 (DVB-S2, по seq + каналам)
+#define BIN_SYNC             0xA5
+#define BIN_FRAME_SIZE       (2 + CHANNEL_NUMBER * 2 + 1)
+
 volatile uint16_t ppm[CHANNEL_NUMBER];
 
+uint8_t  lastSeq = 0;
+bool     haveSeq = false;        // был ли уже хоть один целый кадр
+uint16_t crcErrors = 0;
+uint16_t lostFrames = 0;
+
 void setup() {
   // старт: центр
   for (uint8_t i=0; i<CHANNEL_NUMBER; i++) ppm[i] = MID_US;
@@ -25,6 +34,7 @@ void setup() {
 
   // UART
   Serial.begin(115200);
+  Serial.println("PPM BIN1");   // объявляем поддержку бинарного протокола
 
   // Timer1 на PPM
   cli();
@@ -67,17 +77,69 @@ ISR(TIMER1_COMPA_vect) {
   }
 }
 
+uint8_t crc8(const uint8_t* data, uint8_t len) {
+  uint8_t crc = 0;
+  while (len--) {
+    crc ^= *data++;
+    for (uint8_t b=0; b<8; b++) crc = (crc & 0x80) ? (uint8_t)((crc << 1) ^ 0xD5) : (uint8_t)(crc << 1);
+  }
+  return crc;
+}
+
+void apply_channels(const uint16_t* v) {
+  // ISR читает ppm[] побайтно — меняем все каналы разом
+  noInterrupts();
+  for (uint8_t i=0; i<CHANNEL_NUMBER; i++) ppm[i] = v[i];
+  interrupts();
+}
+
+uint16_t clamp_us(int32_t v) {
+  if (v < MIN_US) return MIN_US;
+  if (v > MAX_US) return MAX_US;
+  return (uint16_t)v;
+}
+
 void loop() {
-  // читаем строки вида: "1500,1500,1000,2000,1500,1500,1500,1500\n"
+  // ASCII: строки вида "1500,1500,1000,2000,1500,1500,1500,1500\n"
+  //        строка с полем "?" ("1500,...,1500,?" или просто "?") — запрос
+  //        протокола, отвечаем "PPM BIN1"; каналы такой строки применяются
+  //        как обычно (хост шлёт в запросе нейтральный кадр)
+  // BIN:   кадр начинается с BIN_SYNC (в ASCII такого байта не бывает).
+  //        После первого валидного кадра ASCII-парсер выключается,
+  //        чтобы мусор при рассинхронизации не попал в каналы.
   static char buf[96];
   static uint8_t n = 0;
+  static uint8_t bin[BIN_FRAME_SIZE];
+  static uint8_t binLen = 0;
+  static bool binMode = false;
 
   while (Serial.available()) {
-    char c = Serial.read();
+    uint8_t c = Serial.read();
+
+    if (binLen > 0 || (n == 0 && c == BIN_SYNC)) {
+      bin[binLen++] = c;
+      if (binLen == BIN_FRAME_SIZE) {
+        if (parse_bin(bin)) {
+          binLen = 0;
+          binMode = true;
+        } else {
+          binLen = resync(bin);
+        }
+      }
+      continue;
+    }
+
+    if (binMode) {
+      // ищем следующий SYNC; на "?" всё так же отвечаем (повторный handshake)
+      if (c == '?') Serial.println("PPM BIN1");
+      continue;
+    }
+
     if (c == '\r') continue;
     if (c == '\n') {
       buf[n] = 0;
-      parse_line(buf);
+      if (strchr(buf, '?')) Serial.println("PPM BIN1");
+      if (buf[0] != '?') parse_line(buf);
       n = 0;
     } else {
       if (n < sizeof(buf)-1) buf[n++] = c;
@@ -85,16 +147,48 @@ void loop() {
   }
 }
 
+// Битый кадр: сдвигаем буфер к следующему SYNC внутри него,
+// возвращаем, сколько байт осталось.
+uint8_t resync(uint8_t* f) {
+  for (uint8_t k=1; k<BIN_FRAME_SIZE; k++) {
+    if (f[k] == BIN_SYNC) {
+      memmove(f, f + k, BIN_FRAME_SIZE - k);
+      return BIN_FRAME_SIZE - k;
+    }
+  }
+  return 0;
+}
+
+bool parse_bin(const uint8_t* f) {
+  if (crc8(f + 1, BIN_FRAME_SIZE - 2) != f[BIN_FRAME_SIZE - 1]) {
+    // битый кадр не применяем — остаются предыдущие значения
+    crcErrors++;
+    return false;
+  }
+
+  uint8_t seq = f[1];
+  // потери считаем только от первого целого кадра: seq отправителя не обязан начинаться с 1
+  if (haveSeq) lostFrames += (uint8_t)(seq - lastSeq - 1);
+  haveSeq = true;
+  lastSeq = seq;
+
+  uint16_t v[CHANNEL_NUMBER];
+  for (uint8_t i=0; i<CHANNEL_NUMBER; i++) {
+    v[i] = clamp_us((int32_t)f[2 + i*2] | ((int32_t)f[3 + i*2] << 8));
+  }
+  apply_channels(v);
+  return true;
+}
+
 void parse_line(char* s) {
+  uint16_t v[CHANNEL_NUMBER];
   for (uint8_t i=0; i<CHANNEL_NUMBER; i++) {
     // atoi безопасно обрабатывает нечисла как 0
-    int v = atoi(s);
-    if (v < MIN_US) v = MIN_US;
-    if (v > MAX_US) v = MAX_US;
-    ppm[i] = (uint16_t)v;
+    v[i] = clamp_us(atoi(s));
 
     // пропускаем до следующей запятой
     while (*s && *s != ',') s++;
     if (*s == ',') s++;
   }
+  apply_channels(v);
 }
@@ -0,0 +1,237 @@
+import queue
+import socket
+import threading
+import time
+from concurrent.futures import Future
+
+
+TELLO_HOST = "192.168.10.1"
+TELLO_CMD_PORT = 8889
+
+
+class TelloError(Exception):
+    """Tello ответил ошибкой или не ответил за отведённое время."""
+
+
+def report(fut, what):
+    """Напечатать ошибку команды, когда она завершится (без ожидания)."""
+    def done(f):
+        try:
+            f.result()
+        except Exception as e:
+            print(f"[tello] {what} error: {e}")
+    fut.add_done_callback(done)
+    return fut
+
+
+class TelloClient:
+    """
+    Неблокирующий клиент Tello SDK (текстовый протокол по UDP).
+
+    - RC-канал "fire-and-forget": send_rc() только запоминает последние
+      значения, поток отправляет их не чаще rc_hz; одинаковые команды
+      подряд не дублируются (раз в rc_keepalive сек всё же повторяем)
+    - stop_rc() — одна нулевая RC сразу (раньше команд, поставленных
+      следом, например land), затем RC не шлём совсем, до send_rc()
+    - команды с ответом (command, land, throwfly, battery? ...) уходят
+      по одной и возвращают concurrent.futures.Future с таймаутом;
+      из asyncio их можно ждать через asyncio.wrap_future()
+    - основной цикл ни на чём не ждёт: ни один вызов не блокирует PPM/UI
+    """
+
+    def __init__(self, host=TELLO_HOST, port=TELLO_CMD_PORT, local_port=0,
+                 rc_hz=20, command_timeout=7.0, rc_keepalive=1.0):
+        self.address = (host, port)
+        self.local_port = local_port
+        self.rc_period = 1.0 / max(rc_hz, 1)
+        self.command_timeout = command_timeout
+        self.rc_keepalive = rc_keepalive
+
+        self._sock = None
+        self._running = False
+        self._threads = []
+        self._wake = threading.Event()
+
+        self._rc = None                 # последняя запрошенная RC-команда
+        self._rc_sent = None            # последняя отправленная
+        self._rc_stop = False           # отправить _rc и замолчать (stop_rc)
+        self._rc_sent_time = 0.0
+        self._next_rc = 0.0
+
+        self._commands = queue.Queue()
+        self._pending = None            # (cmd, future, deadline)
+        self._lock = threading.Lock()
+
+        self.rc_sent = 0                # счётчики для HUD/отладки
+        self.rc_coalesced = 0
+        self.last_error = None
+
+    # --- жизненный цикл ---
+
+    def start(self):
+        if self._running:
+            return
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind(("", self.local_port))
+        self._sock.settimeout(0.5)
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._send_loop, name="tello-send", daemon=True),
+            threading.Thread(target=self._recv_loop, name="tello-recv", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout=1.0)
+        self._threads = []
+        self._fail_all(TelloError("client stopped"))
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    # --- RC ---
+
+    def send_rc(self, lr, fb, ud, yw):
+        self._rc_stop = False
+        self._rc = (int(lr), int(fb), int(ud), int(yw))
+
+    def stop_rc(self):
+        self._rc = (0, 0, 0, 0)
+        self._rc_stop = True
+        self._wake.set()
+
+    # --- команды с ответом ---
+
+    def command(self, cmd, timeout=None):
+        fut = Future()
+        if not self._running:
+            fut.set_exception(TelloError("client not started"))
+            return fut
+        self._commands.put((cmd, fut, timeout or self.command_timeout))
+        self._wake.set()
+        return fut
+
+    def connect(self, timeout=None):
+        return self.command("command", timeout)
+
+    def land(self):
+        return self.command("land")
+
+    def takeoff(self):
+        return self.command("takeoff")
+
+    def throw_takeoff(self):
+        return self.command("throwfly")
+
+    def battery(self):
+        return self.command("battery?")
+
+    def streamon(self):
+        return self.command("streamon")
+
+    def streamoff(self):
+        return self.command("streamoff")
+
+    # --- потоки ---
+
+    def _send_loop(self):
+        while self._running:
+            now = time.monotonic()
+
+            # RC — до команд: стоп из stop_rc() уходит раньше land, поставленного следом
+            if self._rc_stop or now >= self._next_rc:
+                self._next_rc = now + self.rc_period
+                self._send_rc_now(now)
+
+            with self._lock:
+                pending = self._pending
+                if pending is not None and now >= pending[2]:
+                    self._pending = None
+                    self._resolve(pending[1], error=f"timeout: {pending[0]}")
+                    pending = None
+
+                if pending is None and not self._commands.empty():
+                    cmd, fut, timeout = self._commands.get_nowait()
+                    if fut.set_running_or_notify_cancel():
+                        self._pending = (cmd, fut, now + timeout)
+                        self._transmit(cmd)
+
+            wait = self._next_rc - time.monotonic()
+            pending = self._pending
+            if pending is not None:
+                wait = min(wait, pending[2] - time.monotonic())
+            self._wake.wait(timeout=max(wait, 0.0))
+            self._wake.clear()
+
+    def _send_rc_now(self, now):
+        rc = self._rc
+        if rc is None:
+            return
+        stop = self._rc_stop
+        if not stop and rc == self._rc_sent and now - self._rc_sent_time < self.rc_keepalive:
+            self.rc_coalesced += 1
+            return
+        if self._transmit("rc %d %d %d %d" % rc):
+            self._rc_sent = rc
+            self._rc_sent_time = now
+            self.rc_sent += 1
+            if stop and self._rc is rc:
+                # стоп ушёл — keepalive больше не нужен (новый send_rc() заменит _rc)
+                self._rc = None
+                self._rc_stop = False
+
+    def _recv_loop(self):
+        while self._running:
+            try:
+                data, _ = self._sock.recvfrom(1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            reply = data.decode("utf-8", errors="replace").strip()
+            with self._lock:
+                pending = self._pending
+                self._pending = None
+            if pending is None:
+                continue    # запоздалый ответ на команду, которую уже списали по таймауту
+
+            if reply.lower().startswith("error"):
+                self._resolve(pending[1], error=f"{pending[0]}: {reply}")
+            else:
+                self._resolve(pending[1], result=reply)
+            self._wake.set()
+
+    # --- вспомогательное ---
+
+    def _transmit(self, text):
+        try:
+            self._sock.sendto(text.encode("utf-8"), self.address)
+            return True
+        except OSError as e:
+            self.last_error = str(e)
+            return False
+
+    def _resolve(self, fut, result=None, error=None):
+        if fut.done():
+            return
+        if error is not None:
+            self.last_error = error
+            fut.set_exception(TelloError(error))
+        else:
+            fut.set_result(result)
+
+    def _fail_all(self, exc):
+        with self._lock:
+            pending = self._pending
+            self._pending = None
+        if pending is not None and not pending[1].done():
+            pending[1].set_exception(exc)
+        while not self._commands.empty():
+            _, fut, _ = self._commands.get_nowait()
+            if not fut.done():
+                fut.set_exception(exc)
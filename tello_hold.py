@@ -0,0 +1,102 @@
+import math
+
+from tello_state import YAW, H, X, Y, VX, VY, VGZ
+
+
+# ==== удержание положения и курса Tello по телеметрии ====
+#
+# Цель — положение (x, y, h, курс) и скорость, с которой она движется
+# (прямая подача). Ошибка по каждой оси — в PID, результат — скорость
+# в осях старта, она переводится в оси дрона по текущему курсу и в rc.
+# Параметры — секция "tello_hold" config.json:
+#   kp/ki/kd_xy — положение (rc на см ошибки), kp/ki/kd_z — высота,
+#   kp/ki_yaw — курс (rc на градус), max_rc — предел итогового rc,
+#   i_limit_xy/z/yaw — предел интеграла (см·с / °·с), stale — телеметрия
+#   старше stale сек считается потерянной (миссии летят без обратной
+#   связи, как раньше), enabled=false — всегда без обратной связи.
+
+
+def wrap180(deg):
+    return (deg + 180.0) % 360.0 - 180.0
+
+
+class Pid:
+    """PID по одной оси; производная — разность скоростей цели и дрона (без рывка по ошибке)."""
+
+    __slots__ = ("kp", "ki", "kd", "i_limit", "integral")
+
+    def __init__(self, kp, ki=0.0, kd=0.0, i_limit=100.0):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.i_limit = i_limit
+        self.integral = 0.0
+
+    def reset(self):
+        self.integral = 0.0
+
+    def update(self, err, derr, dt):
+        self.integral = max(-self.i_limit, min(self.i_limit, self.integral + err * dt))
+        return self.kp * err + self.ki * self.integral + self.kd * derr
+
+
+class PoseHold:
+    """
+    Замкнутый контур по телеметрии (TelloState) для миссий и режима hold.
+
+    update(now, target, vel, state) → (lr, fb, ud, yw):
+      target — (x, y, h, курс) в осях старта телеметрии (см, °)
+      vel    — скорость цели (см/с, °/с) — прямая подача
+      state  — строка TelloState.latest()
+    reset() — при смене цели скачком (старт миссии, после команды SDK).
+    """
+
+    def __init__(self, hold_cfg=None, tello_cfg=None):
+        hold_cfg = hold_cfg or {}
+        tello_cfg = tello_cfg or {}
+        self.cm_per_rc = tello_cfg.get("cm_s_per_rc", 1.0)
+        self.deg_per_rc = tello_cfg.get("deg_s_per_rc", 1.0)
+        self.max_rc = hold_cfg.get("max_rc", 40)
+        self.stale = hold_cfg.get("stale", 0.5)
+        self.enabled = hold_cfg.get("enabled", True)
+
+        def pid(axis, kp, ki, kd, i_limit):
+            return Pid(hold_cfg.get(f"kp_{axis}", kp), hold_cfg.get(f"ki_{axis}", ki),
+                       hold_cfg.get(f"kd_{axis}", kd), hold_cfg.get(f"i_limit_{axis}", i_limit))
+
+        self.pid_x = pid("xy", 0.8, 0.1, 0.3, 100.0)
+        self.pid_y = pid("xy", 0.8, 0.1, 0.3, 100.0)
+        self.pid_z = pid("z", 1.0, 0.1, 0.2, 50.0)
+        self.pid_yaw = pid("yaw", 1.5, 0.0, 0.0, 30.0)
+        self._last = None
+
+    def reset(self):
+        for p in (self.pid_x, self.pid_y, self.pid_z, self.pid_yaw):
+            p.reset()
+        self._last = None
+
+    def usable(self, state, now):
+        """Есть ли свежая телеметрия для замкнутого контура."""
+        return self.enabled and state is not None and state.age(now) <= self.stale
+
+    def update(self, now, target, vel, state):
+        dt = 0.0 if self._last is None else min(now - self._last, 0.25)
+        self._last = now
+
+        tx, ty, th, tyaw = target
+        vx, vy, vz, vyaw = vel
+        ux = vx + self.pid_x.update(tx - state[X], vx - state[VX], dt)
+        uy = vy + self.pid_y.update(ty - state[Y], vy - state[VY], dt)
+        uz = vz + self.pid_z.update(th - state[H], vz - state[VGZ], dt)
+        uyaw = vyaw + self.pid_yaw.update(wrap180(tyaw - state[YAW]), 0.0, dt)   # скорости курса нет
+
+        # оси старта → оси дрона по текущему курсу
+        a = math.radians(state[YAW])
+        c, s = math.cos(a), math.sin(a)
+        lim = self.max_rc
+        k = 1.0 / self.cm_per_rc
+        fb = (ux * c + uy * s) * k
+        lr = (-ux * s + uy * c) * k
+        return (int(max(-lim, min(lim, round(lr)))), int(max(-lim, min(lim, round(fb)))),
+                int(max(-lim, min(lim, round(uz * k)))),
+                int(max(-lim, min(lim, round(uyaw / self.deg_per_rc)))))
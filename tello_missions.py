@@ -0,0 +1,445 @@
+import argparse
+import math
+import time
+
+import numpy as np
+
+from tello_hold import PoseHold
+from tello_state import FIELDS, YAW, H, X, Y
+
+
+# ==== миссии Tello: заранее посчитанные сегменты RC ====
+#
+# Описание в config.json, секция "tello_missions":
+#   "box": {
+#     "key": "u", "loop": false, "speed": 30,
+#     "segments": [
+#       {"rc": [0, 30, 0, 0], "t": 2.0},      — rc lr fb ud yw в течение t сек
+#       {"goto": [100, 50, 0]},               — к точке, см от старта: x вперёд, y вправо, z вверх
+#       {"hover": 1.0},                       — висеть на месте
+#       {"cmd": "cw 90", "t": 3.0}            — команда SDK; ждём ответ (без дрона — t сек)
+#     ]
+#   }
+# Вместо segments — "waypoints": [[x, y], [x, y, z], ...] (ломаная от
+# точки старта) и "hover" — пауза в каждой точке. Оси точек — по курсу
+# на момент старта; повороты (rc yw, cw/ccw) и перемещения командами
+# (forward 50 ...) учитываются при расчёте, так что следующие goto
+# остаются в тех же осях. Перевод rc → см/с и °/с — tello.cm_s_per_rc
+# и tello.deg_s_per_rc (1.0 — как в tello_sim.py).
+#
+# Прочие поля: loop — по кругу, пока не выключат; speed — rc для goto
+# (по умолчанию tello.auto_speed); key — клавиша запуска/остановки.
+#
+# Встроенные миссии pendulum (M) и square (N) строятся из прежних
+# параметров секции tello, hold — зависание на месте; одноимённые в
+# tello_missions их заменяют.
+#
+# С телеметрией (tello_state.TelloState) миссия летит по замкнутому
+# контуру: для каждого сегмента заранее известны положение в начале и
+# скорость, tello_hold.PoseHold ведёт дрон к расчётной точке. Без
+# телеметрии (симуляция, устаревшие пакеты) — прежний rc по таймеру.
+
+MOVES = {           # команда SDK → (вперёд, вправо, вверх) на 1 см
+    "forward": (1, 0, 0), "back": (-1, 0, 0),
+    "right": (0, 1, 0), "left": (0, -1, 0),
+    "up": (0, 0, 1), "down": (0, 0, -1),
+}
+HOVER = (0, 0, 0, 0)
+
+
+class Mission:
+    """
+    Скомпилированная миссия: концы сегментов (сек от старта), rc, команды,
+    положение (x, y, z, курс) в начале сегмента и скорость в осях старта.
+    """
+
+    __slots__ = ("name", "loop", "key", "ends", "rc", "cmds", "poses", "vels", "end_pose", "duration")
+
+    def __init__(self, name, spec, tello_cfg):
+        self.name = name
+        self.loop = bool(spec.get("loop", False))
+        self.key = spec.get("key")
+        ends, rc, cmds, poses, vels = [], [], [], [], []
+        for dur, r, cmd, pose, vel in _segments(name, spec, tello_cfg):
+            ends.append((ends[-1] if ends else 0.0) + dur)
+            rc.append(r)
+            cmds.append(cmd)
+            poses.append(pose)
+            vels.append(vel)
+        if not ends:
+            raise ValueError(f"mission {name}: no segments")
+        self.ends = tuple(ends)
+        self.rc = tuple(rc)
+        self.cmds = tuple(cmds)
+        self.poses = tuple(poses)
+        self.vels = tuple(vels)
+        self.duration = ends[-1]
+        last = ends[-1] - (ends[-2] if len(ends) > 1 else 0.0)
+        self.end_pose = (_after_cmd(poses[-1], cmds[-1]) if cmds[-1] is not None
+                         else _advance(poses[-1], vels[-1], last))
+
+
+def _advance(pose, vel, dt):
+    return tuple(p + v * dt for p, v in zip(pose, vel))
+
+
+def _after_cmd(pose, cmd):
+    """Положение после команды SDK (повороты и перемещения; прочие — на месте)."""
+    x, y, z, heading = pose
+    parts = cmd.split()
+    if len(parts) == 2 and parts[0] in ("cw", "ccw"):
+        heading += float(parts[1]) * (1 if parts[0] == "cw" else -1)
+    elif len(parts) == 2 and parts[0] in MOVES:
+        a = math.radians(heading)
+        f, r, u = (c * float(parts[1]) for c in MOVES[parts[0]])
+        x += f * math.cos(a) - r * math.sin(a)
+        y += f * math.sin(a) + r * math.cos(a)
+        z += u
+    return x, y, z, heading
+
+
+def _segments(name, spec, tello_cfg):
+    """
+    Описание миссии → (длительность, rc, команда, положение в начале, скорость);
+    положение и курс — счислением.
+    """
+    cm_per_rc = tello_cfg.get("cm_s_per_rc", 1.0)
+    deg_per_rc = tello_cfg.get("deg_s_per_rc", 1.0)
+    speed = spec.get("speed", tello_cfg.get("auto_speed", 30))
+
+    segments = spec.get("segments")
+    if segments is None:
+        hover = spec.get("hover", 0.0)
+        segments = []
+        for p in spec.get("waypoints", []):
+            segments.append({"goto": p})
+            if hover > 0:
+                segments.append({"hover": hover})
+
+    pose = (0.0, 0.0, 0.0, 0.0)
+    for seg in segments:
+        x, y, z, heading = pose
+        a = math.radians(heading)
+        if "rc" in seg:
+            lr, fb, ud, yw = (max(-100, min(100, int(v))) for v in seg["rc"])
+            dur = float(seg["t"])
+            vel = ((fb * math.cos(a) - lr * math.sin(a)) * cm_per_rc,
+                   (fb * math.sin(a) + lr * math.cos(a)) * cm_per_rc,
+                   ud * cm_per_rc, yw * deg_per_rc)
+            yield dur, (lr, fb, ud, yw), None, pose, vel
+            pose = _advance(pose, vel, dur)
+        elif "hover" in seg:
+            yield float(seg["hover"]), HOVER, None, pose, HOVER
+        elif "goto" in seg:
+            target = [float(v) for v in seg["goto"]] + [z] * (3 - len(seg["goto"]))
+            dx, dy, dz = target[0] - x, target[1] - y, target[2] - z
+            dist = math.sqrt(dx * dx + dy * dy + dz * dz)
+            if dist < 1.0:
+                continue
+            # rc в пределах ±100: ограничиваем саму скорость, чтобы dur и vel остались честными
+            sp = max(1.0, min(100.0, float(seg.get("speed", speed))))
+            k = sp / dist
+            fb = dx * math.cos(a) + dy * math.sin(a)
+            lr = -dx * math.sin(a) + dy * math.cos(a)
+            dur = dist / (sp * cm_per_rc)
+            vel = (dx / dur, dy / dur, dz / dur, 0.0)
+            rc = tuple(max(-100, min(100, int(round(v * k)))) for v in (lr, fb, dz))
+            yield dur, rc + (0,), None, pose, vel
+            pose = (target[0], target[1], target[2], heading)
+        elif "cmd" in seg:
+            cmd = str(seg["cmd"])
+            yield float(seg.get("t", 1.0)), HOVER, cmd, pose, HOVER
+            pose = _after_cmd(pose, cmd)
+        else:
+            raise ValueError(f"mission {name}: bad segment {seg!r}")
+
+
+def legacy_missions(tello_cfg):
+    """Прежние режимы M (маятник) и N (квадрат) — из параметров секции tello; плюс hold."""
+    a = tello_cfg.get("auto_speed", 30)
+    interval = tello_cfg.get("auto_interval", 2.0)
+    s = tello_cfg.get("square_speed", 20)
+    step = tello_cfg.get("square_step_time", 2.0)
+    return {
+        "pendulum": {
+            "loop": True,
+            "segments": [{"rc": [a, 0, 0, 0], "t": interval}, {"rc": [-a, 0, 0, 0], "t": interval}],
+        },
+        # стороны квадрата: вперёд, вправо, назад, влево
+        "square": {
+            "segments": [{"rc": [lr, fb, 0, 0], "t": step}
+                         for lr, fb in ((0, s), (s, 0), (0, -s), (-s, 0))],
+        },
+        # держать точку и курс, где включили (имеет смысл с телеметрией)
+        "hold": {"loop": True, "segments": [{"hover": 1.0}]},
+    }
+
+
+class MissionPlanner:
+    """
+    Миссии Tello по таймеру (замена прежних режимов M/N):
+    - toggle(name): запуск / остановка; одновременно идёт одна миссия
+    - pause(): пауза (зависание, время миссии стоит) / продолжение;
+      на паузе ручные стики работают, миссия не сбрасывается; с
+      телеметрией без стиков дрон держит точку, после продолжения
+      миссия идёт от того места, где он оказался
+    - любой ручной ввод во время миссии выключает её ("перехват руками")
+    - сегменты посчитаны заранее, такт только двигает курсор; RC уходит
+      обычным путём TelloOutput → TelloClient (не чаще tello.fps),
+      команды cmd — через TelloClient.command() (Future, без ожидания)
+    command — функция cmd → Future (TelloOutput.command) или None без дрона.
+    state   — TelloState или None: есть свежая телеметрия на старте —
+    миссия летит по замкнутому контуру (PoseHold), иначе по таймеру.
+    """
+
+    def __init__(self, specs=None, tello_cfg=None, command=None, state=None, hold_cfg=None):
+        tello_cfg = tello_cfg or {}
+        self.manual_speed = tello_cfg.get("manual_speed", 40)
+        self.command = command
+        self.state = state
+        self.hold = PoseHold(hold_cfg, tello_cfg)
+        self.missions = {name: Mission(name, spec, tello_cfg) for name, spec in (specs or {}).items()}
+
+        self.active = None
+        self.paused = False
+        self._t0 = 0.0
+        self._paused_at = 0.0
+        self._seg = 0
+        self._fut = None
+        self._row = np.zeros(len(FIELDS))   # последняя телеметрия, без выделения на такт
+        self._origin = None                 # начало осей миссии в осях телеметрии (x, y, h, курс)
+        self._hold_at = None                # точка удержания на паузе
+
+    def names(self):
+        return list(self.missions)
+
+    def closed_loop(self):
+        return self.active is not None and self._origin is not None
+
+    def toggle(self, name, now):
+        if self.active is not None and self.active.name == name:
+            print(f"[tello] Mission {name} OFF")
+            self.stop()
+        else:
+            self.start(name, now)
+
+    def start(self, name, now):
+        m = self.missions.get(name)
+        if m is None:
+            print(f"[tello] unknown mission: {name}")
+            return
+        self.stop()
+        self.active = m
+        self._t0 = now
+        self._seg = 0
+        row = self._telemetry(now)
+        if row is not None:
+            self._anchor(m.poses[0], row)
+            self.hold.reset()
+        self._begin(0)
+        print(f"[tello] Mission {name} START" + (" (telemetry)" if row is not None else ""))
+
+    def stop(self):
+        self.active = None
+        self.paused = False
+        self._fut = None
+        self._origin = None
+        self._hold_at = None
+
+    def pause(self, now):
+        m = self.active
+        if m is None:
+            return
+        self.paused = not self.paused
+        if self.paused:
+            self._paused_at = now
+            self._hold_at = None
+            print(f"[tello] Mission {m.name} PAUSED")
+            return
+        self._t0 += now - self._paused_at     # время на паузе не считается
+        row = self._telemetry(now)
+        if self._origin is not None and self._fut is None and row is not None:
+            # продолжаем от текущего положения, а не возвращаемся к расчётному
+            self._anchor(self._plan(m, self._seg, now - self._t0)[0], row)
+            self.hold.reset()
+        print(f"[tello] Mission {m.name} RESUMED")
+
+    def status(self):
+        m = self.active
+        if m is None:
+            return "OFF"
+        text = f"{m.name} {self._seg + 1}/{len(m.ends)}"
+        if self._origin is not None:
+            text += " PID"
+        return text + " PAUSED" if self.paused else text
+
+    def _begin(self, i):
+        cmd = self.active.cmds[i]
+        if cmd is not None and self.command is not None:
+            self._fut = self.command(cmd)
+
+    # --- замкнутый контур ---
+
+    def _telemetry(self, now):
+        """Свежая телеметрия (в self._row) или None."""
+        if not self.hold.usable(self.state, now):
+            return None
+        return self.state.latest(self._row)
+
+    @staticmethod
+    def _plan(m, i, t):
+        """Расчётные положение и скорость в осях миссии на время t (сегмент i)."""
+        dt = t - (m.ends[i - 1] if i else 0.0)
+        return _advance(m.poses[i], m.vels[i], dt), m.vels[i]
+
+    def _anchor(self, pose, row):
+        """Оси миссии — так, чтобы точка pose совпала с текущим положением дрона."""
+        x, y, z, heading = pose
+        oyaw = row[YAW] - heading
+        a = math.radians(oyaw)
+        c, s = math.cos(a), math.sin(a)
+        self._origin = (row[X] - (x * c - y * s), row[Y] - (x * s + y * c), row[H] - z, oyaw)
+
+    def _to_world(self, pose, vel):
+        ox, oy, oz, oyaw = self._origin
+        a = math.radians(oyaw)
+        c, s = math.cos(a), math.sin(a)
+        x, y, z, heading = pose
+        vx, vy, vz, vyaw = vel
+        return ((ox + x * c - y * s, oy + x * s + y * c, oz + z, oyaw + heading),
+                (vx * c - vy * s, vx * s + vy * c, vz, vyaw))
+
+    def update(self, now, lr, fb, ud, yw):
+        """Ручные скорости → итоговые (lr, fb, ud, yw)."""
+        m = self.active
+        if m is None:
+            return lr, fb, ud, yw
+        manual = lr != 0 or fb != 0 or ud != 0 or yw != 0
+
+        if self.paused:
+            row = None if manual else self._telemetry(now)
+            if row is None:
+                self._hold_at = None
+                return lr, fb, ud, yw
+            if self._hold_at is None:
+                self._hold_at = (row[X], row[Y], row[H], row[YAW])
+                self.hold.reset()
+            return self.hold.update(now, self._hold_at, HOVER, row)
+
+        if manual:
+            print(f"[tello] Mission {m.name} OFF (перехват руками)")
+            self.stop()
+            return lr, fb, ud, yw
+
+        t = now - self._t0
+        i = self._seg
+        fut = self._fut
+        if fut is not None:
+            if not fut.done():
+                return HOVER            # команда ещё выполняется — ждём, сколько бы ни заняла
+            self._fut = None
+            if fut.exception() is not None:
+                print(f"[tello] Mission {m.name} ABORT: {m.cmds[i]} → {fut.exception()}")
+                self.stop()
+                return HOVER
+            # следующий сегмент — от момента ответа, а не от расчётного
+            self._t0 += t - m.ends[i]
+            t = m.ends[i]
+            self.hold.reset()
+
+        ends = m.ends
+        while t >= ends[i]:
+            i += 1
+            if i == len(ends):
+                if not m.loop:
+                    print(f"[tello] Mission {m.name} DONE")
+                    self.stop()
+                    return HOVER
+                self._t0 += m.duration
+                t -= m.duration
+                i = 0
+                if self._origin is not None:
+                    # следующий круг — от расчётного конца предыдущего
+                    self._origin = self._to_world(m.end_pose, HOVER)[0]
+            self._seg = i
+            self._begin(i)
+            if self._fut is not None:
+                return HOVER
+
+        row = None if self._origin is None else self._telemetry(now)
+        if row is None:
+            return m.rc[i]
+        target, vel = self._to_world(*self._plan(m, i, t))
+        return self.hold.update(now, target, vel, row)
+
+
+def from_config(cfg, command=None, state=None):
+    """Встроенные pendulum/square/hold + секция tello_missions (одноимённые заменяют встроенные)."""
+    tello_cfg = cfg.get("tello", {})
+    specs = legacy_missions(tello_cfg)
+    specs.update(cfg.get("tello_missions", {}))
+    return MissionPlanner(specs, tello_cfg, command, state, cfg.get("tello_hold", {}))
+
+
+def wait_state(state, stale, timeout=2.0):
+    """Ждать пакет телеметрии новее момента вызова (не старше stale). False — не дождались."""
+    count = state.count
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if state.count != count and state.age(time.monotonic()) <= stale:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+# === прогон миссии на Tello или локальном симуляторе (tello_sim.py) ===
+def main():
+    from control_core import load_config
+    from control_outputs import connect_tello
+    from tello_client import TelloError
+
+    parser = argparse.ArgumentParser(description="Tello mission runner")
+    parser.add_argument("mission", nargs="?", help="имя миссии (без него — список)")
+    parser.add_argument("--host", help="адрес Tello (127.0.0.1 — tello_sim.py)")
+    parser.add_argument("--open-loop", action="store_true", help="без телеметрии: rc по таймеру")
+    args = parser.parse_args()
+
+    cfg = load_config()
+    tello_cfg = dict(cfg.get("tello", {}))
+    planner = from_config(cfg)
+    if args.mission is None:
+        for m in planner.missions.values():
+            print(f"{m.name:20s} {len(m.ends):3d} seg  {m.duration:6.1f} s  {'loop' if m.loop else ''}")
+        return
+
+    if args.host:
+        tello_cfg["host"] = args.host
+    if args.open_loop:
+        tello_cfg["telemetry"] = False
+    out = connect_tello(tello_cfg)
+    if out is None:
+        return
+    planner.command = out.command
+    planner.state = out.state
+    try:
+        out.client.takeoff().result()
+        # последняя строка телеметрии ещё с земли (h=0) — миссию привязываем к пакету после взлёта
+        if out.state is not None and not wait_state(out.state, planner.hold.stale):
+            print("[tello] нет свежей телеметрии после взлёта — миссия по таймеру")
+        period = 1.0 / tello_cfg.get("fps", 20)
+        planner.start(args.mission, time.monotonic())
+        while planner.active is not None:
+            rc = planner.update(time.monotonic(), 0, 0, 0, 0)
+            out.client.send_rc(*rc)
+            if out.state is not None:
+                out.state.set_rc(*rc)
+            time.sleep(period)
+    except TelloError as e:
+        print(f"[tello] {e}")
+    except KeyboardInterrupt:
+        pass
+    out.close(land=True)
+
+
+if __name__ == "__main__":
+    main()
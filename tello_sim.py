@@ -0,0 +1,372 @@
+import argparse
+import math
+import shutil
+import socket
+import subprocess
+import threading
+import time
+
+
+# ==== локальный симулятор Tello SDK ====
+#
+# Слушает порт команд (8889), отвечает на текстовые команды SDK,
+# шлёт телеметрию на порт 8890 клиента и по streamon отдаёт
+# синтетическое видео на 11111:
+#   mjpeg — кадры кодирует cv2, режутся на UDP-пакеты (по умолчанию)
+#   h264  — поток от ffmpeg (testsrc), если ffmpeg установлен
+#
+# Запуск:  python tello_sim.py --video mjpeg
+# В config.json для этого: "tello": {"host": "127.0.0.1", ...}
+
+CMD_PORT = 8889
+STATE_PORT = 8890
+VIDEO_PORT = 11111
+
+TAKEOFF_HEIGHT = 80         # см
+RC_TO_CM_S = 1.0            # rc 100 → 100 см/с
+RC_TO_DEG_S = 1.0           # rc 100 → 100 °/с
+BATTERY_DRAIN = 0.02        # % в секунду в полёте
+MOVE_SPEED = 100.0          # см/с и °/с для forward/cw ... (ответ — по окончании)
+
+MOVES = {                   # команда → (вперёд, вправо, вверх)
+    "forward": (1, 0, 0), "back": (-1, 0, 0),
+    "right": (0, 1, 0), "left": (0, -1, 0),
+    "up": (0, 0, 1), "down": (0, 0, -1),
+}
+
+
+class TelloSimulator:
+    """
+    Минимальная модель Tello: команды, кинематика по rc, телеметрия, видео.
+
+    Команды с задержкой (takeoff/land/throwfly) отвечают "ok" по таймеру,
+    не блокируя приём rc. Счётчики команд — для замеров нагрузки.
+    """
+
+    def __init__(self, host="127.0.0.1", cmd_port=CMD_PORT, state_port=STATE_PORT,
+                 video_port=VIDEO_PORT, state_hz=10, physics_hz=50,
+                 video=None, video_fps=30, video_size=(960, 720)):
+        self.host = host
+        self.cmd_port = cmd_port
+        self.state_port = state_port
+        self.video_port = video_port
+        self.state_period = 1.0 / state_hz
+        self.physics_period = 1.0 / physics_hz
+        self.video = video
+        self.video_fps = video_fps
+        self.video_size = video_size
+
+        self.sdk_mode = False
+        self.flying = False
+        self.streaming = False
+        self.client = None          # адрес последнего клиента
+
+        # кинематика: x/y/h в см, yaw в градусах
+        self.x = self.y = self.h = 0.0
+        self.yaw = 0.0
+        self.vgx = self.vgy = self.vgz = 0.0
+        self.rc = (0, 0, 0, 0)
+        self.battery = 87.0
+        self.flight_time = 0.0
+
+        self.commands = 0
+        self.rc_commands = 0
+
+        self._sock = None
+        self._running = False
+        self._threads = []
+        self._timers = set()            # отложенные ответы (takeoff, land, движения)
+        self._lock = threading.Lock()
+        self._ffmpeg = None
+
+    # --- жизненный цикл ---
+
+    def start(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((self.host, self.cmd_port))
+        self._sock.settimeout(0.5)
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._cmd_loop, name="sim-cmd", daemon=True),
+            threading.Thread(target=self._physics_loop, name="sim-physics", daemon=True),
+        ]
+        if self.video == "mjpeg":
+            self._threads.append(threading.Thread(target=self._mjpeg_loop, name="sim-video", daemon=True))
+        for t in self._threads:
+            t.start()
+        print(f"[sim] Tello simulator on {self.host}:{self.cmd_port} (video={self.video})")
+
+    def stop(self):
+        self._running = False
+        for t in self._threads:
+            t.join(timeout=1.0)
+        for t in list(self._timers):
+            t.cancel()
+        self._timers.clear()
+        self._stop_ffmpeg()
+        if self._sock is not None:
+            self._sock.close()
+
+    # --- команды ---
+
+    def _cmd_loop(self):
+        while self._running:
+            try:
+                data, addr = self._sock.recvfrom(1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.client = addr
+            text = data.decode("utf-8", errors="replace").strip()
+            reply = self.handle(text)
+            if reply is not None:
+                self._sock.sendto(reply.encode("utf-8"), addr)
+
+    def handle(self, text):
+        """Ответ на команду или None (rc без ответа / отложенный ответ)."""
+        parts = text.split()
+        if not parts:
+            return "error"
+        cmd = parts[0]
+
+        if cmd == "rc":
+            self.rc_commands += 1
+            try:
+                rc = tuple(max(-100, min(100, int(v))) for v in parts[1:5])
+            except ValueError:
+                return None
+            if len(rc) == 4:
+                with self._lock:
+                    self.rc = rc
+            return None
+
+        self.commands += 1
+        if cmd == "command":
+            self.sdk_mode = True
+            return "ok"
+        if not self.sdk_mode:
+            return "error Not in SDK mode"
+
+        if cmd == "battery?":
+            return str(int(self.battery))
+        if cmd == "height?":
+            return f"{int(self.h / 10)}dm"          # h — в см
+        if cmd == "time?":
+            return f"{int(self.flight_time)}s"
+        if cmd == "speed?":
+            return "10.0"
+        if cmd in ("takeoff", "throwfly"):
+            self._later(1.0, self._takeoff)
+            return None
+        if cmd == "land":
+            self._later(1.0, self._land)
+            return None
+        if cmd == "emergency":
+            with self._lock:
+                self.flying = False
+                self.h = 0.0
+            return "ok"
+        if cmd in MOVES or cmd in ("cw", "ccw"):
+            return self._move(cmd, parts[1:])
+        if cmd == "streamon":
+            self._set_stream(True)
+            return "ok"
+        if cmd == "streamoff":
+            self._set_stream(False)
+            return "ok"
+        if cmd == "downvision":
+            return "ok"             # камеры у симулятора нет — переключать нечего
+        return "error Unknown command"
+
+    def _later(self, delay, fn):
+        addr = self.client
+
+        def run():
+            self._timers.discard(timer)
+            if not self._running:
+                return
+            fn()
+            if addr is not None:
+                try:
+                    self._sock.sendto(b"ok", addr)
+                except OSError:
+                    pass                # stop() закрыл сокет между проверкой и отправкой
+        timer = threading.Timer(delay, run)
+        timer.daemon = True             # не держит интерпретатор после stop()
+        self._timers.add(timer)
+        timer.start()
+
+    def _move(self, cmd, args):
+        """forward/back/left/right/up/down X, cw/ccw X: мгновенный сдвиг, "ok" через X/MOVE_SPEED с."""
+        try:
+            amount = float(args[0])
+        except (IndexError, ValueError):
+            return "error"
+        if not self.flying:
+            return "error Not flying"
+
+        def apply():
+            with self._lock:
+                if cmd in ("cw", "ccw"):
+                    self.yaw = (self.yaw + (amount if cmd == "cw" else -amount) + 180.0) % 360.0 - 180.0
+                    return
+                f, r, u = (c * amount for c in MOVES[cmd])
+                a = math.radians(self.yaw)
+                self.x += f * math.cos(a) - r * math.sin(a)
+                self.y += f * math.sin(a) + r * math.cos(a)
+                self.h = max(10.0, self.h + u)
+        self._later(amount / MOVE_SPEED, apply)
+        return None
+
+    def _takeoff(self):
+        with self._lock:
+            self.flying = True
+            self.h = TAKEOFF_HEIGHT
+
+    def _land(self):
+        with self._lock:
+            self.flying = False
+            self.h = 0.0
+            self.rc = (0, 0, 0, 0)
+
+    # --- кинематика + телеметрия ---
+
+    def _physics_loop(self):
+        next_state = 0.0
+        last = time.monotonic()
+        while self._running:
+            time.sleep(self.physics_period)
+            now = time.monotonic()
+            dt = now - last
+            last = now
+            self.step(dt)
+
+            if now >= next_state and self.client is not None:
+                next_state = now + self.state_period
+                try:
+                    self._sock.sendto(self.state_string().encode("ascii"),
+                                      (self.client[0], self.state_port))
+                except OSError:
+                    pass
+
+    def step(self, dt):
+        with self._lock:
+            if not self.flying:
+                self.vgx = self.vgy = self.vgz = 0.0
+                return
+            lr, fb, ud, yw = self.rc
+            self.yaw = (self.yaw + yw * RC_TO_DEG_S * dt + 180.0) % 360.0 - 180.0
+            a = math.radians(self.yaw)
+            # vgx — вперёд по курсу, vgy — вправо (см/с)
+            self.vgx = fb * RC_TO_CM_S
+            self.vgy = lr * RC_TO_CM_S
+            self.vgz = ud * RC_TO_CM_S
+            self.x += (self.vgx * math.cos(a) - self.vgy * math.sin(a)) * dt
+            self.y += (self.vgx * math.sin(a) + self.vgy * math.cos(a)) * dt
+            self.h = max(10.0, self.h + self.vgz * dt)
+            self.flight_time += dt
+            self.battery = max(0.0, self.battery - BATTERY_DRAIN * dt)
+
+    def state_string(self):
+        with self._lock:
+            return (
+                f"pitch:0;roll:0;yaw:{int(self.yaw)};"
+                f"vgx:{int(self.vgx / 10)};vgy:{int(self.vgy / 10)};vgz:{int(self.vgz / 10)};"
+                f"templ:60;temph:63;tof:{int(self.h)};h:{int(self.h)};bat:{int(self.battery)};"
+                f"baro:{self.h / 100:.2f};time:{int(self.flight_time)};"
+                f"agx:0.00;agy:0.00;agz:-1000.00;\r\n"
+            )
+
+    # --- видео ---
+
+    def _set_stream(self, on):
+        self.streaming = on
+        if self.video == "h264":
+            if on:
+                self._start_ffmpeg()
+            else:
+                self._stop_ffmpeg()
+
+    def _start_ffmpeg(self):
+        if self._ffmpeg is not None:
+            return
+        exe = shutil.which("ffmpeg")
+        if exe is None:
+            print("[sim] ffmpeg not found — no h264 video (use --video mjpeg)")
+            return
+        w, h = self.video_size
+        target = self.client[0] if self.client else "127.0.0.1"
+        self._ffmpeg = subprocess.Popen(
+            [exe, "-loglevel", "error", "-re",
+             "-f", "lavfi", "-i", f"testsrc=size={w}x{h}:rate={self.video_fps}",
+             "-c:v", "libx264", "-preset", "ultrafast", "-tune", "zerolatency",
+             "-g", str(self.video_fps), "-f", "h264",
+             f"udp://{target}:{self.video_port}?pkt_size=1460"],
+            stdin=subprocess.DEVNULL,
+        )
+
+    def _stop_ffmpeg(self):
+        if self._ffmpeg is not None:
+            self._ffmpeg.terminate()
+            self._ffmpeg.wait(timeout=2.0)
+            self._ffmpeg = None
+
+    def _mjpeg_loop(self):
+        import cv2
+        import numpy as np
+
+        w, h = self.video_size
+        img = np.zeros((h, w, 3), dtype=np.uint8)
+        period = 1.0 / self.video_fps
+        n = 0
+        while self._running:
+            t0 = time.monotonic()
+            if self.streaming and self.client is not None:
+                # полосы сдвигаются по кадрам + номер кадра и высота
+                img[:] = 40
+                x = (n * 8) % w
+                img[:, x:x + 40] = (0, 160, 255)
+                cv2.putText(img, f"SIM #{n} h={int(self.h)}", (40, 80),
+                            cv2.FONT_HERSHEY_SIMPLEX, 2.0, (255, 255, 255), 3)
+                ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 70])
+                if ok:
+                    data = buf.tobytes()
+                    addr = (self.client[0], self.video_port)
+                    for k in range(0, len(data), 1400):
+                        self._sock.sendto(data[k:k + 1400], addr)
+                n += 1
+            time.sleep(max(0.0, period - (time.monotonic() - t0)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный симулятор Tello SDK")
+    parser.add_argument("--host", default="127.0.0.1", help="адрес для порта команд")
+    parser.add_argument("--port", type=int, default=CMD_PORT)
+    parser.add_argument("--state-port", type=int, default=STATE_PORT)
+    parser.add_argument("--state-hz", type=float, default=10)
+    parser.add_argument("--video", choices=["mjpeg", "h264"], default=None,
+                        help="отдавать синтетическое видео на 11111 по streamon")
+    parser.add_argument("--stats", type=float, default=0,
+                        help="печатать счётчики команд каждые N секунд")
+    args = parser.parse_args()
+
+    sim = TelloSimulator(args.host, args.port, args.state_port,
+                         state_hz=args.state_hz, video=args.video)
+    sim.start()
+    try:
+        last_rc = 0
+        while True:
+            time.sleep(args.stats or 1.0)
+            if args.stats:
+                rate = (sim.rc_commands - last_rc) / args.stats
+                last_rc = sim.rc_commands
+                print(f"[sim] rc/s={rate:.1f} cmds={sim.commands} flying={sim.flying} "
+                      f"h={sim.h:.0f} yaw={sim.yaw:.0f} x={sim.x:.0f} y={sim.y:.0f}")
+    except KeyboardInterrupt:
+        pass
+    sim.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import math
+import socket
+import threading
+import time
+
+import numpy as np
+
+
+# ==== телеметрия Tello: UDP 8890 → кольцевой буфер ====
+#
+# Tello (и tello_sim.py) шлёт на порт 8890 клиента строку вида
+#   "pitch:0;roll:0;yaw:12;vgx:3;vgy:0;vgz:0;templ:60;...;tof:80;h:80;bat:87;...\r\n"
+# 10–50 раз в секунду. Поток приёма раскладывает её в строку массива
+# (N, len(FIELDS)); UI-поток только копирует последнюю строку.
+#
+# vgx/vgy/vgz приходят в дм/с — в буфере уже см/с. Скорости считаются
+# в осях дрона (vgx — вперёд по курсу, vgy — вправо), как в tello_sim.py;
+# x/y — положение счислением от первого пакета, vx/vy — скорость в осях
+# старта (см, см/с).
+#
+# Шаг vgx/vgy — 10 см/с, и счисление по ним копит ошибку (25 см/с
+# приходят как 20). Поэтому, если известен отправленный rc (set_rc) и
+# измерение отличается от него меньше чем на шаг, для x/y берётся
+# скорость по rc; большее расхождение (ветер, разгон) — по измерению.
+
+STATE_PORT = 8890
+VG_STEP = 10.0          # см/с — разрешение vgx/vgy/vgz
+
+FIELDS = ("t", "pitch", "roll", "yaw", "vgx", "vgy", "vgz", "tof", "h", "bat", "x", "y", "vx", "vy")
+T, PITCH, ROLL, YAW, VGX, VGY, VGZ, TOF, H, BAT, X, Y, VX, VY = range(len(FIELDS))
+
+# ключ строки Tello → (колонка, множитель)
+KEYS = {
+    b"pitch": (PITCH, 1.0), b"roll": (ROLL, 1.0), b"yaw": (YAW, 1.0),
+    b"vgx": (VGX, 10.0), b"vgy": (VGY, 10.0), b"vgz": (VGZ, 10.0),
+    b"tof": (TOF, 1.0), b"h": (H, 1.0), b"bat": (BAT, 1.0),
+}
+
+
+class StateParser:
+    """
+    Строка телеметрии → строка массива, без словарей на пакет.
+
+    Порядок полей у Tello не меняется: по первому пакету запоминаются
+    позиции нужных ключей, дальше — только float() по этим позициям.
+    Пакет другой длины — раскладка строится заново.
+    """
+
+    __slots__ = ("_layout", "_nparts")
+
+    def __init__(self):
+        self._layout = ()
+        self._nparts = -1
+
+    def _learn(self, parts):
+        layout = []
+        for pos, part in enumerate(parts):
+            key = part.partition(b":")[0].strip()
+            if key in KEYS:
+                col, scale = KEYS[key]
+                layout.append((pos, col, scale, len(key) + 1))
+        self._layout = tuple(layout)
+        self._nparts = len(parts)
+
+    def parse(self, data, row):
+        """True, если строка разобрана (row заполнен), False — мусор."""
+        parts = data.split(b";")
+        if len(parts) != self._nparts:
+            self._learn(parts)
+        if not self._layout:
+            return False
+        try:
+            for pos, col, scale, skip in self._layout:
+                row[col] = float(parts[pos][skip:]) * scale
+        except ValueError:
+            self._nparts = -1       # раскладка сбилась — на следующем пакете заново
+            return False
+        return True
+
+
+class TelloState:
+    """
+    Приёмник телеметрии Tello в отдельном потоке.
+
+    - пакеты разбираются прямо в следующую строку кольцевого буфера
+      (capacity строк, выделен один раз), счётчик count растёт после
+      записи строки — читатель без блокировок берёт строку count-1
+    - latest(out) копирует последнюю строку в out (или в новый массив);
+      None — телеметрии ещё не было
+    - age(now) — сколько секунд назад пришёл последний пакет
+    clock — тот же, что у цикла управления (time.monotonic по умолчанию).
+    """
+
+    def __init__(self, host="", port=STATE_PORT, capacity=512, clock=time.monotonic, cm_s_per_rc=1.0):
+        self.address = (host, port)
+        self.clock = clock
+        self.cm_s_per_rc = cm_s_per_rc
+        self.ring = np.zeros((capacity, len(FIELDS)))
+        self.count = 0
+        self.errors = 0             # пакеты, которые не удалось разобрать
+
+        self._parser = StateParser()
+        self._sock = None
+        self._running = False
+        self._thread = None
+        self._x = self._y = 0.0
+        self._last_t = None
+        self._rc_fb = self._rc_lr = None     # отправленный rc, см/с в осях дрона
+
+    def start(self):
+        if self._running:
+            return
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(self.address)
+        self._sock.settimeout(0.5)
+        self._running = True
+        self._thread = threading.Thread(target=self._recv_loop, name="tello-state", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _recv_loop(self):
+        while self._running:
+            try:
+                data = self._sock.recv(512)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.feed(data, self.clock())
+
+    def feed(self, data, now):
+        """Один пакет телеметрии (поток приёма; вызывается и напрямую — из тестов и replay)."""
+        row = self.ring[self.count % len(self.ring)]
+        if not self._parser.parse(data, row):
+            self.errors += 1
+            return
+        row[T] = now
+
+        # скорость по курсу → оси старта, положение счислением
+        a = math.radians(row[YAW])
+        c, s = math.cos(a), math.sin(a)
+        vgx, vgy = row[VGX], row[VGY]
+        if self._rc_fb is not None:
+            if abs(vgx - self._rc_fb) < VG_STEP:
+                vgx = self._rc_fb
+            if abs(vgy - self._rc_lr) < VG_STEP:
+                vgy = self._rc_lr
+        vx = vgx * c - vgy * s
+        vy = vgx * s + vgy * c
+        if self._last_t is not None:
+            dt = min(now - self._last_t, 0.5)
+            self._x += vx * dt
+            self._y += vy * dt
+        self._last_t = now
+        row[X] = self._x
+        row[Y] = self._y
+        row[VX] = vx
+        row[VY] = vy
+        self.count += 1
+
+    def set_rc(self, lr, fb, ud, yw):
+        """Последний отправленный rc (TelloOutput.write) — уточняет счисление x/y."""
+        self._rc_lr = lr * self.cm_s_per_rc
+        self._rc_fb = fb * self.cm_s_per_rc
+
+    def latest(self, out=None):
+        n = self.count
+        if n == 0:
+            return None
+        row = self.ring[(n - 1) % len(self.ring)]
+        if out is None:
+            return row.copy()
+        out[:] = row
+        return out
+
+    def age(self, now):
+        n = self.count
+        if n == 0:
+            return float("inf")
+        return now - self.ring[(n - 1) % len(self.ring), T]
+
+    def history(self, n=None):
+        """Последние n строк по порядку (копия) — для графиков и отладки."""
+        total = min(self.count, len(self.ring))
+        n = total if n is None else min(n, total)
+        idx = np.arange(self.count - n, self.count) % len(self.ring)
+        return self.ring[idx]
@@ -0,0 +1,16 @@
+import os
+import sys
+
+# ==== общее для тестов ====
+#
+# Модули лежат в корне репозитория — добавляем его в путь импорта;
+# pygame — без окна и без приветствия в stdout.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+import flight_log
+from flight_log import FlightRecorder, KIND_EVENT, KIND_INDEX, KIND_PPM, KIND_TELLO
+
+
+# flight_log: запись → load() → seek()
+
+@pytest.fixture
+def log(tmp_path):
+    """Журнал на 3000 кадров PPM (шаг 20 мс) и RC Tello на каждом 50-м, index_every=64."""
+    path = str(tmp_path / "flight.log")
+    now = [0]
+    rec = FlightRecorder(path, clock=lambda: now[0], index_every=64, flush_interval=0.01)
+    rec.start()
+    for i in range(3000):
+        now[0] = i * 20_000_000
+        rec.ppm([1000 + i % 1000] + [1500] * 7)
+        if i % 50 == 0:
+            rec.tello_rc((i % 100 - 50, 0, 0, 0))
+    rec.stop()
+    return path
+
+
+def test_roundtrip(log):
+    recs = flight_log.load(log)
+    assert np.array_equal(recs["seq"], np.arange(len(recs)))
+    assert flight_log.index_every(recs) == 64
+    assert np.all(recs["kind"][64::64] == KIND_INDEX)
+
+    ppm = flight_log.select(recs, KIND_PPM)
+    assert len(ppm) == 3000
+    assert np.array_equal(ppm["v"][:, 0], 1000 + np.arange(3000) % 1000)
+    assert np.array_equal(ppm["t_ns"], np.arange(3000, dtype=np.int64) * 20_000_000)
+
+    tello = flight_log.select(recs, KIND_TELLO)
+    assert len(tello) == 60
+    assert tello["v"][1, 0] == 0 and tello["v"][2, 0] == -50
+
+    events = flight_log.select(recs, KIND_EVENT)
+    assert [flight_log.EVENTS[e] for e in events["sub"]] == ["start", "stop"]
+
+    s = flight_log.summary(recs)
+    assert s["counts"]["ppm"] == 3000
+    assert s["duration_s"] == pytest.approx(2999 * 0.02)
+
+
+def test_seek(log):
+    recs = flight_log.load(log)
+    t = recs["t_ns"]
+    data = (recs["kind"] != flight_log.KIND_HEADER) & (recs["kind"] != KIND_INDEX)
+    for target in [0, 1, 19_999_999, 20_000_000, 1_280_000_000, 1_290_000_001, 59_980_000_000, 10**12]:
+        i = flight_log.seek(recs, target)
+        later = np.nonzero(data & (t >= target))[0]
+        assert i == (later[0] if len(later) else len(recs)), target
+
+
+def test_truncated_tail(log, tmp_path):
+    with open(log, "rb") as f:
+        blob = f.read()
+    cut = tmp_path / "cut.log"
+    cut.write_bytes(blob[:-10])                 # обрыв посреди последней записи
+    recs = flight_log.load(str(cut))
+    assert len(recs) == len(blob) // flight_log.RECORD_SIZE - 1
+
+
+def test_not_a_log(tmp_path):
+    bad = tmp_path / "bad.log"
+    bad.write_bytes(b"\0" * flight_log.RECORD_SIZE * 4)
+    with pytest.raises(ValueError):
+        flight_log.load(str(bad))
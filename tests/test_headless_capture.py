@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+
+# headless-прогон сценария в виртуальном времени: capture побайтно
+# совпадает с эталоном tests/data/arm_climb_land.csv
+#
+# Эталон после намеренного изменения поведения обновляется так:
+#   python main.py --headless --script scenarios/arm_climb_land.json \
+#       --capture tests/data/arm_climb_land.csv
+
+SCENARIO = os.path.join(ROOT, "scenarios", "arm_climb_land.json")
+GOLDEN = os.path.join(ROOT, "tests", "data", "arm_climb_land.csv")
+
+
+def run_headless(capture):
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    subprocess.run([sys.executable, "main.py", "--headless", "--script", SCENARIO, "--capture", capture],
+                   cwd=ROOT, env=env, check=True, capture_output=True, timeout=120)
+    with open(capture, "rb") as f:
+        return f.read()
+
+
+def test_matches_golden(tmp_path):
+    data = run_headless(str(tmp_path / "capture.csv"))
+    with open(GOLDEN, "rb") as f:
+        golden = f.read()
+    if data != golden:
+        # первая расходящаяся строка — понятнее, чем дифф на 47 КБ
+        for i, (a, b) in enumerate(zip(data.splitlines(), golden.splitlines())):
+            assert a == b, f"line {i + 1}"
+        assert len(data) == len(golden)
+
+
+def test_tello_rc(tmp_path):
+    lines = run_headless(str(tmp_path / "capture.csv")).decode("ascii").splitlines()
+    tello = [line.split(",") for line in lines if line.startswith("tello,")]
+    rc = {float(t): tuple(map(int, v)) for _, t, *v in tello}
+    assert rc[6.5] == (-40, 0, 0, 0)            # k после взлёта по CH5
+    assert rc[7.5] == (0, 0, 0, 0)
+    assert rc[8.0] == (30, 0, 0, 0)             # M — pendulum
+    assert rc[17.0] == (0, 0, 0, 0)             # ESC — посадка
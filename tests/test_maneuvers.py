@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+import maneuvers
+from control_core import ControlParams, load_config
+from conftest import ROOT
+
+
+# ManeuverEngine: update() по тактам и evaluate() пачкой дают одни и те же значения
+
+@pytest.fixture(scope="module")
+def cfg():
+    return load_config(f"{ROOT}/config.json")
+
+
+@pytest.fixture
+def engine(cfg):
+    return maneuvers.from_config(cfg, ControlParams(cfg))
+
+
+def start_channels(params):
+    ch = [params.mid_us] * 8
+    ch[2] = params.mid_us + 150     # газ выше середины — require у descend_yaw_hold
+    return ch
+
+
+@pytest.mark.parametrize("name", ["autoland_fast", "autoland_slow", "autoback", "descend_yaw_hold", "figure_eight"])
+def test_update_matches_evaluate(engine, name):
+    m = engine.by_name[name]
+    ch0 = start_channels(engine.params)
+    # шаг не кратен длинам сегментов; у зацикленного — два круга
+    end = m.duration * (2 if m.loop else 1)
+    ts = np.arange(0.0, end, 1.0 / 120 + 1e-4)
+    if not m.loop:
+        ts = ts[ts < m.duration]
+    expected = engine.evaluate(name, ts, ch0)
+
+    ch = list(ch0)
+    engine.start(m, ch, 0.0)
+    assert engine.is_active(name)
+    got = {idx: [] for idx in expected}
+    for t in ts:
+        engine.update(ch, t)
+        for idx in got:
+            got[idx].append(ch[idx])
+    for idx, values in expected.items():
+        np.testing.assert_array_equal(np.array(got[idx]), values, err_msg=f"{name} CH{idx + 1}")
+
+
+def test_end_applies_last_frame(engine):
+    m = engine.by_name["descend_yaw_hold"]
+    ch = start_channels(engine.params)
+    engine.start(m, ch, 0.0)
+    engine.update(ch, m.duration + 0.01)
+    assert not engine.is_active("descend_yaw_hold")
+    assert engine.phase(m) == maneuvers.PHASE_IDLE
+    assert ch[2] == engine.params.mid_us
+    assert ch[7] == engine.params.min_us       # on_end: ch8 → min (DISARM)
+
+
+def test_phase_advances(engine):
+    m = engine.by_name["figure_eight"]
+    ch = start_channels(engine.params)
+    engine.start(m, ch, 0.0)
+    phases = []
+    for t in np.arange(0.0, m.duration, 0.25):
+        engine.update(ch, t)
+        phases.append(engine.phase(m))
+    assert phases == sorted(phases)
+    assert phases[0] == 0 and phases[-1] > 0
+
+
+def test_yield_to_stick(engine):
+    m = engine.by_name["figure_eight"]      # merge: yield
+    ch = start_channels(engine.params)
+    engine.start(m, ch, 0.0)
+    ch[0] = 1234
+    engine.update(ch, 1.0, held=(True, False, False, False))
+    assert ch[0] == 1234
+    assert engine.is_active("figure_eight")
+    engine.update(ch, 1.0)
+    assert ch[0] == engine.params.mid_us + 60
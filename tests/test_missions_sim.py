@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+from control_core import load_config
+from conftest import ROOT
+from tello_client import TelloClient
+from tello_missions import MissionPlanner, wait_state
+from tello_sim import TelloSimulator
+from tello_state import TelloState
+
+
+# MissionPlanner по телеметрии симулятора: всё на свободных портах,
+# цикл — как в tello_missions.main()
+
+SPECS = {
+    "test_path": {
+        "speed": 40,
+        "segments": [
+            {"goto": [60, 0, 20]},
+            {"cmd": "cw 90", "t": 2.0},
+            {"goto": [60, 40, 20]},
+            {"hover": 0.5},
+        ],
+    },
+}
+
+
+@pytest.fixture
+def drone():
+    """(sim, client, state) — в воздухе, телеметрия идёт."""
+    sim = TelloSimulator(cmd_port=0)
+    state = TelloState(host="127.0.0.1", port=0)
+    state.start()
+    sim.state_port = state._sock.getsockname()[1]
+    sim.start()
+    client = TelloClient("127.0.0.1", sim._sock.getsockname()[1], command_timeout=5.0)
+    client.start()
+    try:
+        client.connect().result(timeout=3)
+        client.takeoff().result(timeout=3)
+        yield sim, client, state
+    finally:
+        client.stop()
+        sim.stop()
+        state.stop()
+
+
+def fly(planner, client, state, name, timeout=15.0):
+    planner.start(name, time.monotonic())
+    closed = planner.closed_loop()
+    deadline = time.monotonic() + timeout
+    while planner.active is not None and time.monotonic() < deadline:
+        rc = planner.update(time.monotonic(), 0, 0, 0, 0)
+        client.send_rc(*rc)
+        if state is not None:
+            state.set_rc(*rc)
+        time.sleep(0.05)
+    client.send_rc(0, 0, 0, 0)
+    return closed
+
+
+def test_closed_loop_mission(drone):
+    sim, client, state = drone
+    cfg = load_config(f"{ROOT}/config.json")
+    planner = MissionPlanner(SPECS, cfg["tello"], client.command, state, cfg["tello_hold"])
+    assert wait_state(state, planner.hold.stale)
+    x0, y0, h0 = sim.x, sim.y, sim.h
+    assert h0 == pytest.approx(80, abs=1)
+
+    assert fly(planner, client, state, "test_path")
+    assert planner.active is None                       # DONE, а не таймаут
+    assert sim.x - x0 == pytest.approx(60, abs=15)
+    assert sim.y - y0 == pytest.approx(40, abs=15)
+    assert sim.h == pytest.approx(h0 + 20, abs=10)
+    assert sim.yaw % 360 == pytest.approx(90, abs=5)
+
+
+def test_timer_mission_without_telemetry(drone):
+    sim, client, _ = drone
+    cfg = load_config(f"{ROOT}/config.json")
+    planner = MissionPlanner(SPECS, cfg["tello"], client.command, None, cfg["tello_hold"])
+    assert not fly(planner, client, None, "test_path")
+    assert planner.active is None
+    assert sim.yaw % 360 == pytest.approx(90, abs=5)
+
+
+def test_manual_override():
+    planner = MissionPlanner(SPECS, {"auto_speed": 30})
+    planner.start("test_path", 0.0)
+    lr, fb, ud, yw = planner.update(0.1, 0, 0, 0, 0)     # без телеметрии — rc по таймеру
+    assert fb > 0 and ud > 0 and lr == yw == 0
+    assert planner.update(0.2, 0, 40, 0, 0) == (0, 40, 0, 0)   # перехват руками
+    assert planner.active is None
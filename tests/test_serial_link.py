@@ -0,0 +1,136 @@
+import os
+import pty
+import struct
+import threading
+import time
+import tty
+
+import pytest
+import serial
+
+from ppm_protocol import BIN_FRAME_SIZE, PROTO_BIN, SYNC_BYTE, PpmEncoder
+from serial_link import STATE_CONNECTED, STATE_RECONNECTING, SerialLink
+
+
+# SerialLink: выдернули и вставили тот же порт — пара pty за симлинком,
+# как /dev/serial/by-id/... у настоящего адаптера
+
+CH = [1500, 1500, 1000, 1500, 1000, 1000, 1000, 2000]
+
+
+class FakePort:
+    """Пара pty; path — симлинк на подчинённую сторону, replug() — новая пара по тому же пути."""
+
+    def __init__(self, path):
+        self.path = path
+        self.master = None
+        self.plug()
+
+    def plug(self):
+        master, slave = pty.openpty()
+        tty.setraw(master)
+        tmp = self.path + ".new"
+        os.symlink(os.ttyname(slave), tmp)
+        os.replace(tmp, self.path)
+        os.close(slave)
+        self.master = master
+
+    def unplug(self):
+        os.close(self.master)
+        self.master = None
+
+    def read(self, timeout=1.0):
+        """Всё, что пришло за timeout (или пока не замолчит на 0.1 с)."""
+        data = b""
+        deadline = time.monotonic() + timeout
+        os.set_blocking(self.master, False)
+        while time.monotonic() < deadline:
+            try:
+                data += os.read(self.master, 4096)
+            except BlockingIOError:
+                if data:
+                    break
+                time.sleep(0.01)
+        return data
+
+    def close(self):
+        if self.master is not None:
+            os.close(self.master)
+        if os.path.lexists(self.path):
+            os.unlink(self.path)
+
+
+@pytest.fixture
+def port(tmp_path):
+    p = FakePort(str(tmp_path / "ttyACM-test"))
+    yield p
+    p.close()
+
+
+def test_same_path_replug(port):
+    ser = serial.Serial(port.path, 115200, timeout=0)
+    link = SerialLink(ser, port.path, PpmEncoder(PROTO_BIN), 115200)
+    try:
+        assert link.write(CH)
+        frame = port.read()
+        assert len(frame) == BIN_FRAME_SIZE and frame[0] == SYNC_BYTE
+
+        port.unplug()
+        # ошибка записи → простой; записи в это время молча пропускаются
+        deadline = time.monotonic() + 2.0
+        while link.state != STATE_RECONNECTING and time.monotonic() < deadline:
+            link.write(CH)
+            time.sleep(0.005)
+        assert link.state == STATE_RECONNECTING
+        assert not link.write(CH)
+
+        port.plug()
+        deadline = time.monotonic() + 2.0
+        while not link.is_connected() and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert link.state == STATE_CONNECTED
+        assert link.reconnects == 1
+        assert link.port == port.path
+        assert link.encoder.is_binary()
+        assert link.last_outage_ms < 1000.0     # тот же путь — без рукопожатия и поиска
+
+        assert link.write(CH)
+        frame = port.read()[-BIN_FRAME_SIZE:]
+        assert frame[0] == SYNC_BYTE
+        assert list(struct.unpack_from("<8H", frame, 2)) == CH
+    finally:
+        link.close()
+
+
+def test_concurrent_writes_during_replug(port):
+    ser = serial.Serial(port.path, 115200, timeout=0)
+    link = SerialLink(ser, port.path, PpmEncoder(PROTO_BIN), 115200)
+    stop = threading.Event()
+    errors = []
+
+    def writer():
+        try:
+            while not stop.is_set():
+                link.write(CH)
+                time.sleep(0.002)
+        except Exception as e:      # write() не должен бросать никогда
+            errors.append(e)
+
+    t = threading.Thread(target=writer, daemon=True)
+    t.start()
+    try:
+        for _ in range(3):
+            port.read(0.1)
+            port.unplug()
+            time.sleep(0.05)
+            port.plug()
+            deadline = time.monotonic() + 2.0
+            while not link.is_connected() and time.monotonic() < deadline:
+                time.sleep(0.005)
+            assert link.is_connected()
+    finally:
+        stop.set()
+        t.join(timeout=1.0)
+        link.close()
+    assert not errors
+    assert link.reconnects == 3
@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+from tello_client import TelloClient, TelloError
+from tello_sim import TelloSimulator
+
+
+# TelloClient против tello_sim.TelloSimulator на свободных портах
+
+@pytest.fixture
+def sim():
+    s = TelloSimulator(cmd_port=0, state_port=0)
+    s.start()
+    yield s
+    s.stop()
+
+
+@pytest.fixture
+def client(sim):
+    c = TelloClient("127.0.0.1", sim._sock.getsockname()[1], rc_hz=50, command_timeout=3.0)
+    c.start()
+    yield c
+    c.stop()
+
+
+def wait_for(cond, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_commands(sim, client):
+    assert client.connect().result(timeout=3) == "ok"
+    assert client.battery().result(timeout=3) == "87"
+    assert client.command("height?").result(timeout=3) == "0dm"
+    assert client.takeoff().result(timeout=3) == "ok"
+    assert sim.flying
+    assert client.command("height?").result(timeout=3) == "8dm"   # 80 см
+    assert client.land().result(timeout=3) == "ok"
+    assert not sim.flying
+
+
+def test_error_reply(sim, client):
+    with pytest.raises(TelloError):
+        client.takeoff().result(timeout=3)      # без "command" — не в режиме SDK
+
+
+def test_rc(sim, client):
+    client.connect().result(timeout=3)
+    client.send_rc(10, -20, 30, -40)
+    assert wait_for(lambda: sim.rc == (10, -20, 30, -40))
+
+    # одинаковые rc подряд не дублируются, только keepalive раз в секунду
+    time.sleep(0.3)
+    sent = sim.rc_commands
+    time.sleep(0.3)
+    assert sim.rc_commands - sent <= 1
+    assert client.rc_coalesced > 0
+
+
+def test_stop_rc(sim, client):
+    client.connect().result(timeout=3)
+    client.send_rc(30, 0, 0, 0)
+    assert wait_for(lambda: sim.rc == (30, 0, 0, 0))
+
+    client.stop_rc()
+    assert wait_for(lambda: sim.rc == (0, 0, 0, 0))
+    sent = sim.rc_commands
+    time.sleep(1.5)                             # дольше rc_keepalive
+    assert sim.rc_commands == sent
+
+    client.send_rc(0, 10, 0, 0)                 # send_rc снова включает поток rc
+    assert wait_for(lambda: sim.rc == (0, 10, 0, 0))
+
+
+def test_stop_rc_before_land(sim, client):
+    client.connect().result(timeout=3)
+    client.takeoff().result(timeout=3)
+    client.send_rc(0, 0, 40, 0)
+    assert wait_for(lambda: sim.rc == (0, 0, 40, 0))
+
+    client.stop_rc()
+    fut = client.land()
+    assert sim.rc == (0, 0, 0, 0) or wait_for(lambda: sim.rc == (0, 0, 0, 0), 0.5)
+    assert fut.result(timeout=3) == "ok"
+
+
+def test_not_started():
+    c = TelloClient("127.0.0.1", 9)
+    with pytest.raises(TelloError):
+        c.connect().result(timeout=1)
@@ -0,0 +1,89 @@
+import time
+
+import numpy as np
+import pytest
+
+import vision
+from precision_land import Pad, PadTracker
+from video_decode import ProcessFrameRead, SyntheticCapture, open_capture
+
+
+# ProcessFrameRead и PadTracker на synthetic:...+pad
+
+ADDRESS = "synthetic:320x240@30+pad"
+
+
+def wait_for(cond, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_synthetic_address():
+    cap = open_capture(ADDRESS)
+    assert isinstance(cap, SyntheticCapture)
+    assert cap.size == (320, 240) and cap.fps == 30.0 and cap.pad
+    ok, frame = cap.read()
+    assert ok and frame.shape == (240, 320, 3)
+
+
+def test_pad_tracker_follows_pad():
+    cap = SyntheticCapture((320, 240), fps=1000.0, pad=True)
+    tracker = PadTracker(detect_every=5)
+    pads = []
+    for _ in range(30):
+        _, frame = cap.read()
+        pads.append(tracker.process(frame))
+    assert all(isinstance(p, Pad) for p in pads)
+    assert tracker.keyframes >= 6 and tracker.tracked > 0     # поиск через 4 кадра сопровождения
+
+    # центр площадки — там, куда её рисует SyntheticCapture
+    t = 29 / 1000.0
+    cx, cy = 0.5 + 0.25 * np.sin(0.5 * t), 0.5 + 0.2 * np.sin(0.35 * t)
+    assert pads[-1].id == 0
+    assert pads[-1].center == pytest.approx((cx, cy), abs=0.02)
+    assert pads[-1].side == pytest.approx(60 / 320, rel=0.15)
+
+
+def test_pad_tracker_lost():
+    tracker = PadTracker()
+    assert tracker.process(np.full((240, 320, 3), 128, dtype=np.uint8)) is None
+
+
+def test_process_frame_read():
+    reader = ProcessFrameRead(ADDRESS, size=(320, 240), slots=3)
+    assert reader.stamped == (None, 0.0)
+    reader.start()
+    try:
+        assert wait_for(lambda: reader.frames >= 5)
+        assert reader.state == "running"
+        frame, t = reader.stamped
+        assert frame.shape == (240, 320, 3) and frame.dtype == np.uint8
+        assert 0.0 <= time.monotonic() - t < 1.0         # время декодирования, не чтения
+        seq = reader.seq
+        assert wait_for(lambda: reader.stamped[1] > t)
+        assert reader.seq > seq
+        assert reader.frame is not frame                 # новый кадр — новый объект
+    finally:
+        reader.stop()
+    assert reader.state == "stopped"
+    assert reader.stamped == (None, 0.0)
+
+
+def test_vision_pool_on_process_reader():
+    reader = ProcessFrameRead(ADDRESS, size=(320, 240))
+    pool = vision.from_config(reader, {"plugins": {"pad": {"type": "precision_land:PadTracker"}}})
+    reader.start()
+    pool.start()
+    try:
+        assert wait_for(lambda: pool.result("pad", time.monotonic()) is not None)
+        res = pool.result("pad", time.monotonic())
+        assert isinstance(res.data, Pad)
+        assert res.t <= res.done_t                       # t — время кадра, done_t — обработки
+        assert res.age(time.monotonic()) < 1.0
+    finally:
+        pool.stop()
+        reader.stop()
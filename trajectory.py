@@ -0,0 +1,36 @@
+import math
+
+import numpy as np
+
+
+# ==== кривые перехода между ключевыми кадрами ====
+#
+# u ∈ [0, 1] — доля пройденного сегмента, результат s ∈ [0, 1] —
+# доля пройденного пути по значению. Функции работают и с числами, и
+# с массивами; out= — посчитать на месте без новых массивов.
+
+CURVES = ("linear", "ease", "exp")     # номер кривой = индекс
+EXP_K = 4.0                            # крутизна "exp": к середине сегмента пройдено ~88%
+_EXP_NORM = 1.0 / (1.0 - math.exp(-EXP_K))
+
+
+def ease(u, out=None):
+    """Плавный разгон и торможение: 0.5 − 0.5·cos(πu)."""
+    out = np.multiply(u, math.pi, out=out)
+    np.cos(out, out=out)
+    np.multiply(out, -0.5, out=out)
+    return np.add(out, 0.5, out=out)
+
+
+def exp_decay(u, out=None):
+    """Быстро в начале, мягко подходит к цели (автопосадка у земли)."""
+    out = np.multiply(u, -EXP_K, out=out)
+    np.exp(out, out=out)
+    np.subtract(1.0, out, out=out)
+    return np.multiply(out, _EXP_NORM, out=out)
+
+
+def apply(curves, u):
+    """curves — номер кривой (или массив номеров по элементам u)."""
+    u = np.asarray(u, dtype=float)
+    return np.choose(curves, (u, ease(u), exp_decay(u)))
@@ -0,0 +1,309 @@
+import math
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+
+# ==== приём и декодирование видео в отдельном процессе ====
+#
+# StreamFrameRead (как и get_frame_read() djitellopy) декодирует поток
+# в потоке нашего процесса — под тем же GIL, что цикл pygame и поток
+# PPM. ProcessFrameRead выносит приём и декодирование в дочерний процесс
+# (spawn), кадры он кладёт в multiprocessing.shared_memory:
+#
+#   заголовок  int64[HEADER_LEN + 2 * slots]:
+#     LATEST   номер последнего готового кадра (0 — ещё не было)
+#     STATE    STARTING / RUNNING / FAILED / STOPPED
+#     CPU_NS   процессорное время последнего read() (декодирование + BGR,
+#              все потоки FFmpeg; ожидание пакетов не входит)
+#     ERRORS   неудачных read()
+#     SLOT0+i  номер кадра в слоте i; -1 — слот сейчас пишется
+#     SLOT0+slots+i  время кадра в слоте i: time.monotonic_ns(), когда
+#              read() вернул кадр (часы общие для процессов)
+#   слоты      uint8[slots, h, w, 3] — кадр n лежит в слоте n % slots
+#
+# Процесс пишет кадр n+1 в слот (n+1) % slots (cap.read прямо в слот,
+# кадр другого размера — cv2.resize в слот), затем время и номер слота,
+# затем LATEST. UI-процесс только отображает готовый слот в numpy-массив без
+# копирования. Слот, который отдан как последний, перезаписывается
+# не раньше чем через slots-1 кадров (при 30 fps и slots=4 — 100 мс),
+# за это время VideoWorker успевает его обработать.
+#
+# Адрес — всё, что открывает cv2.VideoCapture (udp://..., файл), или
+# synthetic:[WxH][@FPS][+pad] — генератор кадров без сети и кодека
+# (тесты, отладка UI без дрона); +pad — по кадру плавает маркер
+# площадки ArUco (id 0, DICT_4X4_50) для precision_land. hw_accel — попросить у FFmpeg аппаратное
+# декодирование (CAP_PROP_HW_ACCELERATION = ANY), если OpenCV умеет;
+# не открылось — обычное программное.
+# Параметры — секция "video_decode" config.json: process, slots,
+# width/height (размер слота — кадр Tello 960×720), hw_accel.
+
+SYNTHETIC = "synthetic:"
+
+LATEST, STATE, CPU_NS, ERRORS = range(4)
+HEADER_LEN = 8
+SLOT0 = HEADER_LEN
+
+STARTING, RUNNING, FAILED, STOPPED = range(4)
+STATE_NAMES = ("starting", "running", "failed", "stopped")
+
+
+class SyntheticCapture:
+    """
+    Источник кадров с интерфейсом cv2.VideoCapture (isOpened/read/release):
+    сдвигающийся градиент и квадрат, номер кадра в углу, темп — fps;
+    pad=True — ещё и маркер площадки (draw_pad), плавающий по кадру.
+    read(image) пишет прямо в image, если размер совпадает.
+    """
+
+    def __init__(self, size=(960, 720), fps=30.0, pad=False):
+        self.size = size
+        self.fps = fps
+        self.pad = pad
+        self.count = 0
+        w, h = size
+        x = np.arange(2 * w, dtype=np.float32)
+        y = np.arange(h, dtype=np.float32)[:, None]
+        base = np.empty((h, 2 * w, 3), dtype=np.uint8)
+        base[..., 0] = (x * 255 / w) % 256
+        base[..., 1] = y * 255 / h
+        base[..., 2] = 255 - (x * 127 / w + y * 127 / h) % 256
+        self._base = base
+        self._next = None
+
+    @classmethod
+    def from_address(cls, address):
+        """synthetic:[WxH][@FPS][+pad] → SyntheticCapture."""
+        spec = address[len(SYNTHETIC):]
+        spec, _, extra = spec.partition("+")
+        size, _, fps = spec.partition("@")
+        w, _, h = size.partition("x")
+        return cls((int(w or 960), int(h or 720)), float(fps or 30.0), extra == "pad")
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+    def read(self, image=None):
+        now = time.perf_counter()
+        if self._next is None:
+            self._next = now
+        if now < self._next:
+            time.sleep(self._next - now)
+        self._next = max(self._next + 1.0 / self.fps, now)
+
+        w, h = self.size
+        if image is None or image.shape != (h, w, 3):
+            image = np.empty((h, w, 3), dtype=np.uint8)
+        off = (self.count * 8) % w
+        np.copyto(image, self._base[:, off:off + w])
+        s = h // 6
+        x0 = (self.count * 6) % (w - s)
+        y0 = (h - s) // 2
+        image[y0:y0 + s, x0:x0 + s] = 255
+        cv2.putText(image, str(self.count), (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 2.0, (0, 0, 0), 4)
+        if self.pad:
+            t = self.count / self.fps
+            draw_pad(image, (w * (0.5 + 0.25 * math.sin(0.5 * t)), h * (0.5 + 0.2 * math.sin(0.35 * t))), h // 4)
+        self.count += 1
+        return True, image
+
+
+_pads = {}
+
+
+def draw_pad(image, center, side, marker_id=0, dictionary="DICT_4X4_50"):
+    """Маркер ArUco в белой рамке с центром center (пиксели), сторона side; край кадра обрезает."""
+    side = max(8, int(side))
+    key = (marker_id, dictionary, side)
+    patch = _pads.get(key)
+    if patch is None:
+        border = max(2, side // 6)
+        patch = np.full((side + 2 * border, side + 2 * border), 255, dtype=np.uint8)
+        aruco = cv2.aruco
+        patch[border:border + side, border:border + side] = aruco.generateImageMarker(
+            aruco.getPredefinedDictionary(getattr(aruco, dictionary)), marker_id, side)
+        patch = _pads[key] = np.repeat(patch[:, :, None], 3, axis=2)
+    ph, pw = patch.shape[:2]
+    x0 = int(round(center[0] - pw / 2))
+    y0 = int(round(center[1] - ph / 2))
+    h, w = image.shape[:2]
+    x1, y1 = max(x0, 0), max(y0, 0)
+    x2, y2 = min(x0 + pw, w), min(y0 + ph, h)
+    if x1 < x2 and y1 < y2:
+        image[y1:y2, x1:x2] = patch[y1 - y0:y2 - y0, x1 - x0:x2 - x0]
+
+
+def open_capture(address, hw_accel=False):
+    """cv2.VideoCapture (FFmpeg) или SyntheticCapture для synthetic:..."""
+    if address.startswith(SYNTHETIC):
+        return SyntheticCapture.from_address(address)
+    if hw_accel and hasattr(cv2, "CAP_PROP_HW_ACCELERATION"):
+        cap = cv2.VideoCapture(address, cv2.CAP_FFMPEG,
+                               [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY])
+        if cap.isOpened():
+            return cap
+        cap.release()
+    return cv2.VideoCapture(address, cv2.CAP_FFMPEG)
+
+
+def _map(buf, shape, slots):
+    """Заголовок и слоты поверх буфера shared_memory (без копирования)."""
+    header = np.ndarray((HEADER_LEN + 2 * slots,), dtype=np.int64, buffer=buf)
+    frames = np.ndarray((slots,) + shape, dtype=np.uint8, buffer=buf, offset=header.nbytes)
+    return header, frames
+
+
+def _decode_main(shm_name, address, shape, slots, hw_accel, stop):
+    """Дочерний процесс: приём и декодирование → слоты shared_memory."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    header, frames = _map(shm.buf, shape, slots)
+    h, w = shape[:2]
+    cap = None
+    try:
+        cap = open_capture(address, hw_accel)
+        if not cap.isOpened():
+            print(f"[video] cannot open {address}")
+            header[STATE] = FAILED
+            return
+        header[STATE] = RUNNING
+        seq = 0
+        while not stop.is_set():
+            slot = (seq + 1) % slots
+            dst = frames[slot]
+            header[SLOT0 + slot] = -1
+            t0 = time.process_time_ns()
+            ok, image = cap.read(dst)
+            if not ok:
+                header[ERRORS] += 1
+                time.sleep(0.005)
+                continue
+            if image is not dst:
+                # другой размер кадра — приводим к слоту
+                if image.shape[:2] == (h, w):
+                    np.copyto(dst, image)
+                else:
+                    cv2.resize(image, (w, h), dst=dst)
+            header[CPU_NS] = time.process_time_ns() - t0
+            seq += 1
+            header[SLOT0 + slots + slot] = time.monotonic_ns()
+            header[SLOT0 + slot] = seq
+            header[LATEST] = seq
+        header[STATE] = STOPPED
+    except KeyboardInterrupt:
+        header[STATE] = STOPPED
+    finally:
+        if cap is not None:
+            cap.release()
+        del header, frames
+        shm.close()
+
+
+class ProcessFrameRead:
+    """
+    Замена StreamFrameRead: приём и декодирование в отдельном процессе.
+
+    - .frame — последний готовый кадр (BGR, shape (h, w, 3)) как
+      numpy-представление слота shared_memory, без копирования; на каждый
+      новый кадр — новый объект, как у djitellopy (VideoWorker сравнивает
+      по is); .stamped — (кадр, время) одной парой, время — time.monotonic()
+      в секундах, когда дочерний процесс его декодировал
+    - .seq — номер этого кадра, .frames — сколько всего декодировано,
+      .cpu_ms — процессорное время дочернего процесса на последний кадр,
+      .state — "starting" / "running" / "failed" / "stopped"
+    - stop() останавливает процесс и освобождает shared_memory; к этому
+      моменту потребители (VideoWorker) уже должны быть остановлены
+    """
+
+    def __init__(self, address, size=(960, 720), slots=4, hw_accel=False):
+        self.address = address
+        self.shape = (size[1], size[0], 3)
+        self.slots = max(2, slots)
+        self.hw_accel = hw_accel
+        self.seq = 0
+
+        self._shm = None
+        self._header = None
+        self._frames = None
+        self._stamped = (None, 0.0)
+        self._stop = None
+        self._process = None
+
+    def start(self):
+        if self._process is not None:
+            return
+        nbytes = (HEADER_LEN + 2 * self.slots) * 8 + self.slots * int(np.prod(self.shape))
+        self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._header, self._frames = _map(self._shm.buf, self.shape, self.slots)
+        self._header[:] = 0
+
+        ctx = multiprocessing.get_context("spawn")     # без копии потоков и pygame родителя
+        self._stop = ctx.Event()
+        self._process = ctx.Process(target=_decode_main, name="video-decode", daemon=True,
+                                    args=(self._shm.name, self.address, self.shape, self.slots,
+                                          self.hw_accel, self._stop))
+        self._process.start()
+
+    def stop(self):
+        if self._process is None:
+            return
+        self._stop.set()
+        self._process.join(timeout=2.0)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join(timeout=1.0)
+        self._process = None
+
+        self._stamped = (None, 0.0)
+        self._frames = self._header = None
+        try:
+            self._shm.close()
+        except BufferError:
+            print("[video] shared memory still referenced — leaving it mapped")
+        self._shm.unlink()
+        self._shm = None
+
+    @property
+    def frame(self):
+        return self.stamped[0]
+
+    @property
+    def stamped(self):
+        header = self._header
+        if header is None:
+            return None, 0.0
+        seq = int(header[LATEST])
+        if seq != self.seq:
+            slot = seq % self.slots
+            if header[SLOT0 + slot] == seq:
+                t = header[SLOT0 + self.slots + slot] / 1e9
+                if header[SLOT0 + slot] == seq:      # слот не начали переписывать, пока читали время
+                    self._stamped = (self._frames[slot], t)
+                    self.seq = seq
+        return self._stamped
+
+    @property
+    def frames(self):
+        return 0 if self._header is None else int(self._header[LATEST])
+
+    @property
+    def cpu_ms(self):
+        return 0.0 if self._header is None else self._header[CPU_NS] / 1e6
+
+    @property
+    def state(self):
+        if self._header is None:
+            return "stopped"
+        return STATE_NAMES[int(self._header[STATE])]
+
+
+def add_arguments(parser):
+    parser.add_argument("--decode-process", action="store_true",
+                        help="принимать и декодировать видео в отдельном процессе (shared memory)")
+    parser.add_argument("--video-source", default=None, metavar="ADDR",
+                        help="источник видео вместо Tello: адрес/файл для cv2 или synthetic:[WxH][@FPS][+pad]")
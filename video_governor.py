@@ -0,0 +1,176 @@
+import cv2
+
+
+# ==== адаптивное качество видео Tello по времени цикла ====
+#
+# Кадр цикла with_wideo.py должен укладываться в период clock.tick
+# (max(loop_hz, 2×fps Tello) — по нему уходят rc Tello и снимок каналов
+# для PPM), а поток PPM — держать свой период без джиттера. Видео —
+# самая дорогая и самая необязательная часть кадра, поэтому при нехватке
+# времени VideoGovernor опускает качество показа по ступеням LEVELS,
+# а при запасе — возвращает.
+#
+# Ступень: (имя, масштаб от VIDEO_SIZE, интерполяция cv2.resize,
+# показывать каждый n-й кадр). Меньший кадр FramePresenter растягивает
+# до VIDEO_SIZE — раскладка экрана не меняется.
+#
+# Параметры — секция "video_governor" config.json:
+#   enabled=false — всегда ступень 0 (статистика в HUD всё равно есть)
+#   high / low — p95 времени работы кадра (без сна в clock.tick) в долях
+#     периода цикла: выше high — ступенью грубее, ниже low в течение
+#     restore сек — ступенью лучше
+#   ppm_jitter_ms — p95 джиттера PPM за окно выше этого тоже перегрузка
+#   window — окно оценки, сек; max_level — самая грубая ступень
+#   backoff — сколько сек не возвращаться на ступень, которая не помогла
+#
+# Перегрузка не всегда из-за видео (джиттер PPM бывает и от ОС), поэтому
+# шаг вниз проверяется по level_ms: если ступень не сократила среднее
+# время кадра хотя бы на MIN_GAIN, через restore сек governor возвращается
+# на ступень выше и backoff сек туда не спускается. Так же держится
+# ступень, с которой пришлось уйти сразу после повышения (без качелей).
+
+LEVELS = (
+    ("full", 1.0, cv2.INTER_AREA, 1),
+    ("nearest", 1.0, cv2.INTER_NEAREST, 1),
+    ("3/4", 0.75, cv2.INTER_NEAREST, 1),
+    ("1/2", 0.5, cv2.INTER_NEAREST, 1),
+    ("1/2 fps/2", 0.5, cv2.INTER_NEAREST, 2),
+    ("1/2 fps/3", 0.5, cv2.INTER_NEAREST, 3),
+)
+
+MIN_GAIN = 0.1           # доля времени кадра, которую должна сэкономить ступень
+
+INTERP_NAMES = {cv2.INTER_AREA: "AREA", cv2.INTER_NEAREST: "NEAREST", cv2.INTER_LINEAR: "LINEAR"}
+
+
+def level_format(level, size):
+    """Ступень → (size, interpolation, every) для VideoWorker.set_format."""
+    _, scale, interp, every = LEVELS[level]
+    w, h = size
+    return (int(w * scale), int(h * scale)), interp, every
+
+
+class VideoGovernor:
+    """
+    Выбор ступени качества видео по загрузке цикла.
+
+    - frame(work_ns, now) — раз за кадр цикла: сколько длилась работа
+      кадра; решение принимается раз в window, True — ступень сменилась
+      и пора вызвать VideoWorker.set_format(*governor.format())
+    - ppm_jitter — функция без аргументов → p95 джиттера PPM за окно, мс
+      (PpmSender.recent_jitter_ms); None — только время цикла
+    - level_ms — средняя длительность кадра на каждой ступени (EWMA по
+      окнам): HUD показывает, сколько текущая ступень экономит против full
+    - status() — строка для HUD
+    """
+
+    def __init__(self, period_s, cfg=None, size=(640, 360), ppm_jitter=None):
+        cfg = cfg or {}
+        self.period_ns = int(period_s * 1e9)
+        self.size = size
+        self.ppm_jitter = ppm_jitter
+        self.enabled = cfg.get("enabled", True)
+        self.high = cfg.get("high", 0.7)
+        self.low = cfg.get("low", 0.4)
+        self.restore = cfg.get("restore", 2.0)
+        self.ppm_jitter_ms = cfg.get("ppm_jitter_ms", 2.0)
+        self.window = cfg.get("window", 0.5)
+        self.backoff = cfg.get("backoff", 30.0)
+        self.max_level = max(0, min(cfg.get("max_level", len(LEVELS) - 1), len(LEVELS) - 1))
+
+        self.level = 0
+        self.changes = 0                  # сколько раз ступень менялась
+        self.level_ms = [None] * len(LEVELS)
+        self.p95_ms = 0.0                 # за последнее окно
+        self.load = 0.0                   # p95 / период
+        self.ppm_ms = 0.0
+
+        self._samples = []
+        self._window_start = None
+        self._calm_since = None
+        self._changed_at = None
+        self._direction = 0
+        self._hold_until = [0.0] * len(LEVELS)
+
+    def format(self):
+        return level_format(self.level, self.size)
+
+    def frame(self, work_ns, now):
+        self._samples.append(work_ns)
+        if self._window_start is None:
+            self._window_start = now
+        if now - self._window_start < self.window:
+            return False
+        self._window_start = now
+
+        samples = sorted(self._samples)
+        self._samples.clear()
+        n = len(samples)
+        p95 = samples[min(n - 1, int(0.95 * n))]
+        mean_ms = sum(samples) / n / 1e6
+        self.p95_ms = p95 / 1e6
+        self.load = p95 / self.period_ns
+        self.ppm_ms = self.ppm_jitter() if self.ppm_jitter is not None else 0.0
+
+        old = self.level_ms[self.level]
+        self.level_ms[self.level] = mean_ms if old is None else old * 0.7 + mean_ms * 0.3
+
+        if not self.enabled:
+            return False
+        if self.load > self.high or self.ppm_ms > self.ppm_jitter_ms:
+            self._calm_since = None
+            if self.gain() is not False:
+                return self._set(self.level + 1, now)
+            if now - self._changed_at >= self.restore:
+                # ступень не помогла — назад, и сюда пока не спускаться
+                self._hold_until[self.level] = now + self.backoff
+                return self._set(self.level - 1, now)
+            return False
+        if self.load >= self.low:
+            self._calm_since = None
+            return False
+        if self._calm_since is None:
+            self._calm_since = now
+        elif now - self._calm_since >= self.restore:
+            self._calm_since = now       # следующая ступень — снова после restore
+            return self._set(self.level - 1, now)
+        return False
+
+    def gain(self):
+        """Сэкономила ли текущая ступень время кадра против предыдущей (None — не с чем сравнить)."""
+        if self.level == 0:
+            return None
+        prev, cur = self.level_ms[self.level - 1], self.level_ms[self.level]
+        if prev is None or cur is None:
+            return None
+        return cur <= prev * (1.0 - MIN_GAIN)
+
+    def _set(self, level, now):
+        level = max(0, min(self.max_level, level))
+        if level == self.level or now < self._hold_until[level]:
+            return False
+        direction = 1 if level > self.level else -1
+        if (self._changed_at is not None and direction != self._direction
+                and now - self._changed_at < self.restore):
+            self._hold_until[self.level] = now + self.backoff    # только что пришли — и уже уходим
+        print(f"[video] quality {LEVELS[self.level][0]} → {LEVELS[level][0]} "
+              f"(loop p95 {self.p95_ms:.1f} ms, PPM jitter {self.ppm_ms:.2f} ms)")
+        self.level = level
+        self.changes += 1
+        self._changed_at = now
+        self._direction = direction
+        return True
+
+    def status(self):
+        name = LEVELS[self.level][0]
+        (w, h), interp, every = self.format()
+        text = (f"Video: {name} {w}x{h} {INTERP_NAMES.get(interp, interp)}"
+                f"{f' 1/{every}' if every > 1 else ''}"
+                f"{'' if self.enabled else ' [fixed]'} | loop p95 {self.p95_ms:.1f}/"
+                f"{self.period_ns / 1e6:.1f} ms | PPM jitter {self.ppm_ms:.2f} ms")
+        full, now = self.level_ms[0], self.level_ms[self.level]
+        if self.level and full is not None and now is not None:
+            text += f" | frame {full:.1f} → {now:.1f} ms"
+            if self.gain() is False:
+                text += " (no gain)"
+        return text
@@ -0,0 +1,396 @@
+import collections
+import os
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+
+# ==== запись видео Tello без перекодирования ====
+#
+# Поток Tello (UDP 11111, H.264 Annex B) перехватывает VideoTap: пакеты
+# идут дальше на relay-порт, откуда их декодирует StreamFrameRead, а
+# копия уходит в VideoRecorder. Recorder в своём потоке дописывает
+# пакеты как есть в <base>.h264 и строит индекс кадров <base>.idx.
+#
+# Индекс — массив записей по 32 байта (np.memmap, как flight_log):
+#   offset  u64  смещение начала кадра (access unit) в .h264
+#   pts_ns  i64  номер кадра × 1e9 / fps (в потоке Tello своих PTS нет)
+#   t_ns    i64  приход первого пакета кадра, нс от начала записи
+#   size    u32  байт в кадре (со стартовыми кодами)
+#   flags   u16  FLAG_KEY — есть IDR, FLAG_SPS — есть SPS/PPS
+#   nals    u16  NAL-единиц в кадре
+# Запись 0 — заголовок: offset = MAGIC, pts_ns = fps × 1000,
+# t_ns = time.time_ns() старта, size = VERSION. Часы записи — те же,
+# что у FlightRecorder (perf_counter_ns), а время старта обоих файлов
+# в заголовке — так кадр находится по времени журнала полёта (to_flight_ns).
+
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("pts_ns", "<i8"), ("t_ns", "<i8"),
+                        ("size", "<u4"), ("flags", "<u2"), ("nals", "<u2")])
+MAGIC = struct.unpack("<Q", b"H264IDX\0")[0]
+VERSION = 1
+
+FLAG_KEY = 1
+FLAG_SPS = 2
+
+NAL_SLICE = 1
+NAL_IDR = 5
+NAL_SEI = 6
+NAL_SPS = 7
+NAL_PPS = 8
+NAL_AUD = 9
+_AU_START = (NAL_SEI, NAL_SPS, NAL_PPS, NAL_AUD)    # начинают новый кадр, если в текущем уже есть срез
+
+RELAY_PORT = 11112
+
+
+class NalIndexer:
+    """
+    Разбор Annex B по пакетам: стартовые коды ищутся bytes.find (в C),
+    на стыке пакетов — с хвостом из 5 байт предыдущего. NAL разбирается
+    в том пакете, где лежит байт после его заголовка (нужен срезу:
+    first_mb_in_slice), — ровно один раз, даже если стартовый код
+    разрезан между пакетами. Законченный кадр → кортеж для индекса.
+    """
+
+    def __init__(self, fps=30):
+        self.period_ns = int(1e9 / fps)
+        self.frames = 0
+        self._tail = b""
+        self._au = None             # [offset, t_ns, flags, nals, has_slice]
+
+    def feed(self, data, offset, t_ns, out):
+        """data лежит в файле с offset; закрытые кадры дописываются в out."""
+        buf = self._tail + data
+        base = offset - len(self._tail)
+        head = len(self._tail)
+        p = buf.find(b"\x00\x00\x01")
+        while p != -1:
+            h = p + 3
+            if h + 1 >= len(buf):
+                break                   # заголовок NAL дочитаем со следующим пакетом
+            if h + 1 >= head:
+                start = p - 1 if p > 0 and buf[p - 1] == 0 else p
+                # первый срез кадра: first_mb_in_slice = 0 → старший бит байта после заголовка
+                self._nal(buf[h] & 0x1F, buf[h + 1] & 0x80, base + start, t_ns, out)
+            p = buf.find(b"\x00\x00\x01", h)
+        self._tail = buf[-5:]
+
+    def _nal(self, nal, first, pos, t_ns, out):
+        au = self._au
+        vcl = nal in (NAL_SLICE, NAL_IDR)
+        if au is None or (au[4] and (nal in _AU_START or (vcl and first))):
+            if au is not None:
+                self._close(pos, out)
+            au = self._au = [pos, t_ns, 0, 0, False]
+        au[3] += 1
+        if nal == NAL_IDR:
+            au[2] |= FLAG_KEY
+        elif nal in (NAL_SPS, NAL_PPS):
+            au[2] |= FLAG_SPS
+        if vcl:
+            au[4] = True
+
+    def _close(self, end, out):
+        offset, t_ns, flags, nals, _ = self._au
+        out.append((offset, self.frames * self.period_ns, t_ns, end - offset, flags, min(nals, 0xFFFF)))
+        self.frames += 1
+        self._au = None
+
+    def finish(self, end, out):
+        """Конец записи: последний кадр закрывается концом файла."""
+        if self._au is not None and self._au[4]:
+            self._close(end, out)
+
+
+class VideoRecorder:
+    """
+    Запись сырого H.264 + индекс кадров в фоне.
+
+    - packet(data, t_ns) только кладёт пакет в deque — вызывается из
+      потока VideoTap, UI-цикл в записи не участвует вообще
+    - поток записи раз в flush_interval пишет накопленные пакеты одним
+      write, прогоняет их через NalIndexer и дописывает индекс
+    - sample_hz > 0 и frame_read — раз в 1/sample_hz сек последний
+      декодированный кадр (frame_read.frame, уже готовый для показа)
+      сохраняется в <base>_frames/<t_ns>.jpg; своего декодирования нет
+    """
+
+    def __init__(self, base, fps=30, clock=time.perf_counter_ns, flush_interval=0.25,
+                 frame_read=None, sample_hz=0.0, jpeg_quality=85):
+        self.base = base
+        self.clock = clock
+        self.flush_interval = flush_interval
+        self.frame_read = frame_read
+        self.sample_hz = sample_hz
+        self.jpeg_quality = jpeg_quality
+        self.fps = fps
+
+        self.packets = 0
+        self.written_bytes = 0
+        self.frames = 0
+        self.samples = 0
+
+        self._indexer = NalIndexer(fps)
+        self._queue = collections.deque()
+        self._f = None
+        self._idx = None
+        self._t0 = 0
+        self._running = False
+        self._threads = []
+        self._wake = threading.Event()
+
+    def start(self):
+        if self._running:
+            return
+        self._f = open(self.base + ".h264", "wb")
+        self._idx = open(self.base + ".idx", "wb")
+        self._t0 = self.clock()
+        header = np.zeros(1, dtype=INDEX_DTYPE)
+        header[0] = (MAGIC, int(self.fps * 1000), time.time_ns(), VERSION, 0, 0)
+        self._idx.write(header.tobytes())
+        self._running = True
+        self._threads = [threading.Thread(target=self._run, name="video-rec", daemon=True)]
+        if self.sample_hz > 0 and self.frame_read is not None:
+            os.makedirs(self.base + "_frames", exist_ok=True)
+            self._threads.append(threading.Thread(target=self._sample_loop, name="video-sample", daemon=True))
+        for t in self._threads:
+            t.start()
+        print(f"[video] recording → {self.base}.h264")
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout=2.0)
+        self._threads = []
+        self._drain()
+        out = []
+        self._indexer.finish(self.written_bytes, out)
+        self._write_index(out)
+        self._f.close()
+        self._idx.close()
+        print(f"[video] {self.frames} frames, {self.written_bytes / 1e6:.1f} MB → {self.base}.h264")
+
+    def packet(self, data, t_ns=None):
+        if self._running:
+            self._queue.append((self.clock() if t_ns is None else t_ns, data))
+
+    # --- поток записи ---
+
+    def _run(self):
+        while self._running:
+            self._wake.wait(self.flush_interval)
+            self._drain()
+
+    def _drain(self):
+        queue = self._queue
+        n = len(queue)
+        if not n:
+            return
+        chunks = []
+        out = []
+        offset = self.written_bytes
+        for _ in range(n):
+            t_ns, data = queue.popleft()
+            self._indexer.feed(data, offset, t_ns - self._t0, out)
+            chunks.append(data)
+            offset += len(data)
+        self._f.write(b"".join(chunks))
+        self.written_bytes = offset
+        self.packets += n
+        self._write_index(out)
+
+    def _write_index(self, out):
+        if out:
+            self._idx.write(np.array(out, dtype=INDEX_DTYPE).tobytes())
+            self.frames += len(out)
+
+    # --- выборка декодированных кадров ---
+
+    def _sample_loop(self):
+        import cv2
+
+        period = 1.0 / self.sample_hz
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        last = None
+        while self._running:
+            time.sleep(period)
+            frame = self.frame_read.frame
+            if frame is None or frame is last:
+                continue
+            last = frame
+            t_ns = self.clock() - self._t0
+            cv2.imwrite(os.path.join(self.base + "_frames", f"{t_ns:015d}.jpg"), frame, params)
+            self.samples += 1
+
+
+class VideoTap:
+    """
+    Перехват UDP-видео Tello: пакет → recorder.packet() и дальше на relay
+    (127.0.0.1:relay_port), откуда его читает StreamFrameRead. Поток
+    только принимает и пересылает — без разбора и копий сверх одного
+    bytes на пакет.
+    """
+
+    def __init__(self, recorder, port=11111, relay_port=RELAY_PORT):
+        self.recorder = recorder
+        self.port = port
+        self.relay = ("127.0.0.1", relay_port)
+        self.address = f"udp://@127.0.0.1:{relay_port}"     # для StreamFrameRead
+        self._sock = None
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self._running:
+            return
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        self._sock.bind(("", self.port))
+        self._sock.settimeout(0.5)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="video-tap", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _run(self):
+        sock = self._sock
+        recorder = self.recorder
+        while self._running:
+            try:
+                data = sock.recv(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            recorder.packet(data)
+            try:
+                sock.sendto(data, self.relay)
+            except OSError:
+                pass
+
+
+# === чтение записи ===
+
+def load_index(base):
+    """(заголовок, кадры) — кадры np.memmap без загрузки в память."""
+    path = base + ".idx"
+    n = os.path.getsize(path) // INDEX_DTYPE.itemsize
+    if n == 0:
+        raise ValueError(f"{path}: пустой индекс")
+    recs = np.memmap(path, dtype=INDEX_DTYPE, mode="r", shape=(n,))
+    head = recs[0]
+    if int(head["offset"]) != MAGIC:
+        raise ValueError(f"{path}: не индекс видео")
+    if int(head["size"]) > VERSION:
+        raise ValueError(f"{path}: версия {int(head['size'])}, поддерживается до {VERSION}")
+    return head, recs[1:]
+
+
+def seek(frames, t_ns, key=True):
+    """
+    Номер кадра, показанного в момент t_ns (последний пришедший не
+    позже t_ns); key=True — ближайший ключевой не позже него, с
+    которого можно начинать декодирование.
+    """
+    i = max(int(np.searchsorted(frames["t_ns"], t_ns, side="right")) - 1, 0)
+    if key:
+        keys = np.flatnonzero(frames["flags"][:i + 1] & FLAG_KEY)
+        if len(keys):
+            i = int(keys[-1])
+    return i
+
+
+def read_frames(base, frames, first, last):
+    """Байты кадров first..last включительно — готовый кусок Annex B."""
+    start = int(frames["offset"][first])
+    end = int(frames["offset"][last]) + int(frames["size"][last])
+    with open(base + ".h264", "rb") as f:
+        f.seek(start)
+        return f.read(end - start)
+
+
+def extract_frame(base, t_ns):
+    """
+    Декодированный кадр (BGR) на момент t_ns: от ключевого кадра до
+    нужного во временный .h264, декодирует cv2 (FFmpeg). None — не вышло.
+    """
+    import tempfile
+    import cv2
+
+    _, frames = load_index(base)
+    target = seek(frames, t_ns, key=False)
+    key = seek(frames, t_ns, key=True)
+    data = read_frames(base, frames, key, target)
+    with tempfile.NamedTemporaryFile(suffix=".h264", delete=False) as tmp:
+        tmp.write(data)
+    try:
+        cap = cv2.VideoCapture(tmp.name, cv2.CAP_FFMPEG)
+        frame = None
+        for _ in range(target - key + 1):
+            ok, img = cap.read()
+            if not ok:
+                break
+            frame = img
+        cap.release()
+    finally:
+        os.unlink(tmp.name)
+    return frame
+
+
+def to_flight_ns(head, flight_recs, t_ns):
+    """Время кадра (t_ns записи видео) → t_ns журнала полёта (flight_log.load)."""
+    return t_ns + int(head["t_ns"]) - int(flight_recs[0]["t_ns"])
+
+
+def summary(base):
+    head, frames = load_index(base)
+    n = len(frames)
+    duration = (int(frames["t_ns"][-1]) - int(frames["t_ns"][0])) / 1e9 if n else 0.0
+    return {
+        "frames": n,
+        "keyframes": int(np.count_nonzero(frames["flags"] & FLAG_KEY)),
+        "duration_s": duration,
+        "fps_nominal": int(head["pts_ns"]) / 1000,
+        "fps_measured": (n - 1) / duration if duration > 0 else 0.0,
+        "bytes": int(frames["offset"][-1]) + int(frames["size"][-1]) if n else 0,
+        "started": int(head["t_ns"]) / 1e9,
+    }
+
+
+def add_arguments(parser):
+    parser.add_argument("--record-video", default=None, metavar="BASE",
+                        help="запись видео Tello: BASE.h264 + индекс кадров BASE.idx")
+    parser.add_argument("--video-sample-hz", type=float, default=None,
+                        help="сохранять декодированный кадр N раз в секунду (BASE_frames/*.jpg)")
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Сводка по записи видео Tello")
+    parser.add_argument("base", help="путь без расширения (как --record-video)")
+    parser.add_argument("--at", type=float, default=None, help="сохранить кадр на N-й секунде в BASE_at.png")
+    args = parser.parse_args()
+    print(json.dumps(summary(args.base), indent=2, ensure_ascii=False))
+    if args.at is not None:
+        import cv2
+        img = extract_frame(args.base, int(args.at * 1e9))
+        if img is None:
+            print("[video] кадр не декодирован")
+        else:
+            cv2.imwrite(args.base + "_at.png", img)
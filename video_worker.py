@@ -0,0 +1,185 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+import pygame
+
+from video_decode import open_capture
+
+
+TELLO_VIDEO_ADDRESS = "udp://@0.0.0.0:11111"
+
+
+class StreamFrameRead:
+    """
+    Приём и декодирование видеопотока Tello (cv2.VideoCapture / FFmpeg)
+    в отдельном потоке. Как и у djitellopy, последний кадр (BGR) лежит
+    в .frame — на каждый декодированный кадр новый массив; .stamped —
+    (кадр, время) одной парой: время — time.monotonic(), когда кадр
+    декодирован (часы цикла управления).
+    Адрес и hw_accel — как у video_decode.open_capture (там же synthetic:);
+    тот же приём в отдельном процессе — video_decode.ProcessFrameRead.
+    """
+
+    def __init__(self, address=TELLO_VIDEO_ADDRESS, hw_accel=False):
+        self.address = address
+        self.hw_accel = hw_accel
+        self.stamped = (None, 0.0)
+        self._running = False
+        self._thread = None
+
+    @property
+    def frame(self):
+        return self.stamped[0]
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="video-read", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _run(self):
+        # открытие потока может висеть секундами — поэтому тоже здесь
+        cap = open_capture(self.address, self.hw_accel)
+        if not cap.isOpened():
+            print(f"[video] cannot open {self.address}")
+            self._running = False
+            return
+        while self._running:
+            ok, frame = cap.read()
+            if ok:
+                self.stamped = (frame, time.monotonic())     # кадр и время — одной подменой ссылки
+            else:
+                time.sleep(0.005)
+        cap.release()
+
+
+class VideoWorker:
+    """
+    Подготовка кадров Tello для показа вне основного цикла.
+
+    - поток опрашивает frame_read.frame и обрабатывает только НОВЫЕ кадры
+      (djitellopy кладёт туда новый массив на каждый декодированный кадр)
+    - cv2.resize пишет прямо в заранее выделенный буфер (dst=); цвет
+      остаётся BGR. У каждого буфера своя постоянная pygame.Surface поверх
+      его памяти (pygame.image.frombuffer(..., "BGR")) — UI получает
+      готовую Surface без копирования пикселей, каналы переставит blit
+    - set_format(size, interpolation, every) — из UI (VideoGovernor):
+      размер, интерполяция и прореживание (обрабатывается каждый every-й
+      кадр) меняются со следующего кадра; буфер другого размера (и его
+      Surface) перевыделяется, когда до него дойдёт очередь записи
+    - тройная буферизация: back (пишет поток) / ready / front (читает UI);
+      UI всегда получает последний готовый кадр, устаревшие просто
+      перезаписываются — очереди нет
+    """
+
+    def __init__(self, frame_read, size=(640, 360), poll_interval=0.003):
+        self.frame_read = frame_read
+        self.size = size
+        self.poll_interval = poll_interval
+        self._format = (size, cv2.INTER_LINEAR, 1)
+
+        self._buffers = [None] * 3
+        self._surfaces = [None] * 3
+        for i in range(3):
+            self._alloc(i, size)
+        self._back, self._ready, self._front = 0, 1, 2
+
+        self._lock = threading.Lock()
+        self._fresh = False
+        self._ready_seq = 0
+        self._front_seq = 0
+
+        self.frames_seen = 0      # сколько новых кадров пришло
+        self.frames_in = 0        # сколько из них обработано (после прореживания)
+        self.frames_shown = 0     # сколько из них забрал UI
+        self.convert_ms = 0.0     # время последней конвертации
+
+        self._running = False
+        self._thread = None
+
+    # --- публичный API ---
+
+    def start(self):
+        if self.frame_read is None or self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="video-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def set_format(self, size, interpolation=cv2.INTER_LINEAR, every=1):
+        # кортеж подменяется одной ссылкой — поток читает его целиком
+        self._format = (size, interpolation, max(1, every))
+        self.size = size
+
+    def latest(self):
+        """
+        Вызывается из UI: (seq, Surface) последнего готового кадра
+        или (0, None), если кадров ещё не было. Surface (и буфер под ней)
+        принадлежит UI до следующего вызова latest().
+        """
+        with self._lock:
+            if self._fresh:
+                self._front, self._ready = self._ready, self._front
+                self._front_seq = self._ready_seq
+                self._fresh = False
+                self.frames_shown += 1
+        if self._front_seq == 0:
+            return 0, None
+        return self._front_seq, self._surfaces[self._front]
+
+    def _alloc(self, i, size):
+        w, h = size
+        buf = self._buffers[i] = np.empty((h, w, 3), dtype=np.uint8)
+        self._surfaces[i] = pygame.image.frombuffer(buf, size, "BGR")
+        return buf
+
+    # --- поток ---
+
+    def _run(self):
+        last = None
+        while self._running:
+            try:
+                frame = self.frame_read.frame
+            except Exception:
+                frame = None
+
+            if frame is None or frame is last:
+                time.sleep(self.poll_interval)
+                continue
+            last = frame
+            self.frames_seen += 1
+            size, interpolation, every = self._format
+            if self.frames_seen % every:
+                continue
+
+            t0 = time.perf_counter()
+            back = self._buffers[self._back]
+            if back.shape[1] != size[0] or back.shape[0] != size[1]:
+                back = self._alloc(self._back, size)
+            try:
+                cv2.resize(frame, size, dst=back, interpolation=interpolation)
+            except Exception as e:
+                print(f"[video] convert error: {e}")
+                continue
+            self.convert_ms = (time.perf_counter() - t0) * 1000.0
+            self.frames_in += 1
+
+            with self._lock:
+                self._back, self._ready = self._ready, self._back
+                self._ready_seq = self.frames_in
+                self._fresh = True
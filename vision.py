@@ -0,0 +1,392 @@
+import importlib
+import math
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+import pygame
+
+from loop_profiler import RingStats
+
+
+# ==== компьютерное зрение по видео Tello вне цикла управления ====
+#
+# Обработчики (VisionPlugin) работают в пуле потоков VisionPool. Каждый
+# берёт ПОСЛЕДНИЙ кадр frame_read (StreamFrameRead / ProcessFrameRead):
+# пропущенные кадры не догоняются, очереди кадров нет. Пока обработчик
+# занят, другие потоки его не берут — состояние (трекер) можно хранить
+# в самом обработчике. cv2 отпускает GIL в тяжёлых функциях, поэтому
+# цикл pygame и поток PPM это почти не задевает.
+#
+# Результат (VisionResult) несёт время кадра — когда его декодировал
+# frame_read (frame_read.stamped, часы цикла управления, time.monotonic) —
+# и время обработки.
+# Результат старше max_age от времени кадра не публикуется, а result()
+# не отдаёт устаревший — автоматика работает только по свежим данным.
+# Координаты в результатах — доли кадра 0..1: им всё равно, в каком
+# разрешении работал обработчик и в каком кадр показан.
+#
+# Параметры — секция "vision" config.json:
+#   workers, max_age (сек), plugins: {имя: {"type": "aruco" | "blob"
+#   | "модуль:Класс", "enabled": true, ...аргументы конструктора}}
+
+
+class VisionResult:
+    """Результат обработчика по одному кадру; data — None, если ничего не найдено."""
+
+    __slots__ = ("name", "seq", "t", "done_t", "proc_ms", "data")
+
+    def __init__(self, name, seq, t, done_t, proc_ms, data):
+        self.name = name
+        self.seq = seq            # номер кадра в пуле
+        self.t = t                # время кадра
+        self.done_t = done_t      # когда обработан
+        self.proc_ms = proc_ms
+        self.data = data
+
+    def age(self, now):
+        return now - self.t
+
+
+class VisionPlugin:
+    """
+    Базовый обработчик кадров.
+
+    - name — ключ результата в пуле
+    - width — до какой ширины пул уменьшает кадр перед process()
+      (пропорции сохраняются); None — кадр как есть
+    - process(frame) → данные результата (координаты в долях кадра) или None
+    - draw(screen, data, rect, font) — оверлей поверх кадра, показанного в rect
+    """
+
+    name = "plugin"
+    width = None
+
+    def process(self, frame):
+        raise NotImplementedError
+
+    def draw(self, screen, data, rect, font):
+        pass
+
+    def summary(self, data):
+        """Короткая подпись результата для HUD."""
+        return "-" if data is None else "ok"
+
+
+class Marker:
+    __slots__ = ("id", "center", "side", "corners")
+
+    def __init__(self, id, center, side, corners):
+        self.id = id
+        self.center = center      # (x, y) в долях кадра
+        self.side = side          # средняя сторона, доля ширины кадра
+        self.corners = corners    # (4, 2) в долях кадра
+
+
+class ArucoPlugin(VisionPlugin):
+    """
+    Маркеры ArUco / AprilTag (cv2.aruco) → кортеж Marker.
+    dictionary — имя словаря cv2.aruco (DICT_4X4_50, DICT_APRILTAG_36h11, ...),
+    ids — учитывать только эти id (None — все).
+    """
+
+    def __init__(self, name="aruco", width=480, dictionary="DICT_4X4_50", ids=None):
+        self.name = name
+        self.width = width
+        self.ids = set(ids) if ids else None
+        aruco = cv2.aruco
+        self._dictionary = aruco.getPredefinedDictionary(getattr(aruco, dictionary))
+        self._params = aruco.DetectorParameters()
+        if hasattr(aruco, "ArucoDetector"):
+            self._detector = aruco.ArucoDetector(self._dictionary, self._params)
+        else:
+            self._detector = None           # OpenCV < 4.7
+        self._gray = None
+
+    def detect(self, gray):
+        if self._detector is not None:
+            corners, ids, _ = self._detector.detectMarkers(gray)
+        else:
+            corners, ids, _ = cv2.aruco.detectMarkers(gray, self._dictionary, parameters=self._params)
+        return corners, ids
+
+    def process(self, frame):
+        h, w = frame.shape[:2]
+        if self._gray is None or self._gray.shape != (h, w):
+            self._gray = np.empty((h, w), dtype=np.uint8)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        corners, ids = self.detect(gray)
+        if ids is None:
+            return None
+        scale = np.array((w, h), dtype=np.float64)
+        markers = []
+        for c, marker_id in zip(corners, ids.ravel()):
+            if self.ids is not None and marker_id not in self.ids:
+                continue
+            pts = c.reshape(4, 2) / scale
+            cx, cy = pts.mean(axis=0)
+            side = math.sqrt(abs(cv2.contourArea(c.reshape(4, 2)))) / w
+            markers.append(Marker(int(marker_id), (float(cx), float(cy)), side, pts))
+        return tuple(markers) or None
+
+    def draw(self, screen, data, rect, font):
+        for m in data:
+            pts = [(rect.x + x * rect.w, rect.y + y * rect.h) for x, y in m.corners]
+            pygame.draw.lines(screen, (0, 255, 0), True, pts, 2)
+            cx, cy = rect.x + m.center[0] * rect.w, rect.y + m.center[1] * rect.h
+            screen.blit(font.render(f"id {m.id}", True, (0, 255, 0)), (cx + 6, cy - 10))
+
+    def summary(self, data):
+        if data is None:
+            return "no marker"
+        return "ids " + ",".join(str(m.id) for m in data)
+
+
+class Blob:
+    __slots__ = ("center", "area", "box")
+
+    def __init__(self, center, area, box):
+        self.center = center      # (x, y) в долях кадра
+        self.area = area          # доля площади кадра
+        self.box = box            # (x, y, w, h) в долях кадра
+
+
+class ColorBlobPlugin(VisionPlugin):
+    """
+    Самое большое пятно цвета в диапазоне HSV (cv2.inRange +
+    connectedComponentsWithStats) → Blob. min_area — доля площади кадра.
+    """
+
+    def __init__(self, name="blob", width=320, hsv_low=(0, 120, 80), hsv_high=(10, 255, 255),
+                 min_area=0.002):
+        self.name = name
+        self.width = width
+        self.low = np.array(hsv_low, dtype=np.uint8)
+        self.high = np.array(hsv_high, dtype=np.uint8)
+        self.min_area = min_area
+        self._hsv = None
+        self._mask = None
+
+    def process(self, frame):
+        h, w = frame.shape[:2]
+        if self._hsv is None or self._hsv.shape[:2] != (h, w):
+            self._hsv = np.empty((h, w, 3), dtype=np.uint8)
+            self._mask = np.empty((h, w), dtype=np.uint8)
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=self._hsv)
+        mask = cv2.inRange(hsv, self.low, self.high, dst=self._mask)
+        n, _, stats, centroids = cv2.connectedComponentsWithStats(mask)
+        if n < 2:
+            return None
+        best = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+        area = stats[best, cv2.CC_STAT_AREA] / float(w * h)
+        if area < self.min_area:
+            return None
+        x, y, bw, bh = stats[best, :4]
+        cx, cy = centroids[best]
+        return Blob((float(cx) / w, float(cy) / h), float(area), (x / w, y / h, bw / w, bh / h))
+
+    def draw(self, screen, data, rect, font):
+        x, y, w, h = data.box
+        pygame.draw.rect(screen, (255, 200, 0),
+                         (rect.x + x * rect.w, rect.y + y * rect.h, w * rect.w, h * rect.h), 2)
+        cx, cy = rect.x + data.center[0] * rect.w, rect.y + data.center[1] * rect.h
+        pygame.draw.line(screen, (255, 200, 0), (cx - 8, cy), (cx + 8, cy), 2)
+        pygame.draw.line(screen, (255, 200, 0), (cx, cy - 8), (cx, cy + 8), 2)
+
+    def summary(self, data):
+        return "no blob" if data is None else f"{data.area * 100:.1f}%"
+
+
+PLUGINS = {
+    "aruco": ArucoPlugin,
+    "blob": ColorBlobPlugin,
+}
+
+
+class VisionPool:
+    """
+    Пул потоков для обработчиков кадров.
+
+    - потоки берут свободный обработчик из очереди, дают ему последний
+      кадр, который он ещё не видел, и возвращают его в очередь —
+      каждый обработчик занят не больше чем одним потоком
+    - кадр уменьшается до plugin.width в буфер обработчика (INTER_AREA)
+    - result(name, now) — последний результат, если он не старше max_age;
+      None — нет или устарел
+    - proc_ns[name] — RingStats времени process(); stale[name] — сколько
+      результатов выброшено как устаревшие
+    - overlays(now) / draw(...) — оверлеи только по последним свежим результатам
+    """
+
+    def __init__(self, frame_read, plugins, workers=2, max_age=0.3, clock=time.monotonic,
+                 poll_interval=0.003):
+        self.frame_read = frame_read
+        self.plugins = {p.name: p for p in plugins}
+        self.workers = max(1, workers)
+        self.max_age = max_age
+        self.clock = clock
+        self.poll_interval = poll_interval
+
+        self.results = {}                                  # name → VisionResult
+        self.proc_ns = {name: RingStats(256) for name in self.plugins}
+        self.stale = {name: 0 for name in self.plugins}
+
+        self._idle = queue.Queue()
+        self._seen = {name: 0 for name in self.plugins}    # последний обработанный seq
+        self._buffers = {}
+        self._lock = threading.Lock()
+        self._frame = None
+        self._seq = 0
+        self._t = 0.0
+        self._running = False
+        self._threads = []
+        self._status = None
+        self._status_time = 0.0
+
+    # --- публичный API ---
+
+    def start(self):
+        if self._running or not self.plugins:
+            return
+        self._running = True
+        for plugin in self.plugins.values():
+            self._idle.put(plugin)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"vision-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._running = False
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+        self._frame = None            # не держим кадр (слот shared_memory) после остановки
+        self._idle = queue.Queue()
+
+    def result(self, name, now):
+        r = self.results.get(name)
+        if r is None or r.age(now) > self.max_age:
+            return None
+        return r
+
+    def overlays(self, now):
+        """[(plugin, result)] для свежих результатов с данными."""
+        out = []
+        for name, plugin in self.plugins.items():
+            r = self.result(name, now)
+            if r is not None and r.data is not None:
+                out.append((plugin, r))
+        return out
+
+    def status_lines(self, now, max_age=0.25):
+        """Строка на обработчик: что найдено, возраст, время обработки. Пересчёт не чаще max_age."""
+        if self._status is not None and 0.0 <= now - self._status_time < max_age:
+            return self._status
+        lines = []
+        for name, plugin in self.plugins.items():
+            s = self.proc_ns[name].summary()
+            r = self.results.get(name)
+            if r is None:
+                found = "waiting"
+            elif r.age(now) > self.max_age:
+                found = f"stale {r.age(now) * 1000:.0f}ms"
+            else:
+                found = f"{plugin.summary(r.data)} age {r.age(now) * 1000:.0f}ms"
+            lines.append(f"CV {name}: {found} | proc p50/p95 {s['p50_ms']:.1f}/{s['p95_ms']:.1f} ms"
+                         f" | stale {self.stale[name]}")
+        self._status = lines
+        self._status_time = now
+        return lines
+
+    # --- потоки ---
+
+    def _latest(self):
+        """(seq, t, frame) последнего кадра; t — время кадра от frame_read, seq — номер в пуле."""
+        try:
+            frame, t = self.frame_read.stamped
+        except Exception:
+            frame = None
+        with self._lock:
+            if frame is not None and frame is not self._frame:
+                self._frame = frame
+                self._seq += 1
+                self._t = t
+            return self._seq, self._t, self._frame
+
+    def _run(self):
+        while self._running:
+            try:
+                plugin = self._idle.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            try:
+                if not self._step(plugin):
+                    time.sleep(self.poll_interval)
+            except Exception as e:
+                print(f"[vision] {plugin.name}: {e}")
+                time.sleep(0.1)
+            finally:
+                self._idle.put(plugin)
+
+    def _step(self, plugin):
+        """False — нового кадра для обработчика нет."""
+        name = plugin.name
+        seq, t, frame = self._latest()
+        if frame is None or seq == self._seen[name]:
+            return False
+        self._seen[name] = seq
+        if self.clock() - t > self.max_age:
+            self.stale[name] += 1           # поток видео стоит — старый кадр не обрабатываем
+            return True
+
+        t0 = time.perf_counter_ns()
+        if plugin.width is not None and frame.shape[1] != plugin.width:
+            h, w = frame.shape[:2]
+            size = (plugin.width, max(1, round(h * plugin.width / w)))
+            buf = self._buffers.get(name)
+            if buf is None or buf.shape[:2] != (size[1], size[0]):
+                buf = self._buffers[name] = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            frame = cv2.resize(frame, size, dst=buf, interpolation=cv2.INTER_AREA)
+        data = plugin.process(frame)
+        proc = time.perf_counter_ns() - t0
+        self.proc_ns[name].add(proc)
+
+        done = self.clock()
+        if done - t > self.max_age:
+            self.stale[name] += 1
+            return True
+        self.results[name] = VisionResult(name, seq, t, done, proc / 1e6, data)
+        return True
+
+
+def draw_overlays(screen, overlays, rect, font):
+    """Оверлеи поверх кадра в rect (после blit кадра)."""
+    for plugin, r in overlays:
+        plugin.draw(screen, r.data, rect, font)
+
+
+def make_plugin(name, spec):
+    kind = spec.get("type", name)
+    if ":" in kind:
+        module, _, cls_name = kind.partition(":")
+        cls = getattr(importlib.import_module(module), cls_name)
+    else:
+        cls = PLUGINS[kind]
+    kwargs = {k: v for k, v in spec.items() if k not in ("type", "enabled")}
+    return cls(name=name, **kwargs)
+
+
+def from_config(frame_read, vision_cfg, clock=time.monotonic):
+    """VisionPool по секции "vision"; обработчики с enabled=false пропускаются."""
+    plugins = [make_plugin(name, spec) for name, spec in vision_cfg.get("plugins", {}).items()
+               if spec.get("enabled", True)]
+    return VisionPool(frame_read, plugins, vision_cfg.get("workers", 2),
+                      vision_cfg.get("max_age", 0.3), clock)
+
+
+def add_arguments(parser):
+    parser.add_argument("--vision", action="store_true",
+                        help="обработчики кадров из секции vision (ArUco, цветное пятно) в пуле потоков")
@@ -1,269 +1,263 @@
 import time
 import pygame
-import serial
-import json, os, sys
 import argparse
 
-from djitellopy import Tello
-import cv2
-
-from autoland import AutoLandController
-from autoback import AutoBackController
+import headless
+import loop_profiler
+import flight_log
+import video_recorder
+import video_decode
+import vision
+import precision_land
+from control_core import load_config, ControlParams, ControlLoop, TelloController
+from control_inputs import KeyboardInput, ScriptedInput
+from control_outputs import PpmOutput, CaptureOutput, connect_tello
+from ppm_protocol import PpmEncoder
+from serial_discovery import discover_port
+from ppm_sender import PpmSender
+from serial_link import SerialLink
+from video_worker import VideoWorker, StreamFrameRead, TELLO_VIDEO_ADDRESS
+from video_decode import ProcessFrameRead
+from frame_presenter import FramePresenter
+from video_governor import VideoGovernor
+from hud import Hud, draw_channel_frames, draw_channels, draw_header, draw_tello_status, draw_lines
+from loop_profiler import LoopProfiler
+import maneuvers
+import tello_missions
+from flight_log import FlightRecorder, RecorderOutput
+from video_recorder import VideoRecorder, VideoTap
 
 
 # === загрузка конфигурации ===
-CONFIG_FILE = "config.json"
-if not os.path.exists(CONFIG_FILE):
-    print(f"[config] Файл {CONFIG_FILE} не найден!")
-    sys.exit(1)
-
-with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-    cfg = json.load(f)
+cfg = load_config()
 
 # ==== применяем параметры ====
 serial_cfg    = cfg.get("serial", {})
-ui_cfg        = cfg.get("ui", {})
-ctrl_cfg      = cfg.get("control", {})
 tello_cfg     = cfg.get("tello", {})
-autoland_cfg  = cfg.get("autoland", {})
-autoback_cfg  = cfg.get("autoback", {})
+maneuver_cfg  = cfg.get("maneuvers", {})
+video_rec_cfg = cfg.get("video_record", {})
+decode_cfg    = cfg.get("video_decode", {})
+PARAMS        = ControlParams(cfg)
 
 CANDIDATE_PORTS = serial_cfg.get("ports", [])
 BAUD            = serial_cfg.get("baud", 115200)
-
-MIN_US    = ctrl_cfg.get("min_us", 1000)
-MID_US    = ctrl_cfg.get("mid_us", 1500)
-MAX_US    = ctrl_cfg.get("max_us", 2000)
-STEP      = ctrl_cfg.get("step", 2)
-FAST_STEP = ctrl_cfg.get("fast_step", 4)
-BUFF_SIZE = ctrl_cfg.get("buff_size", 200)
-
-RETURN_SPEED = ui_cfg.get("return_speed", 25)
-SEND_HZ      = ui_cfg.get("send_hz", 50)
+SERIAL_PROTOCOL = serial_cfg.get("protocol", "auto")      # auto / ascii / bin
+HANDSHAKE_TIMEOUT = serial_cfg.get("handshake_timeout", 2.5)
+PORT_PATTERNS   = serial_cfg.get("patterns", [])                # маски: /dev/ttyUSB* ...
+STATE_FILE      = serial_cfg.get("state_file", ".serial_state.json")  # последний удачный порт
 
 # ---------- настройки Tello из конфига ----------
-TELLO_MANUAL_SPEED     = tello_cfg.get("manual_speed", 40)
-TELLO_AUTO_SPEED       = tello_cfg.get("auto_speed", 30)
-TELLO_AUTO_INTERVAL    = tello_cfg.get("auto_interval", 2.0)
-TELLO_SQUARE_SPEED     = tello_cfg.get("square_speed", 20)
-TELLO_SQUARE_STEP_TIME = tello_cfg.get("square_step_time", 2.0)
 TELLO_FPS              = tello_cfg.get("fps", 20)
 TELLO_SIM_IF_NO_DRONE  = tello_cfg.get("sim_if_no_drone", True)
 
-
-# === вспомогательные функции ===
-def clamp(v, lo=MIN_US, hi=MAX_US):
-    return lo if v < lo else hi if v > hi else v
+VIDEO_SIZE = (640, 360)
 
 
-def is_mid(v):
-    return MID_US - BUFF_SIZE <= v <= MID_US + BUFF_SIZE
+# === вспомогательные функции ===
+def make_frame_read(address, process):
+    """Приём видео: в отдельном процессе (--decode-process / video_decode.process) или в потоке."""
+    hw_accel = decode_cfg.get("hw_accel", False)
+    if process or decode_cfg.get("process", False):
+        size = (decode_cfg.get("width", 960), decode_cfg.get("height", 720))
+        return ProcessFrameRead(address, size, decode_cfg.get("slots", 4), hw_accel)
+    return StreamFrameRead(address, hw_accel)
 
 
-def approach(v, target, delta):
-    if v < target - delta:
-        return v + delta
-    if v > target + delta:
-        return v - delta
-    return target
+def try_open_port():
+    ser, p, proto = discover_port(CANDIDATE_PORTS, BAUD, PORT_PATTERNS,
+                                  SERIAL_PROTOCOL, HANDSHAKE_TIMEOUT, STATE_FILE)
+    if ser is None:
+        print("[serial] no port — running in NO SERIAL mode")
+        return None, "OFF", PpmEncoder()
+    print(f"[serial] connected: {p} ({proto})")
+    return ser, p, PpmEncoder(proto)
+
+
+# === клавиши ===
+BINDINGS = {
+    pygame.K_ESCAPE: ("quit", None),
+    pygame.K_v: ("maneuver", "autoland_fast"),
+    pygame.K_b: ("maneuver", "autoland_slow"),
+    pygame.K_x: ("maneuver", "autoback"),
+    pygame.K_5: ("aux", 4),
+    pygame.K_6: ("aux", 5),
+    pygame.K_7: ("aux", 6),
+    pygame.K_8: ("arm", None),
+    pygame.K_SPACE: ("aux_reset", None),
+    pygame.K_p: ("tello_land", "P"),
+    pygame.K_m: ("tello_mission", "pendulum"),
+    pygame.K_n: ("tello_mission", "square"),
+    pygame.K_i: ("tello_pause", None),
+    pygame.K_t: ("tello_mission", "hold"),
+    pygame.K_z: ("tello_precision_land", None),
+}
 
 
-def next_two(v):
-    """двухпозиционный переключатель: MIN <-> MAX"""
-    return MAX_US if v <= MIN_US + 10 else MIN_US
+# === отрисовка UI ===
+HELP_X = 600
+HELP_Y = 80
+HELP_LINE_H = 22
+
+HELP_LINES = [
+    "TX12 Controls:",
+    "  ←/→ = CH1 (Roll)",
+    "  ↑/↓ = CH2 (Pitch)",
+    "  W/S = CH3 (Throttle)",
+    "  A/D = CH4 (Yaw)",
+    "  5/6/7 = AUX5–7 (2-pos)",
+    "  8 = ARM/DISARM",
+    "  Space = kill AUX",
+    "  V = AutoLand FAST",
+    "  B = AutoLand SLOW",
+    "  X = AutoBack (цикл назад-вперёд)",
+    "",
+    "Tello Controls:",
+    "  CH5 HIGH (при ARM) → Throw&Go / симуляция взлёта.",
+    "  g/j = yaw, y/h = up/down",
+    "  k/; = left/right",
+    "  o/l = forward/back",
+    "  M = авто-маятник (LR)",
+    "  N = маленький квадрат",
+    "  I = пауза / продолжить миссию",
+    "  T = удержание точки (по телеметрии)",
+    "  Z = посадка на маркер (--vision)",
+    "  P = посадка",
+    "",
+]
+
+# манёвры из секции maneuvers с полем key — свои клавиши
+MANEUVER_KEYS = {name: spec["key"] for name, spec in maneuver_cfg.items() if spec.get("key")}
+_first_blank = HELP_LINES.index("")
+HELP_LINES[_first_blank:_first_blank] = [f"  {key.upper()} = {name}" for name, key in MANEUVER_KEYS.items()]
+
+# миссии Tello из секции tello_missions с полем key
+MISSION_KEYS = {name: spec["key"] for name, spec in cfg.get("tello_missions", {}).items() if spec.get("key")}
+_last_blank = len(HELP_LINES) - 1
+HELP_LINES[_last_blank:_last_blank] = [f"  {key.upper()} = миссия {name}" for name, key in MISSION_KEYS.items()]
+
+
+def make_bindings():
+    """BINDINGS + клавиши манёвров и миссий (pygame уже инициализирован)."""
+    bindings = dict(BINDINGS)
+    for name, key in MANEUVER_KEYS.items():
+        bindings[pygame.key.key_code(key)] = ("maneuver", name)
+    for name, key in MISSION_KEYS.items():
+        bindings[pygame.key.key_code(key)] = ("tello_mission", name)
+    return bindings
+
+
+def draw_static(bg, font_small, with_video, status_lines=1):
+    """Всё, что не меняется: рамки и подписи каналов, подсказки."""
+    draw_channel_frames(bg, font_small, PARAMS)
+
+    # при видео подсказки уезжают под кадр и строки статуса видео / CV
+    help_y = VIDEO_STATUS_Y + status_lines * HELP_LINE_H + 6 if with_video else HELP_Y
+    for n, line in enumerate(HELP_LINES):
+        surf = font_small.render(line, True, (200, 200, 200))
+        bg.blit(surf, (HELP_X, help_y + n * HELP_LINE_H))
 
 
-def try_open_port():
-    for p in CANDIDATE_PORTS:
-        try:
-            ser = serial.Serial(p, BAUD, timeout=0)
-            time.sleep(0.2)
-            print(f"[serial] connected: {p}")
-            return ser, p
-        except Exception:
-            continue
-    print("[serial] no port — running in NO SERIAL mode")
-    return None, "OFF"
-
-
-def send_line(ser, ch):
-    if ser is None:
-        return
-    line = ",".join(str(v) for v in ch) + "\n"
-    try:
-        ser.write(line.encode("ascii"))
-    except Exception as e:
-        print(f"[serial] write error: {e}")
+PROFILE_POS = (40, 560)
+VIDEO_STATUS_Y = HELP_Y + VIDEO_SIZE[1] + 6
 
 
-# === отрисовка UI ===
-def draw_ui(screen, font, font_small,
-            ch, fps, portname, ser_connected,
-            tello_connected, tello_simulation, tello_flying,
-            auto_mode, square_mode,
-            tello_lr, tello_fb, tello_ud, tello_yw,
-            video_surface,
-            autoland_mode):
+def draw_video(screen, video_surface, overlays=(), font=None):
+    rect = screen.blit(video_surface, (HELP_X, HELP_Y))
+    if overlays:
+        screen.set_clip(rect)
+        vision.draw_overlays(screen, overlays, rect, font)
+        screen.set_clip(None)
 
-    screen.fill((18, 18, 22))
-    w, h = screen.get_size()
 
-    # =======================
-    #  Верхняя строка статуса
-    # =======================
-    if ser_connected:
-        hdr = font.render(f"Serial: {portname} | FPS: {fps:.0f}", True, (230, 230, 230))
-    else:
-        hdr = font.render("NO SERIAL CONNECTION", True, (255, 70, 70))
-    screen.blit(hdr, (25, 20))
+def draw_ui(hud, loop, fps, link_status, ppm_stats,
+            video_surface, video_seq, video_debug=None, video_status=None, cv=None):
 
-    armed = ch[7] > MID_US
-    arm_text = "ARMED" if armed else "DISARMED"
-    arm_color = (0, 255, 0) if armed else (255, 60, 60)
-    arm_lbl = font.render(arm_text, True, arm_color)
-    screen.blit(arm_lbl, (w - 200, 20))
+    with_video = video_surface is not None
+    cv_lines = cv.status_lines(loop.now) if cv is not None and with_video else ()
+    hud.ensure_background((with_video, len(cv_lines)),
+                          lambda bg: draw_static(bg, hud.font_small, with_video, 1 + len(cv_lines)))
 
-    # =======================
-    #  Левый блок — каналы
-    # =======================
-    left_x = 40
-    top_y = 80
-    bar_w = 460
-    bar_h = 40
-    gap = 18
-
-    for i, v in enumerate(ch):
-        y = top_y + i * (bar_h + gap)
-
-        # рамка
-        pygame.draw.rect(screen, (70, 70, 80), (left_x, y, bar_w, bar_h), 2, border_radius=6)
-
-        # заполнение
-        t = (v - MIN_US) / (MAX_US - MIN_US)
-        fill = int(bar_w * t)
-        pygame.draw.rect(
-            screen, (90, 170, 255),
-            (left_x + 3, y + 3, max(fill - 6, 0), bar_h - 6),
-            border_radius=6
-        )
-
-        # подпись канала
-        label = font_small.render(f"CH{i+1}", True, (230, 230, 240))
-        screen.blit(label, (left_x - 55, y + 8))
-
-        # значение
-        val = font_small.render(str(v), True, (255, 255, 255))
-        screen.blit(val, (left_x + bar_w + 15, y + 8))
-
-        # центральная линия
-        cx = left_x + int(bar_w * (MID_US - MIN_US) / (MAX_US - MIN_US))
-        pygame.draw.line(screen, (110, 110, 130), (cx, y), (cx, y + bar_h), 1)
-
-        # LOW/MID/HIGH для AUX
-        if i >= 4:
-            if v <= MIN_US + 10:
-                state = ("LOW", (255, 120, 120))
-            elif v >= MAX_US - 10:
-                state = ("HIGH", (120, 255, 120))
-            else:
-                state = ("MID", (255, 255, 120))
-            txt = font_small.render(state[0], True, state[1])
-            screen.blit(txt, (left_x - 100, y + 10))
+    draw_header(hud, fps, link_status, ppm_stats, loop.channels.is_armed())
+    draw_channels(hud, loop.channels)
 
     # =======================
-    #   Правый блок — видео + подсказки
+    #   Правый блок — видео (подсказки уже в фоне)
     # =======================
-    help_x = 600
-    line_h = 22
-    help_y_start = 80
-
-    # Видео (если есть кадр)
-    if video_surface is not None:
-        screen.blit(video_surface, (help_x, help_y_start))
-        help_y = help_y_start + video_surface.get_height() + 10
+    if with_video:
+        # оверлеи CV — только по последним свежим результатам, кадр перерисовывается при их смене
+        overlays = cv.overlays(loop.now) if cv is not None else ()
+        hud.widget("video", video_surface.get_rect(topleft=(HELP_X, HELP_Y)),
+                   (video_seq, tuple(r.seq for _, r in overlays)),
+                   draw_video, video_surface, overlays, hud.font_small)
+        if video_status:
+            hud.text("video_status", video_status, (150, 150, 170), (HELP_X, VIDEO_STATUS_Y))
+        draw_lines(hud, "cv", cv_lines, (HELP_X, VIDEO_STATUS_Y + HELP_LINE_H), (150, 200, 150),
+                   HELP_LINE_H, max_lines=4)
+
+    if video_debug:
+        hud.text("video_debug", video_debug, (255, 200, 80), (HELP_X, HELP_Y - 24))
     else:
-        help_y = help_y_start
-
-    help_lines = [
-        "TX12 Controls:",
-        "  ←/→ = CH1 (Roll)",
-        "  ↑/↓ = CH2 (Pitch)",
-        "  W/S = CH3 (Throttle)",
-        "  A/D = CH4 (Yaw)",
-        "  5/6/7 = AUX5–7 (2-pos)",
-        "  8 = ARM/DISARM",
-        "  Space = kill AUX",
-        "  B = AutoLand FAST",
-        "  V = AutoLand SLOW",
-        "  X = AutoBack (цикл назад-вперёд)",
-        "",
-        "Tello Controls:",
-        "  CH5 HIGH (при ARM) → Throw&Go / симуляция взлёта.",
-        "  g/j = yaw, y/h = up/down",
-        "  k/; = left/right",
-        "  o/l = forward/back",
-        "  M = авто-маятник (LR)",
-        "  N = маленький квадрат",
-        "  P = посадка",
-        "",
-    ]
-
-    for n, line in enumerate(help_lines):
-        surf = font_small.render(line, True, (200, 200, 200))
-        screen.blit(surf, (help_x, help_y + n * line_h))
+        hud.hide("video_debug")
 
     # ===========================
     #   Нижняя строка — статус Tello
     # ===========================
-    bottom_y = h - 50
-
-    if tello_connected:
-        t_text = "Tello: CONNECTED"
-        t_color = (0, 255, 0)
-    elif tello_simulation:
-        t_text = "Tello: SIMULATION MODE (NO DRONE)"
-        t_color = (255, 200, 80)
+    bottom_y = hud.screen.get_height() - 50
+    draw_tello_status(hud, loop.tello, bottom_y)
+
+    # ---- активные манёвры большого дрона ----
+    active = loop.maneuvers.active_names()
+    if active:
+        hud.text("maneuvers", "Manoeuvre: " + ", ".join(active), (120, 255, 120), (40, bottom_y + 24))
     else:
-        t_text = "Tello: OFF / NO CONNECTION"
-        t_color = (255, 80, 80)
-
-    screen.blit(font_small.render(t_text, True, t_color), (40, bottom_y))
-
-    flying_color = (0, 220, 0) if tello_flying else (200, 200, 80)
-    screen.blit(font_small.render(f"State: {'FLYING' if tello_flying else 'IDLE'}",
-                                  True, flying_color), (320, bottom_y))
-
-    screen.blit(font_small.render(f"Auto M: {'ON' if auto_mode else 'OFF'}",
-                                  True, (180, 220, 255)), (520, bottom_y))
-
-    screen.blit(font_small.render(f"Square N: {'ON' if square_mode else 'OFF'}",
-                                  True, (180, 220, 255)), (660, bottom_y))
-
-    rc_text = f"TELLO RC: LR={tello_lr} FB={tello_fb} UD={tello_ud} YW={tello_yw}"
-    screen.blit(font_small.render(rc_text, True, (120, 200, 255)), (860, bottom_y))
-
-    # ---- статус автопосадки большого дрона ----
-    if autoland_mode is None:
-        land_txt = "AutoLand: OFF"
-        land_color = (160, 160, 160)
-    elif autoland_mode == "fast":
-        land_txt = "AutoLand: FAST"
-        land_color = (120, 255, 120)
-    else:  # "slow"
-        land_txt = "AutoLand: SLOW"
-        land_color = (255, 220, 120)
-
-    screen.blit(
-        font_small.render(land_txt, True, land_color),
-        (40, bottom_y + 24)
-    )
+        hud.text("maneuvers", "Manoeuvre: OFF", (160, 160, 160), (40, bottom_y + 24))
+
+    if loop.profiler.enabled:
+        draw_lines(hud, "prof", loop.profiler.overlay_lines(), PROFILE_POS)
+
+
+# === автоматика большого дрона: autoland/autoback + манёвры из конфига ===
+def make_maneuvers():
+    return maneuvers.from_config(cfg, PARAMS)
+
+
+# === headless: сценарий вместо клавиатуры, файл вместо serial/Tello ===
+def main_headless(args):
+    headless.init()
+    bindings = make_bindings()
+    if args.script:
+        source = ScriptedInput.load(args.script, bindings)
+    else:
+        source = ScriptedInput([], bindings)
+
+    tello = TelloController(None, args.tello and TELLO_SIM_IF_NO_DRONE, tello_missions.from_config(cfg))
+    capture = CaptureOutput(args.capture, PARAMS.send_hz)
+    prof = LoopProfiler(enabled=args.profile)
+    loop = ControlLoop(PARAMS, source, [capture], tello=tello,
+                       maneuvers=make_maneuvers(), profiler=prof)
+
+    recorder = None
+    if args.record:
+        # журнал во времени цикла — повторяется от прогона к прогону, как capture
+        recorder = FlightRecorder(args.record, clock=lambda: int((loop.now or 0.0) * 1e9))
+        loop.outputs.append(RecorderOutput(recorder, PARAMS.send_hz))
+        recorder.start()
+
+    headless.run(loop, PARAMS.loop_hz, args.realtime, args.duration)
+    capture.close()
+    if recorder is not None:
+        recorder.stop()
+    print(f"[headless] {capture.frames} PPM frames, {capture.tello_commands} Tello RC → {args.capture}")
+    if args.profile:
+        prof.export(args.profile_out)
 
 
 # === основная логика ===
 def main(args):
     # --- serial / PPM ---
-    ser, portname = try_open_port()
-    ser_connected = ser is not None
+    ser, portname, encoder = try_open_port()
+    link = SerialLink(ser, portname, encoder, BAUD, CANDIDATE_PORTS, PORT_PATTERNS,
+                      SERIAL_PROTOCOL, HANDSHAKE_TIMEOUT, STATE_FILE)
 
     pygame.init()
     pygame.display.set_caption("Каналы управления")
@@ -271,391 +265,145 @@ def main(args):
     clock = pygame.time.Clock()
     font = pygame.font.SysFont("DejaVu Sans", 26)
     font_small = pygame.font.SysFont("DejaVu Sans", 18)
+    hud = Hud(screen, font, font_small)
 
     # --- Tello ---
-    drone = None
+    tello_out = None
     frame_read = None
-    tello_connected = False
-    tello_simulation = False
-    tello_flying = False
-    tello_takeoff_time = None
-
-    auto_mode = False
-    auto_dir = 1
-    last_auto_switch = time.time()
-    prev_m_pressed = False
-
-    square_mode = False
-    square_step = 0
-    square_last_switch = time.time()
-    prev_n_pressed = False
-
-    tello_lr = tello_fb = tello_ud = tello_yw = 0
-
+    video_rec = tap = None
     if args.tello:
-        print("[tello] connecting...")
-        try:
-            drone = Tello()
-            drone.connect()
-            try:
-                batt = drone.get_battery()
-                print(f"[tello] battery: {batt}%")
-            except Exception:
-                print("[tello] battery read failed")
-
-            drone.streamon()
-            frame_read = drone.get_frame_read()
-            tello_connected = True
-        except Exception as e:
-            print(f"[tello] connect failed: {e}")
-            drone = None
-            tello_connected = False
-            frame_read = None
-            if TELLO_SIM_IF_NO_DRONE:
-                tello_simulation = True
-                print("[tello] simulation mode enabled (no physical drone)")
+        tello_out = connect_tello(tello_cfg, streamon=True)
+        if tello_out is not None:
+            if args.record_video and not args.video_source:
+                # сырой H.264 пишется до декодирования: tap → файл, tap → relay → StreamFrameRead
+                sample_hz = args.video_sample_hz
+                if sample_hz is None:
+                    sample_hz = video_rec_cfg.get("sample_hz", 0.0)
+                video_rec = VideoRecorder(args.record_video, fps=video_rec_cfg.get("fps", 30),
+                                          sample_hz=sample_hz)
+                tap = VideoTap(video_rec, relay_port=video_rec_cfg.get("relay_port", video_recorder.RELAY_PORT))
+                frame_read = make_frame_read(tap.address, args.decode_process)
+                video_rec.frame_read = frame_read
+                video_rec.start()
+                tap.start()
+            else:
+                frame_read = make_frame_read(args.video_source or TELLO_VIDEO_ADDRESS, args.decode_process)
+            frame_read.start()
+    elif args.record_video:
+        print("[video] --record-video без --tello: записывать нечего")
     else:
         print("[tello] disabled by CLI (no --tello)")
 
-    # --- каналы PPM ---
-    ch = [MID_US] * 8
-    ch[2] = MIN_US  # Throttle
-    for i in range(4, 8):
-        ch[i] = MIN_US
-
-    # --- автопосадка большого дрона ---
-    auto_land = AutoLandController(
-        throttle_idx=2,
-        arm_idx=7,
-        min_us=MIN_US,
-        mid_us=MID_US,
-        descend_time_fast=autoland_cfg.get("descend_time_fast", 5.0),
-        descend_time_slow=autoland_cfg.get("descend_time_slow", 10.0),
-        settle_time=autoland_cfg.get("settle_time", 1.0),
-        attitude_delta=autoland_cfg.get("attitude_delta", RETURN_SPEED),
-        land_throttle_us=autoland_cfg.get("land_throttle_us", MIN_US),
-        disarm_on_land=autoland_cfg.get("disarm_on_land", True)
-    )
+    # --- свой источник видео (synthetic:, файл) — и без Tello ---
+    if frame_read is None and args.video_source:
+        frame_read = make_frame_read(args.video_source, args.decode_process)
+        frame_read.start()
 
-    # --- автополёт назад большого дрона ---
-    auto_back = AutoBackController(
-        pitch_idx=1,
-        min_us=MIN_US,
-        mid_us=MID_US,
-        back_amplitude=autoback_cfg.get("back_amplitude", 20),
-        ramp_time=autoback_cfg.get("ramp_time", 0.5),
-        hold_time=autoback_cfg.get("hold_time", 0.1)
-    )
-
-    send_interval = 1.0 / SEND_HZ
-    last_send = 0.0
-
-    running = True
-    while running:
-        dt = clock.tick(max(120, TELLO_FPS * 2)) / 1000.0
-        keys = pygame.key.get_pressed()
-        fast = keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT]
-        step = FAST_STEP if fast else STEP
-
-        armed = ch[7] > MID_US
-        now = time.time()
-
-        # --- обработка событий ---
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-
-            elif event.type == pygame.KEYDOWN:
-                # ESC — посадить Tello (если летит) и выйти
-                if event.key == pygame.K_ESCAPE:
-                    if (tello_connected or tello_simulation) and tello_flying:
-                        print("[tello] ESC → посадка / стоп симуляции")
-                        if tello_connected and drone is not None:
-                            try:
-                                drone.land()
-                            except Exception as e:
-                                print(f"[tello] land error: {e}")
-                        tello_flying = False
-                        auto_mode = False
-                        square_mode = False
-
-                    if auto_land.is_active():
-                        auto_land.abort()
-
-                    running = False
-
-                # автопосадка: B/V
-                elif event.key == pygame.K_v:
-                    if armed and not auto_land.is_active():
-                        print("[big] AUTOLAND FAST (B)")
-                        auto_land.start(ch, now, mode="fast")
-                    elif auto_land.is_active():
-                        auto_land.abort()
-
-                elif event.key == pygame.K_b:
-                    if armed and not auto_land.is_active():
-                        print("[big] AUTOLAND SLOW (V)")
-                        auto_land.start(ch, now, mode="slow")
-                    elif auto_land.is_active():
-                        auto_land.abort()
-
-                # автополёт назад: X (циклично, логика внутри AutoBackController)
-                elif event.key == pygame.K_x:
-                    if armed:
-                        auto_back.start(ch, now)
-
-                # CH5–CH7
-                elif event.key == pygame.K_5 and armed:
-                    prev_ch5 = ch[4]
-                    ch[4] = next_two(ch[4])
-                    if prev_ch5 <= MIN_US + 10 and ch[4] >= MAX_US - 10:
-                        tello_takeoff_time = now
-                        if tello_connected:
-                            print("[tello] CH5 HIGH → Throw&Go через 1с, приготовься подбросить дрон")
-                        elif tello_simulation:
-                            print("[tello] CH5 HIGH → симуляция взлёта через 1с")
-
-                elif event.key == pygame.K_6 and armed:
-                    ch[5] = next_two(ch[5])
-
-                elif event.key == pygame.K_7 and armed:
-                    ch[6] = next_two(ch[6])
-
-                # ARM/DISARM
-                elif event.key == pygame.K_8:
-                    ch[7] = next_two(ch[7])
-
-                elif event.key == pygame.K_SPACE:
-                    for i in range(4, 8):
-                        ch[i] = MIN_US
-
-                # посадка Tello по P
-                elif event.key == pygame.K_p:
-                    if (tello_connected or tello_simulation) and tello_flying:
-                        print("[tello] P → посадка / стоп симуляции")
-                        if tello_connected and drone is not None:
-                            try:
-                                drone.land()
-                            except Exception as e:
-                                print(f"[tello] land error: {e}")
-                        tello_flying = False
-                        auto_mode = False
-                        square_mode = False
-
-        # --- PPM логика ---
-        armed = ch[7] > MID_US
-
-        if not armed:
-            ch[2] = MIN_US
-            ch[4] = MIN_US
-            ch[5] = MIN_US
-            ch[6] = MIN_US
+    # --- CV по кадрам Tello в пуле потоков (--vision), посадка на маркер по нему ---
+    cv = lander = None
+    if args.vision:
+        if frame_read is None:
+            print("[vision] --vision без видео: обрабатывать нечего")
         else:
-            # ROLL (CH1) — руками
-            if keys[pygame.K_LEFT]:
-                ch[0] = clamp(ch[0] - step)
-            if keys[pygame.K_RIGHT]:
-                ch[0] = clamp(ch[0] + step)
-
-            # PITCH (CH2) — руками, если нет автоспины назад
-            if not auto_back.is_active():
-                if keys[pygame.K_UP]:
-                    ch[1] = clamp(ch[1] + step)
-                if keys[pygame.K_DOWN]:
-                    ch[1] = clamp(ch[1] - step)
-
-            # THROTTLE (CH3) — руками, если нет автопосадки
-            if not auto_land.is_active():
-                if keys[pygame.K_w]:
-                    ch[2] = clamp(ch[2] + step)
-                if keys[pygame.K_s]:
-                    ch[2] = clamp(ch[2] - step)
-
-            # YAW (CH4) — руками
-            if keys[pygame.K_a]:
-                ch[3] = clamp(ch[3] - step)
-            if keys[pygame.K_d]:
-                ch[3] = clamp(ch[3] + step)
-
-        # центрирование стиков
-        if not (keys[pygame.K_LEFT] or keys[pygame.K_RIGHT]):
-            ch[0] = approach(ch[0], MID_US, RETURN_SPEED)
-
-        if not auto_back.is_active() and not (keys[pygame.K_UP] or keys[pygame.K_DOWN]):
-            ch[1] = approach(ch[1], MID_US, RETURN_SPEED)
-
-        if not (keys[pygame.K_a] or keys[pygame.K_d]):
-            ch[3] = approach(ch[3], MID_US, RETURN_SPEED)
-
-        # --- Tello: запуск Throw&Go / симуляции по таймеру ---
-        if tello_takeoff_time is not None and now >= tello_takeoff_time and not tello_flying:
-            if tello_connected and drone is not None:
-                print("[tello] Throw&Go — подбрось дрон!")
-                try:
-                    drone.initiate_throw_takeoff()
-                    tello_flying = True
-                except Exception as e:
-                    print(f"[tello] initiate_throw_takeoff error: {e}")
-                    tello_flying = False
-            elif tello_simulation:
-                print("[tello] симуляция: считаем, что Tello взлетел")
-                tello_flying = True
-            tello_takeoff_time = None
-
-        # --- Tello управление / симуляция ---
-        tello_lr = tello_fb = tello_ud = tello_yw = 0
-
-        if (tello_connected or tello_simulation) and tello_flying:
-            # ручной ввод
-            if keys[pygame.K_g]:
-                tello_yw = -TELLO_MANUAL_SPEED
-            elif keys[pygame.K_j]:
-                tello_yw = TELLO_MANUAL_SPEED
-
-            if keys[pygame.K_y]:
-                tello_ud = TELLO_MANUAL_SPEED
-            elif keys[pygame.K_h]:
-                tello_ud = -TELLO_MANUAL_SPEED
-
-            if keys[pygame.K_k]:
-                tello_lr = -TELLO_MANUAL_SPEED
-            elif keys[pygame.K_SEMICOLON]:
-                tello_lr = TELLO_MANUAL_SPEED
-
-            if keys[pygame.K_o]:
-                tello_fb = TELLO_MANUAL_SPEED
-            elif keys[pygame.K_l]:
-                tello_fb = -TELLO_MANUAL_SPEED
-
-            # M — авто-маятник
-            m_pressed = keys[pygame.K_m]
-            if m_pressed and not prev_m_pressed:
-                auto_mode = not auto_mode
-                if auto_mode:
-                    square_mode = False
-                    auto_dir = 1
-                    last_auto_switch = now
-                    print("[tello] Auto mode (M) ON")
-                else:
-                    print("[tello] Auto mode (M) OFF")
-            prev_m_pressed = m_pressed
-
-            # N — квадрат
-            n_pressed = keys[pygame.K_n]
-            if n_pressed and not prev_n_pressed:
-                if not square_mode:
-                    square_mode = True
-                    auto_mode = False
-                    square_step = 0
-                    square_last_switch = now
-                    print("[tello] Square mode (N) START")
-            prev_n_pressed = n_pressed
-
-            manual_active = (tello_lr != 0 or tello_fb != 0 or tello_ud != 0 or tello_yw != 0)
-
-            if auto_mode and manual_active:
-                auto_mode = False
-                print("[tello] Auto mode OFF (перехват руками)")
-
-            if square_mode and manual_active:
-                square_mode = False
-                print("[tello] Square mode OFF (перехват руками)")
-
-            # логика квадрата
-            if square_mode and not manual_active:
-                directions = [
-                    (0,  TELLO_SQUARE_SPEED),
-                    (TELLO_SQUARE_SPEED, 0),
-                    (0, -TELLO_SQUARE_SPEED),
-                    (-TELLO_SQUARE_SPEED, 0),
-                ]
-                if square_step < len(directions):
-                    tello_lr, tello_fb = directions[square_step]
-                    if now - square_last_switch > TELLO_SQUARE_STEP_TIME:
-                        square_step += 1
-                        square_last_switch = now
-                else:
-                    square_mode = False
-                    tello_lr = tello_fb = 0
-                    print("[tello] Square mode DONE")
-
-            # логика маятника
-            elif auto_mode and not manual_active:
-                if now - last_auto_switch > TELLO_AUTO_INTERVAL:
-                    auto_dir *= -1
-                    last_auto_switch = now
-                tello_lr = auto_dir * TELLO_AUTO_SPEED
-                tello_fb = 0
-
-            # отправляем RC в реальный Tello (если есть)
-            if tello_connected and drone is not None:
-                try:
-                    drone.send_rc_control(tello_lr, tello_fb, tello_ud, tello_yw)
-                except Exception as e:
-                    print(f"[tello] send_rc_control error: {e}")
-
-        # --- получение кадра Tello для отображения ---
-        video_surface = None
-        if tello_connected and frame_read is not None:
-            try:
-                frame = frame_read.frame  # numpy (BGR)
-                if frame is not None:
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    video_w, video_h = 640, 360
-                    frame_rgb = cv2.resize(frame_rgb, (video_w, video_h))
-                    video_surface = pygame.image.frombuffer(
-                        frame_rgb.tobytes(), (video_w, video_h), "RGB"
-                    )
-            except Exception:
-                video_surface = None
-
-        # --- обновляем автопосадку / авто-назад ---
-        if auto_land.is_active():
-            ch = auto_land.update(ch, now)
-
-        if auto_back.is_active():
-            ch = auto_back.update(ch, now)
-
-        # --- отправка PPM ---
-        if now - last_send >= send_interval:
-            send_line(ser, ch)
-            last_send = now
+            cv = vision.from_config(frame_read, cfg.get("vision", {}))
+            cv.start()
+            lander = precision_land.from_config(cfg)
+
+    tello = TelloController(tello_out, args.tello and TELLO_SIM_IF_NO_DRONE, tello_missions.from_config(cfg),
+                            lander)
+    tello.vision = cv
+    if tello.simulation:
+        print("[tello] simulation mode enabled (no physical drone)")
+
+    # --- журнал полёта (--record): кадры PPM пишет поток отправки ---
+    recorder = FlightRecorder(args.record) if args.record else None
+
+    # --- отправка PPM в отдельном потоке ---
+    sender = PpmSender(link, PARAMS.send_hz, recorder=recorder)
+
+    # --- подготовка видео в отдельном потоке, качество — по загрузке цикла ---
+    loop_rate = max(PARAMS.loop_hz, TELLO_FPS * 2)
+    governor_cfg = cfg.get("video_governor", {})
+    jitter_frames = max(1, int(governor_cfg.get("window", 0.5) * PARAMS.send_hz))
+    governor = VideoGovernor(1.0 / loop_rate, governor_cfg, VIDEO_SIZE,
+                             ppm_jitter=lambda: sender.recent_jitter_ms(jitter_frames))
+    video = VideoWorker(frame_read, VIDEO_SIZE)
+    video.set_format(*governor.format())
+    video.start()
+    presenter = FramePresenter(VIDEO_SIZE, debug=args.video_debug)
+
+    # --- замеры стадий цикла (--profile) ---
+    prof = LoopProfiler(enabled=args.profile)
+    prof.add_external("serial_write", sender.write_ns)
+    prof.add_external("key_to_serial", sender.key_latency_ns)
+
+    outputs = [PpmOutput(sender)]
+    if tello_out is not None:
+        outputs.append(tello_out)
+    loop = ControlLoop(PARAMS, KeyboardInput(make_bindings()), outputs, tello=tello,
+                       maneuvers=make_maneuvers(), profiler=prof)
+
+    if recorder is not None:
+        loop.outputs.append(RecorderOutput(recorder))
+        recorder.start()
+
+    sender.publish(loop.channels.ch)
+    sender.start()
+
+    while loop.running:
+        dt = clock.tick(loop_rate) / 1000.0
+        frame_t0 = time.perf_counter_ns()
+        prof.start()
+
+        inp = loop.tick(time.monotonic())
+        for event in inp.events:
+            if event.type == pygame.VIDEOEXPOSE:
+                hud.invalidate()
+
+        # --- кадр Tello: ресайзит VideoWorker, сюда попадает только новый ---
+        seq, frame = video.latest()
+        video_surface = presenter.present(seq, frame)
+
+        video_debug = None
+        if args.video_debug:
+            video_debug = (f"video: seen={video.frames_seen} in={video.frames_in} shown={video.frames_shown} "
+                           f"resize={video.convert_ms:.1f}ms | alloc/frame: "
+                           f"{presenter.alloc_bytes} B, {presenter.alloc_blocks:+d} blocks")
+            if isinstance(frame_read, ProcessFrameRead):
+                video_debug += f" | decode[{frame_read.state}]={frame_read.cpu_ms:.1f}ms cpu"
+        prof.mark("video")
 
         # --- отрисовка ---
         fps = 1.0 / dt if dt > 0 else 0.0
-        draw_ui(
-            screen, font, font_small,
-            ch, fps, portname, ser_connected,
-            tello_connected, tello_simulation, tello_flying,
-            auto_mode, square_mode,
-            tello_lr, tello_fb, tello_ud, tello_yw,
-            video_surface,
-            auto_land.current_mode()
-        )
-
-        pygame.display.flip()
+        draw_ui(hud, loop, fps, link.status(), sender.stats(),
+                video_surface, presenter.seq, video_debug, governor.status(), cv)
+        prof.mark("draw")
+        hud.flush()
+        prof.mark("flip")
+        prof.end()
 
-    # --- выход ---
-    if ser:
-        ser.close()
-
-    if tello_connected and drone is not None:
-        try:
-            print("[tello] final landing...")
-            drone.send_rc_control(0, 0, 0, 0)
-            if tello_flying:
-                drone.land()
-        except Exception as e:
-            print(f"[tello] final land error: {e}")
-        try:
-            drone.streamoff()
-        except Exception:
-            pass
-        try:
-            drone.end()
-        except Exception:
-            pass
+        # время работы кадра (без сна в clock.tick) → ступень качества видео
+        if frame_read is not None and governor.frame(time.perf_counter_ns() - frame_t0, time.monotonic()):
+            video.set_format(*governor.format())
 
+    # --- выход ---
+    if args.profile:
+        prof.export(args.profile_out)
+    sender.stop()
+    link.close()
+    if recorder is not None:
+        recorder.stop()
+
+    if cv is not None:
+        cv.stop()
+    video.stop()
+    if frame_read is not None:
+        frame_read.stop()
+    if tap is not None:
+        tap.stop()
+        video_rec.stop()
+
+    tello.shutdown(streamoff=True)
     pygame.quit()
 
 
@@ -666,6 +414,20 @@ if __name__ == "__main__":
         action="store_true",
         help="включить поддержку Tello (подключение и управление им)"
     )
+    parser.add_argument(
+        "--video-debug",
+        action="store_true",
+        help="показывать статистику видео и выделения памяти на кадр"
+    )
+    headless.add_arguments(parser)
+    loop_profiler.add_arguments(parser)
+    flight_log.add_arguments(parser)
+    video_recorder.add_arguments(parser)
+    video_decode.add_arguments(parser)
+    vision.add_arguments(parser)
     args = parser.parse_args()
 
-    main(args)
+    if args.headless:
+        main_headless(args)
+    else:
+        main(args)